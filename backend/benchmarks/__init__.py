@@ -0,0 +1 @@
+"""Performance benchmarks for cv-gen (run with ``uv run python -m benchmarks.<name>``)."""
@@ -0,0 +1,82 @@
+"""Compare two ``benchmarks.run`` result files and flag regressions.
+
+Usage::
+
+    uv run python -m benchmarks.compare base.json new.json [--threshold 0.10] [--min-delta 0.5]
+
+A stage regresses when its median is more than ``threshold`` (relative)
+*and* ``min-delta`` milliseconds (absolute) slower than in the base run;
+the absolute floor keeps sub-millisecond noise from failing the check.
+Exits with status 1 when anything regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class Change:
+    case: str
+    template: str
+    stage: str
+    base_ms: float
+    new_ms: float
+    regressed: bool
+
+    @property
+    def ratio(self) -> float:
+        return self.new_ms / self.base_ms - 1 if self.base_ms else 0.0
+
+
+def _key(record: dict) -> tuple[str, str, str]:
+    return record["case"], record["template"], record["stage"]
+
+
+def compare(base: dict, new: dict, *, threshold: float = 0.10, min_delta_ms: float = 0.5) -> list[Change]:
+    """Return the median changes for every stage present in both runs."""
+    base_results = {_key(r): r for r in base["results"]}
+    changes = []
+    for record in new["results"]:
+        old = base_results.get(_key(record))
+        if old is None:
+            continue
+        base_ms, new_ms = old["median_ms"], record["median_ms"]
+        regressed = new_ms > base_ms * (1 + threshold) and new_ms - base_ms > min_delta_ms
+        changes.append(Change(*_key(record), base_ms, new_ms, regressed))
+    return changes
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown allowed (default: 0.10).")
+    parser.add_argument("--min-delta", type=float, default=0.5, help="Absolute slowdown in ms ignored (default: 0.5).")
+    args = parser.parse_args(argv)
+
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    changes = compare(base, new, threshold=args.threshold, min_delta_ms=args.min_delta)
+
+    print(f"{'case':<10} {'template':<10} {'stage':<14} {'base':>10} {'new':>10} {'change':>8}")
+    for c in changes:
+        flag = "  REGRESSION" if c.regressed else ""
+        print(
+            f"{c.case:<10} {c.template or '-':<10} {c.stage:<14} "
+            f"{c.base_ms:>8.2f}ms {c.new_ms:>8.2f}ms {c.ratio:>+8.1%}{flag}"
+        )
+
+    regressions = [c for c in changes if c.regressed]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
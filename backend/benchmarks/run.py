@@ -0,0 +1,182 @@
+"""Time each rendering stage on synthetic CVs, for every template.
+
+Usage::
+
+    uv run python -m benchmarks.run [-n 10] [-o results.json] [--case small --case photo] [--no-pdf]
+
+Stages:
+
+- ``parse``: ``parse_cv`` with empty parser caches (first parse of a CV)
+- ``parse_cached``: ``parse_cv`` of the same text again (memoized)
+- ``html``: ``render_html``
+- ``preview``: ``render_preview_html`` (what ``/api/preview`` returns)
+- ``pdf``: ``render_pdf_bytes``
+
+Results are printed as a table and, with ``-o``, written as JSON for
+``python -m benchmarks.compare``.  ``--no-pdf`` skips the stages that
+load WeasyPrint (``preview`` and ``pdf``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.synthetic import CVSpec, synthetic_cv, write_photo
+from cv_gen import parser
+from cv_gen.renderer import get_available_templates, render_html, render_pdf_bytes, render_preview_html
+
+CASES: dict[str, CVSpec] = {
+    "small": CVSpec(sections=4, bullets=3),
+    "medium": CVSpec(sections=8, bullets=6, tables=1),
+    "large": CVSpec(sections=16, bullets=10, tables=4),
+    "photo": CVSpec(sections=8, bullets=6, photo=True),
+    "english": CVSpec(sections=8, bullets=6, language="en"),
+}
+
+STAGES = ["parse", "parse_cached", "html", "preview", "pdf"]
+# Stages that load WeasyPrint (the preview inlines assets with its URL fetcher).
+WEASYPRINT_STAGES = ("preview", "pdf")
+
+
+def measure(fn, runs: int, *, warmup: int = 1) -> dict[str, float]:
+    """Call ``fn`` ``runs`` times and summarize the wall-clock times in ms."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "stdev_ms": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def _stage_functions(markdown: str, template: str) -> dict[str, Callable[[], object]]:
+    cv = parser.parse_cv(markdown)
+
+    def parse_cold():
+        parser.clear_caches()
+        parser.parse_cv(markdown)
+
+    return {
+        "parse": parse_cold,
+        "parse_cached": lambda: parser.parse_cv(markdown),
+        "html": lambda: render_html(cv, template),
+        "preview": lambda: render_preview_html(cv, template),
+        "pdf": lambda: render_pdf_bytes(cv, template),
+    }
+
+
+def run(
+    cases: dict[str, CVSpec],
+    templates: list[str],
+    stages: list[str],
+    runs: int,
+) -> list[dict]:
+    """Benchmark every case x template x stage and return one record each."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        photo_path = write_photo(Path(tmp) / "photo.jpg")
+        for case_name, spec in cases.items():
+            markdown = synthetic_cv(spec, photo_path=str(photo_path))
+            for template in templates:
+                functions = _stage_functions(markdown, template)
+                for stage in stages:
+                    # Parsing does not depend on the template: time it once.
+                    if stage.startswith("parse") and template != templates[0]:
+                        continue
+                    stats = measure(functions[stage], runs)
+                    results.append({
+                        "case": case_name,
+                        "spec": asdict(spec),
+                        "template": template if not stage.startswith("parse") else "",
+                        "stage": stage,
+                        "runs": runs,
+                        **stats,
+                    })
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return out.stdout.strip()
+
+
+def metadata() -> dict[str, str]:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        weasyprint_version = version("weasyprint")
+    except PackageNotFoundError:
+        weasyprint_version = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "weasyprint": weasyprint_version,
+    }
+
+
+def print_table(results: list[dict]) -> None:
+    print(f"{'case':<10} {'template':<10} {'stage':<14} {'median':>10} {'min':>10} {'max':>10}")
+    for r in results:
+        print(
+            f"{r['case']:<10} {r['template'] or '-':<10} {r['stage']:<14} "
+            f"{r['median_ms']:>8.2f}ms {r['min_ms']:>8.2f}ms {r['max_ms']:>8.2f}ms"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("-n", "--runs", type=int, default=10, help="Timed runs per stage (default: 10).")
+    arg_parser.add_argument("-o", "--output", type=Path, help="Write the results as JSON to this file.")
+    arg_parser.add_argument(
+        "--case", action="append", choices=sorted(CASES), help="Case to run (repeatable, default: all)."
+    )
+    arg_parser.add_argument("--template", action="append", help="Template to run (repeatable, default: all).")
+    arg_parser.add_argument("--stage", action="append", choices=STAGES, help="Stage to run (repeatable, default: all).")
+    arg_parser.add_argument(
+        "--no-pdf", action="store_true", help="Skip the preview and PDF stages (no WeasyPrint needed)."
+    )
+    args = arg_parser.parse_args(argv)
+
+    cases = {name: CASES[name] for name in (args.case or CASES)}
+    templates = args.template or get_available_templates()
+    stages = args.stage or STAGES
+    if args.no_pdf:
+        stages = [stage for stage in stages if stage not in WEASYPRINT_STAGES]
+
+    results = run(cases, templates, stages, args.runs)
+    print_table(results)
+    if args.output:
+        args.output.write_text(
+            json.dumps({"meta": metadata(), "results": results}, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        print(f"\nResults written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare inlined template CSS against pre-parsed WeasyPrint stylesheets.
+
+Usage::
+
+    uv run python -m benchmarks.stylesheets [-n 20]
+
+For each template, renders the sample CV to PDF with the CSS inlined in a
+``<style>`` block (parsed on every render) and with the cached
+``weasyprint.CSS`` object passed through ``stylesheets=``.  Also reports the
+cost of parsing the CSS alone, which is what the cached path saves.
+
+Every variant loads fonts and images through the same ``AssetFetcher`` as
+real renders, so none of them waits on the network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import weasyprint
+
+from cv_gen.assets import make_url_fetcher
+from cv_gen.parser import parse_cv_file
+from cv_gen.renderer import get_available_templates, get_font_config, get_template, render_html
+
+SAMPLE_CV = Path(__file__).resolve().parent.parent / "examples" / "sample_cv.md"
+
+
+def _median_ms(fn, runs: int) -> float:
+    fn()  # warm up fontconfig, caches and the compiled template
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def bench_template(template_name: str, runs: int) -> dict[str, float]:
+    cv = parse_cv_file(str(SAMPLE_CV))
+    compiled = get_template(template_name)
+    inline_html = render_html(cv, template_name)
+    bare_html = render_html(cv, template_name, inline_css=False)
+    url_fetcher = make_url_fetcher([Path(compiled.base_url)])
+
+    def parse_css():
+        weasyprint.CSS(
+            string=compiled.css, base_url=compiled.base_url, url_fetcher=url_fetcher, font_config=get_font_config(),
+        )
+
+    def inline():
+        weasyprint.HTML(string=inline_html, base_url=compiled.base_url, url_fetcher=url_fetcher).write_pdf()
+
+    def cached():
+        weasyprint.HTML(string=bare_html, base_url=compiled.base_url, url_fetcher=url_fetcher).write_pdf(
+            stylesheets=[compiled.stylesheet()], font_config=get_font_config(),
+        )
+
+    return {
+        "css_parse": _median_ms(parse_css, runs),
+        "inline": _median_ms(inline, runs),
+        "cached": _median_ms(cached, runs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", "--runs", type=int, default=20, help="Timed runs per case (default: 20).")
+    args = parser.parse_args()
+
+    print(f"{'template':<10} {'css parse':>10} {'inline':>10} {'cached':>10} {'saved':>10}")
+    for name in get_available_templates():
+        r = bench_template(name, args.runs)
+        saved = r["inline"] - r["cached"]
+        print(
+            f"{name:<10} {r['css_parse']:>8.1f}ms {r['inline']:>8.1f}ms "
+            f"{r['cached']:>8.1f}ms {saved:>8.1f}ms ({saved / r['inline']:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Synthetic Markdown CVs of configurable size for benchmarks.
+
+Usage::
+
+    uv run python -m benchmarks.synthetic --sections 12 --bullets 8 --tables 2 --language en
+
+prints a generated CV.  Output is deterministic for a given set of options.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+# Section headings per language, in the order they are generated.  The
+# first six map to the section types the parser detects.
+HEADINGS: dict[str, list[str]] = {
+    "es": ["Perfil", "Experiencia", "Educacion", "Habilidades", "Idiomas", "Proyectos", "Certificaciones", "Otros"],
+    "en": ["Profile", "Experience", "Education", "Skills", "Languages", "Projects", "Certifications", "Other"],
+    "fr": ["Profil", "Experience", "Formation", "Competences", "Langues", "Projets", "Certificats", "Divers"],
+    "de": ["Profil", "Erfahrung", "Ausbildung", "Kenntnisse", "Sprachen", "Projekte", "Zertifikate", "Sonstiges"],
+}
+
+_WORDS = (
+    "diseno desarrollo plataforma equipo sistemas arquitectura rendimiento datos "
+    "migracion servicios clientes calidad pruebas despliegue mejora lider "
+    "platform team systems architecture performance data migration services "
+    "clients quality testing deployment improvement lead cloud api"
+).split()
+
+
+@dataclass(frozen=True)
+class CVSpec:
+    """Shape of a synthetic CV."""
+
+    sections: int = 6
+    bullets: int = 5
+    tables: int = 0
+    photo: bool = False
+    language: str = "es"
+
+    @property
+    def name(self) -> str:
+        parts = [f"s{self.sections}", f"b{self.bullets}", f"t{self.tables}", self.language]
+        if self.photo:
+            parts.append("photo")
+        return "-".join(parts)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _table(rng: random.Random, rows: int = 4) -> str:
+    lines = ["| Tecnologia | Nivel | Anos |", "|---|---|---|"]
+    for _ in range(rows):
+        name, level = rng.choice(_WORDS).title(), rng.choice(["Alto", "Medio", "Experto"])
+        lines.append(f"| {name} | {level} | {rng.randint(1, 12)} |")
+    return "\n".join(lines)
+
+
+def synthetic_cv(spec: CVSpec, *, photo_path: str = "", seed: int = 0) -> str:
+    """Return a Markdown CV shaped by ``spec``.
+
+    ``tables`` tables are spread over the sections.  ``photo_path`` is
+    written to the frontmatter when ``spec.photo`` is set (see
+    :func:`write_photo`).
+    """
+    if spec.language not in HEADINGS:
+        raise ValueError(f"Unknown language '{spec.language}'. Available: {', '.join(HEADINGS)}")
+    rng = random.Random(seed)
+    headings = HEADINGS[spec.language]
+
+    lines = [
+        "---",
+        "name: Maria Lopez Fernandez",
+        "title: Staff Software Engineer",
+        "email: maria@example.com",
+        'phone: "+34 600 000 000"',
+        "location: Madrid",
+        "linkedin: linkedin.com/in/maria",
+        "github: github.com/maria",
+    ]
+    if spec.photo:
+        lines.append(f"photo: {photo_path}")
+    lines += ["---", ""]
+
+    tables_left = spec.tables
+    for i in range(spec.sections):
+        heading = headings[i % len(headings)]
+        if i >= len(headings):
+            heading = f"{heading} {i // len(headings) + 1}"
+        lines += [f"## {heading}", ""]
+        if i == 0:
+            lines += [_sentence(rng, 40), ""]
+            continue
+        lines += [f"### {_sentence(rng, 3)[:-1]} | Empresa {i} | 20{10 + i % 15} - Presente", ""]
+        lines += [f"- **{rng.choice(_WORDS).title()}**: {_sentence(rng, 14)}" for _ in range(spec.bullets)]
+        lines.append("")
+        # Spread the tables evenly over the remaining sections.
+        sections_left = spec.sections - i
+        for _ in range(-(-tables_left // sections_left)):
+            lines += [_table(rng), ""]
+            tables_left -= 1
+    return "\n".join(lines)
+
+
+def write_photo(path: Path, size: int = 1600) -> Path:
+    """Write a ``size`` x ``size`` JPEG, about what a phone camera crop weighs."""
+    from PIL import Image
+
+    image = Image.effect_noise((size, size), 64).convert("RGB")
+    image.save(path, format="JPEG", quality=90)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--bullets", type=int, default=5)
+    parser.add_argument("--tables", type=int, default=0)
+    parser.add_argument("--language", choices=sorted(HEADINGS), default="es")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    spec = CVSpec(args.sections, args.bullets, args.tables, language=args.language)
+    print(synthetic_cv(spec, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
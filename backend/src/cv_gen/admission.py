@@ -0,0 +1,105 @@
+"""Admission control: a bounded queue in front of expensive work.
+
+At most ``limit`` items run at once.  Beyond that, up to ``max_queue``
+callers wait in FIFO order for at most ``max_wait`` seconds each; anyone
+else is turned away at once with :class:`Overloaded`, so a spike gets fast
+errors instead of ever-growing latency for everyone.  Runs on one event
+loop; not thread-safe.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from time import perf_counter
+
+from cv_gen import metrics
+
+
+class Overloaded(Exception):
+    """The queue is full, or the wait for a slot ran out."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionQueue:
+    def __init__(self, name: str, limit: int, *, max_queue: int, max_wait: float) -> None:
+        if limit < 1:
+            raise ValueError(f"Invalid concurrency limit for {name}: {limit}")
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds a rejected caller should wait before retrying."""
+        return max(1, math.ceil(self.max_wait))
+
+    def _update_gauges(self) -> None:
+        metrics.QUEUE_ACTIVE.set(self.active, queue=self.name)
+        metrics.QUEUE_DEPTH.set(len(self._waiters), queue=self.name)
+
+    def _reject(self, reason: str, message: str) -> Overloaded:
+        metrics.QUEUE_REJECTED.inc(queue=self.name, reason=reason)
+        return Overloaded(message, self.retry_after)
+
+    async def _acquire(self, wait: bool) -> None:
+        start = perf_counter()
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+        else:
+            if not wait and len(self._waiters) >= self.max_queue:
+                raise self._reject("full", f"Too many {self.name} requests queued")
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._update_gauges()
+            try:
+                await asyncio.wait_for(waiter, None if wait else self.max_wait)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()  # handed a slot just as we gave up
+                elif waiter in self._waiters:  # _release may have skipped it already
+                    self._waiters.remove(waiter)
+                    self._update_gauges()
+                if isinstance(exc, asyncio.TimeoutError):
+                    raise self._reject("timeout", f"Timed out waiting for a {self.name} slot") from None
+                raise
+        metrics.QUEUE_WAIT_SECONDS.observe(perf_counter() - start, queue=self.name)
+        self._update_gauges()
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest waiter still waiting.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self, *, wait: bool = False) -> AsyncIterator[None]:
+        """Hold one of the ``limit`` slots for the duration of the block.
+
+        With ``wait``, queue however long it takes (background work that
+        has no client waiting on it): the queue depth and deadline do not
+        apply, only the concurrency limit.
+        """
+        await self._acquire(wait)
+        try:
+            yield
+        finally:
+            self._release()
@@ -0,0 +1,132 @@
+"""Persistent cache of AI results, in SQLite.
+
+AI calls take seconds and cost tokens, and users repeat them: the same
+document uploaded again, the same CV adapted to the same offer.  Results
+are stored under a key that covers everything that determines them
+(input hashes, provider, model, prompt version), kept for ``AI_CACHE_TTL``
+seconds, and evicted least recently used first once the cache holds more
+than ``AI_CACHE_MB``.
+
+The cache is best effort: a database error is logged and treated as a
+miss, never as a failed request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+AI_CACHE_DB = Path(os.getenv("CV_GEN_AI_CACHE_DB") or Path.home() / ".cache" / "cv-gen" / "ai.sqlite3")
+AI_CACHE_TTL = float(os.getenv("CV_GEN_AI_CACHE_TTL", str(30 * 24 * 3600)))
+# 0 disables the cache.
+AI_CACHE_MB = float(os.getenv("CV_GEN_AI_CACHE_MB", "64"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+def cache_key(operation: str, *parts: str) -> str:
+    """Key for the result of ``operation`` on ``parts`` (hashes, provider,
+    model, prompt version...)."""
+    return hashlib.sha256(json.dumps([operation, *parts]).encode()).hexdigest()
+
+
+class AIResultCache:
+    """JSON values by key in a SQLite database, bounded by age and size.
+
+    Methods block on SQLite; call them from a thread in async code.
+    """
+
+    def __init__(self, path: Path = AI_CACHE_DB, *, ttl: float = AI_CACHE_TTL, max_mb: float = AI_CACHE_MB) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> object | None:
+        """Return the cached value, or None if missing or expired."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM results WHERE key = ? AND expires > ?", (key, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        except (sqlite3.Error, OSError):
+            logger.exception("Cannot read the AI cache at %s", self.path)
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, value: object) -> None:
+        """Store ``value`` (JSON-serializable), evicting expired entries and,
+        while over the size bound, the least recently used ones."""
+        if not self.enabled:
+            return
+        data = json.dumps(value)
+        size = len(data.encode())
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, data, size, now + self.ttl, now),
+                )
+                conn.execute("DELETE FROM results WHERE expires <= ?", (now,))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+                if total > self.max_bytes:
+                    # Drop the oldest entries whose sizes add up to the excess.
+                    conn.execute(
+                        "DELETE FROM results WHERE key IN ("
+                        " SELECT key FROM (SELECT key, size, SUM(size) OVER (ORDER BY accessed, key) AS freed"
+                        " FROM results) WHERE freed - size < ?)",
+                        (total - self.max_bytes,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, OSError):
+            logger.exception("Cannot write the AI cache at %s", self.path)
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM results")
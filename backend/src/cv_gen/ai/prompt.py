@@ -1,5 +1,14 @@
 """System prompts for CV operations."""
 
+import hashlib
+
+
+def prompt_version(prompt: str) -> str:
+    """Short hash of a prompt: cached AI results record the version of the
+    prompt that produced them, so editing a prompt invalidates them."""
+    return hashlib.sha256(prompt.encode()).hexdigest()[:16]
+
+
 SYSTEM_PROMPT = """\
 You are a CV/resume converter. Your task is to convert the provided document \
 into Markdown with YAML frontmatter, following this exact format:
@@ -53,6 +62,8 @@ Rules:
 - Output ONLY the Markdown document, no explanations or commentary
 """
 
+SYSTEM_PROMPT_VERSION = prompt_version(SYSTEM_PROMPT)
+
 ADAPT_AND_SUGGEST_SYSTEM_PROMPT = """\
 You are an expert CV optimizer and career coach.
 Given a CV and a job offer, perform two tasks in a single response.
@@ -91,3 +102,7 @@ OUTPUT FORMAT — use these exact delimiters, nothing before or after:
 def build_adapt_user_prompt(cv_markdown: str, job_offer: str) -> str:
     """Build the user message for combined CV adaptation and suggestions."""
     return f"JOB OFFER:\n{job_offer}\n\n---\n\nCV TO ADAPT:\n{cv_markdown}"
+
+
+# Covers the user message template too: changing either changes results.
+ADAPT_AND_SUGGEST_PROMPT_VERSION = prompt_version(ADAPT_AND_SUGGEST_SYSTEM_PROMPT + build_adapt_user_prompt("", ""))
@@ -2,101 +2,634 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
+import json
 import logging
+import math
 import os
 import re
+import shutil
+import tempfile
+import zipfile
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO
 
 import asyncio
-from collections import defaultdict
-from time import time
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from time import perf_counter
 
-import weasyprint
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request, UploadFile
+from fastapi import FastAPI, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
-
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from cv_gen import metrics
+from cv_gen.admission import AdmissionQueue, Overloaded
+from cv_gen.ai.cache import AIResultCache, cache_key
 from cv_gen.ai.providers import get_provider, is_ai_configured
+from cv_gen.batch import ArchiveLimitError, is_archive, is_markdown, read_archive
+from cv_gen.cache import LRUCache
 from cv_gen.extractors import SUPPORTED_EXTENSIONS, extract_text, get_extension
+from cv_gen.jobs import DONE, FAILED, JOB_WORKERS, Job, JobQueue, run_worker
+from cv_gen.models import CVData
 from cv_gen.parser import parse_cv
-from cv_gen.renderer import TEMPLATES_DIR, get_available_templates, render_html
+from cv_gen.pool import RENDER_WORKERS, RenderPool, warm_up
+from cv_gen.ratelimit import MemoryBackend, RateLimitBackend, RateLimiter, SQLiteBackend
+from cv_gen.singleflight import SingleFlight
+from cv_gen.renderer import get_available_templates, get_template, render_pdf, render_preview_html
 
 logger = logging.getLogger(__name__)
 
 load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
 
 CORS_ORIGIN = os.getenv("CORS_ORIGIN", "http://localhost:5173")
+PDF_CACHE_MB = int(os.getenv("CV_GEN_PDF_CACHE_MB", "64"))
+# Renders are written to a spooled file: kept in memory up to this size,
+# moved to a temporary file on disk beyond it.
+PDF_SPOOL_BYTES = int(float(os.getenv("CV_GEN_PDF_SPOOL_MB", "2")) * 1024 * 1024)
+PDF_CHUNK_SIZE = 64 * 1024
+MAX_MARKDOWN_CHARS = 20_000
+BULK_MAX_ITEMS = int(os.getenv("CV_GEN_BULK_MAX_ITEMS", "100"))
+BULK_MAX_UPLOAD_BYTES = int(float(os.getenv("CV_GEN_BULK_MAX_UPLOAD_MB", "20")) * 1024 * 1024)
+# Renders of one bulk request running at the same time.
+BULK_CONCURRENCY = int(os.getenv("CV_GEN_BULK_CONCURRENCY", "4"))
+# Renders running at once (on the render pool or the thread pool); more
+# requests wait in a queue of RENDER_QUEUE_DEPTH for RENDER_QUEUE_TIMEOUT
+# seconds at most, and get a 503 beyond that.
+RENDER_CONCURRENCY = int(os.getenv("CV_GEN_RENDER_CONCURRENCY") or RENDER_WORKERS or 4)
+RENDER_QUEUE_DEPTH = int(os.getenv("CV_GEN_RENDER_QUEUE_DEPTH", "32"))
+RENDER_QUEUE_TIMEOUT = float(os.getenv("CV_GEN_RENDER_QUEUE_TIMEOUT", "10"))
+# AI requests allowed per client IP and window (seconds).
+AI_RATE_LIMIT = int(os.getenv("CV_GEN_AI_RATE_LIMIT", "10"))
+AI_RATE_WINDOW = 60
+# Rate limit state shared by every process using this SQLite file;
+# per-process (in memory) when unset.
+RATE_LIMIT_DB = os.getenv("CV_GEN_RATE_LIMIT_DB", "")
+
+
+def _ai_limiter_backend() -> RateLimitBackend:
+    # A database shared by every worker process keeps the limit global.
+    if RATE_LIMIT_DB:
+        return SQLiteBackend(Path(RATE_LIMIT_DB))
+    return MemoryBackend()
+
+
+_ai_limiter = RateLimiter(AI_RATE_LIMIT, AI_RATE_WINDOW, _ai_limiter_backend())
 
 
-class _SlidingWindowLimiter:
-    """In-memory sliding window rate limiter (per IP)."""
+async def _ai_rate_limit(request: Request) -> None:
+    key = request.client.host if request.client else "unknown"
+    result = await _ai_limiter.check(key)
+    if not result.allowed:
+        raise HTTPException(
+            429,
+            "Too many requests — please wait before trying again.",
+            headers={"Retry-After": str(math.ceil(result.retry_after))},
+        )
+
+
+_render_pool = RenderPool(RENDER_WORKERS) if RENDER_WORKERS > 0 else None
+# Without the pool, PDFs render on this fixed set of threads, all warmed up
+# at startup.  Each thread keeps its own FontConfiguration and parsed
+# stylesheets (see cv_gen.renderer); on the shared thread pool every one of
+# its threads would pay for them on its first render and keep a copy.
+_render_threads = (
+    ThreadPoolExecutor(RENDER_CONCURRENCY, thread_name_prefix="cv-gen-render") if _render_pool is None else None
+)
+_render_queue = AdmissionQueue(
+    "render", RENDER_CONCURRENCY, max_queue=RENDER_QUEUE_DEPTH, max_wait=RENDER_QUEUE_TIMEOUT
+)
+# Identical requests in flight share one render or one AI call.
+_pdf_flights: SingleFlight[bytes | BinaryIO] = SingleFlight("pdf")
+_convert_flights: SingleFlight[str] = SingleFlight("ai_convert")
+_ai_cache = AIResultCache()
+_adapt_flights: SingleFlight[dict] = SingleFlight("ai_adapt")
 
-    def __init__(self, limit: int, window: int) -> None:
-        self._limit = limit
-        self._window = window  # seconds
-        self._buckets: dict[str, list[float]] = defaultdict(list)
-        self._lock = asyncio.Lock()
 
-    async def check(self, key: str) -> bool:
-        async with self._lock:
-            now = time()
-            self._buckets[key] = [t for t in self._buckets[key] if now - t < self._window]
-            if len(self._buckets[key]) >= self._limit:
-                return False
-            self._buckets[key].append(now)
-            return True
+# "starting" until the startup warmup finishes, then "ready" or "failed".
+_warmup_state: dict[str, str] = {"status": "starting"}
 
 
-_ai_limiter = _SlidingWindowLimiter(limit=10, window=60)
+def _compile_templates() -> None:
+    for name in get_available_templates():
+        get_template(name)
 
 
-async def _ai_rate_limit(request: Request) -> None:
-    key = request.client.host if request.client else "unknown"
-    if not await _ai_limiter.check(key):
-        raise HTTPException(429, "Too many requests — please wait before trying again.")
+def _warm_up_render_thread(barrier: threading.Barrier) -> None:
+    # Every task waits for the others first, so each one runs on its own thread.
+    barrier.wait(timeout=60)
+    warm_up()
 
 
-app = FastAPI(title="cv-gen")
+async def _warm_up() -> None:
+    """Compile every template and warm the render threads (or the pool workers)."""
+    try:
+        if _render_pool is not None:
+            # Workers warm themselves up (pool initializer).
+            await run_in_threadpool(_compile_templates)
+            await _render_pool.start()
+        else:
+            loop = asyncio.get_running_loop()
+            barrier = threading.Barrier(RENDER_CONCURRENCY)
+            await asyncio.gather(*(
+                loop.run_in_executor(_render_threads, _warm_up_render_thread, barrier)
+                for _ in range(RENDER_CONCURRENCY)
+            ))
+    except Exception as exc:
+        logger.exception("Startup warmup failed")
+        _warmup_state.update(status="failed", error=str(exc))
+    else:
+        _warmup_state.update(status="ready")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _job_wake
+    # Warm up in the background: the app starts answering right away and
+    # /api/health/ready reports when renders are fast.
+    _warmup_state.clear()
+    _warmup_state.update(status="starting")
+    task = asyncio.create_task(_warm_up())
+    # A new event per run: an asyncio.Event belongs to the loop it is used in.
+    _job_wake = asyncio.Event()
+    # Job workers start with the first job submitted here, or right away if
+    # the queue already exists (jobs left by a restart or another process).
+    if await run_in_threadpool(_job_queue.path.exists):
+        _start_job_workers()
+    yield
+    task.cancel()
+    for worker in _job_workers:
+        worker.cancel()
+    # Workers put the job they were running back in the queue.
+    await asyncio.gather(*_job_workers, return_exceptions=True)
+    _job_workers.clear()
+    if _render_pool is not None:
+        _render_pool.shutdown()
+
+
+class _ServerTimingMiddleware:
+    """Time every request: a ``Server-Timing`` header with the pipeline
+    stages it ran, and the ``cv_gen_http_request_seconds`` histogram."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        with metrics.collect_timings() as timings:
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    total = ("total", perf_counter() - start)
+                    MutableHeaders(scope=message).append("Server-Timing", metrics.server_timing([*timings, total]))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # The route template, not the raw path, keeps label cardinality bounded.
+                route = getattr(scope.get("route"), "path", "unmatched")
+                metrics.HTTP_REQUEST_SECONDS.observe(
+                    perf_counter() - start, method=scope["method"], route=route, status=str(status)
+                )
+
+
+app = FastAPI(title="cv-gen", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[CORS_ORIGIN],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
+app.add_middleware(_ServerTimingMiddleware)
+
+
+@app.exception_handler(Overloaded)
+async def _overloaded(request: Request, exc: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        {"detail": f"Server busy: {exc}. Please try again shortly."},
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
 
 
 class RenderRequest(BaseModel):
-    markdown: str = Field(..., max_length=20_000)
+    markdown: str = Field(..., max_length=MAX_MARKDOWN_CHARS)
     template: str = "modern"
 
 
+class MultiRenderRequest(BaseModel):
+    markdown: str = Field(..., max_length=MAX_MARKDOWN_CHARS)
+    templates: list[str] = Field(default_factory=list)  # empty: every template
+
+
 @app.get("/api/templates")
 def list_templates() -> dict:
     return {"templates": get_available_templates(), "default": "modern"}
 
 
-@app.post("/api/pdf")
-def pdf(req: RenderRequest) -> Response:
+@app.get("/api/health/ready")
+def health_ready() -> JSONResponse:
+    """Readiness probe: 200 once templates are compiled and renders warmed up."""
+    if _warmup_state["status"] == "ready":
+        return JSONResponse({"status": "ready", "templates": get_available_templates()})
+    return JSONResponse(dict(_warmup_state), status_code=503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def _check_template(name: str) -> None:
     available = get_available_templates()
-    if req.template not in available:
-        raise HTTPException(400, f"Unknown template '{req.template}'. Available: {', '.join(available)}")
-    cv = parse_cv(req.markdown)
-    html_string = render_html(cv, req.template)
-    pdf_bytes = weasyprint.HTML(
-        string=html_string,
-        base_url=str(TEMPLATES_DIR / req.template),
-    ).write_pdf()
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=cv.pdf"},
+    if name not in available:
+        raise HTTPException(400, f"Unknown template '{name}'. Available: {', '.join(available)}")
+
+
+# --- PDF rendering ---
+
+_pdf_cache: LRUCache[bytes] = LRUCache(
+    max_bytes=PDF_CACHE_MB * 1024 * 1024,
+    max_item_bytes=PDF_CACHE_MB * 1024 * 1024 // 8,
+)
+
+
+def _normalize_markdown(text: str) -> str:
+    """Normalize line endings and trailing whitespace (no effect on the output)."""
+    return text.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+
+
+def _pdf_cache_key(markdown: str, template: str, version: str) -> str:
+    """Content address of a render: hash of markdown, template name and version."""
+    h = hashlib.sha256()
+    h.update(f"{template}\0{version}\0".encode())
+    h.update(markdown.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def _render_in_process(source: str | CVData, template: str) -> BinaryIO:
+    spool = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_BYTES)
+    try:
+        cv = parse_cv(source) if isinstance(source, str) else source
+        render_pdf(cv, spool, template)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def _render_pdf(source: str | CVData, template: str, *, wait: bool = False) -> BinaryIO:
+    """Render Markdown or a parsed CV on the process pool when configured,
+    else on the render threads.
+
+    Renders go through the render admission queue: when it is full this
+    raises :class:`Overloaded`, unless ``wait`` (background work) is set.
+    Returns the PDF as an open file; the caller closes it.
+    """
+    async with _render_queue.slot(wait=wait):
+        if _render_pool is not None:
+            return await _render_pool.render_pdf(source, template)
+        # Run in a copy of the context, like run_in_threadpool: stage timings
+        # are recorded for this request.
+        render = functools.partial(contextvars.copy_context().run, _render_in_process, source, template)
+        return await asyncio.get_running_loop().run_in_executor(_render_threads, render)
+
+
+def _iter_file(f: BinaryIO) -> Iterator[bytes]:
+    try:
+        while chunk := f.read(PDF_CHUNK_SIZE):
+            yield chunk
+    finally:
+        f.close()
+
+
+@app.post("/api/pdf")
+async def pdf(req: RenderRequest, request: Request) -> Response:
+    _check_template(req.template)
+    markdown = _normalize_markdown(req.markdown)
+    key = _pdf_cache_key(markdown, req.template, get_template(req.template).version)
+    # Rendering is deterministic, so the content address is a strong ETag.
+    etag = f'"{key}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    headers = {"Content-Disposition": "attachment; filename=cv.pdf", "ETag": etag}
+    pdf_file = await _cached_pdf(markdown, req.template)
+    if isinstance(pdf_file, io.BytesIO):
+        return Response(content=pdf_file.getvalue(), media_type="application/pdf", headers=headers)
+    # Large documents are streamed from disk and not cached, so a request
+    # never holds a whole big PDF in memory.
+    headers["Content-Length"] = str(pdf_file.seek(0, os.SEEK_END))
+    pdf_file.seek(0)
+    # Also closed once the response is done, in case the body was never iterated.
+    return StreamingResponse(
+        _iter_file(pdf_file), media_type="application/pdf", headers=headers, background=BackgroundTask(pdf_file.close)
     )
 
 
+async def _render_and_cache(key: str, source: str | CVData, template: str, wait: bool) -> bytes | BinaryIO:
+    """Render; cache and return the bytes of a small PDF, or return the
+    open file of a large one (those are not cached)."""
+    pdf_file = await _render_pdf(source, template, wait=wait)
+    if pdf_file.seek(0, os.SEEK_END) > PDF_SPOOL_BYTES:
+        pdf_file.seek(0)
+        return pdf_file
+    pdf_file.seek(0)
+    with pdf_file:
+        pdf_bytes = pdf_file.read()
+    _pdf_cache.put(key, pdf_bytes)
+    return pdf_bytes
+
+
+def _close_pdf_file(result: bytes | BinaryIO) -> None:
+    # A large PDF rendered for a caller that has gone: nobody else takes its file.
+    if not isinstance(result, bytes):
+        result.close()
+
+
+async def _cached_pdf(markdown: str, template: str, cv: CVData | None = None, *, wait: bool = False) -> BinaryIO:
+    """Return the PDF of ``markdown`` (already parsed as ``cv``, if given)
+    in ``template`` from the PDF cache, or render it.
+
+    Identical concurrent calls share one render.  A PDF too large for the
+    cache cannot be shared: its file goes to the caller that started the
+    render, and the others render their own.
+    """
+    key = _pdf_cache_key(markdown, template, get_template(template).version)
+    pdf_bytes = _pdf_cache.get(key)
+    if pdf_bytes is not None:
+        return io.BytesIO(pdf_bytes)
+    source = cv if cv is not None else markdown
+    # Background renders wait for the render queue and interactive ones
+    # may be turned away: they only share renders with their own kind.
+    result, joined = await _pdf_flights.do(
+        (key, wait), lambda: _render_and_cache(key, source, template, wait), discard=_close_pdf_file
+    )
+    if isinstance(result, bytes):
+        return io.BytesIO(result)
+    if joined:
+        pdf_file = await _render_pdf(source, template, wait=wait)
+        pdf_file.seek(0)
+        return pdf_file
+    return result
+
+
+@app.post("/api/pdf/templates")
+async def pdf_templates(req: MultiRenderRequest) -> StreamingResponse:
+    """Render one CV with several templates (default: all) into a ZIP.
+
+    The Markdown is parsed once and the templates are rendered
+    concurrently; entries are named ``cv-<template>.pdf``.
+    """
+    templates = list(dict.fromkeys(req.templates)) or get_available_templates()
+    for name in templates:
+        _check_template(name)
+    markdown = _normalize_markdown(req.markdown)
+    cv = await run_in_threadpool(parse_cv, markdown)
+
+    results = await asyncio.gather(
+        *(_cached_pdf(markdown, template, cv) for template in templates), return_exceptions=True
+    )
+    pdf_files = [r for r in results if not isinstance(r, BaseException)]
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        for pdf_file in pdf_files:
+            pdf_file.close()
+        raise errors[0]
+
+    # PDFs are already compressed: store them as they are.
+    archive = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_BYTES)
+    try:
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+            for template, pdf_file in zip(templates, pdf_files):
+                with pdf_file, zf.open(f"cv-{template}.pdf", "w") as entry:
+                    shutil.copyfileobj(pdf_file, entry, PDF_CHUNK_SIZE)
+        size = archive.tell()
+        archive.seek(0)
+    except BaseException:
+        archive.close()
+        for pdf_file in pdf_files:
+            pdf_file.close()
+        raise
+    headers = {"Content-Disposition": "attachment; filename=cv-templates.zip", "Content-Length": str(size)}
+    return StreamingResponse(_iter_file(archive), media_type="application/zip", headers=headers)
+
+
+# --- Bulk render ---
+
+
+@dataclass
+class _BulkItem:
+    source: str  # uploaded file name, or path inside an uploaded archive
+    output: str  # entry name in the result ZIP, without extension
+    markdown: str = ""
+    error: str = ""
+
+
+def _bulk_items(uploads: list[tuple[str, bytes]]) -> list[_BulkItem]:
+    """Expand uploaded Markdown files and archives into one item per CV."""
+    max_bytes = MAX_MARKDOWN_CHARS * 4  # UTF-8
+    too_many = f"Too many CVs (max {BULK_MAX_ITEMS})"
+    # Archives never expand beyond what BULK_MAX_ITEMS valid CVs could hold.
+    archive_budget = BULK_MAX_ITEMS * max_bytes
+    sources: list[tuple[str, bytes | None, str]] = []
+
+    def add(source: str, data: bytes | None, error: str = "") -> None:
+        if len(sources) >= BULK_MAX_ITEMS:
+            raise HTTPException(400, too_many)
+        sources.append((source, data, error))
+
+    for filename, data in uploads:
+        if is_archive(filename):
+            try:
+                members = read_archive(
+                    filename,
+                    data,
+                    max_member_bytes=max_bytes,
+                    max_members=BULK_MAX_ITEMS - len(sources),
+                    max_total_bytes=archive_budget,
+                )
+            except ArchiveLimitError as exc:
+                raise HTTPException(400, f"{too_many}: {exc}") from exc
+            except ValueError as exc:
+                add(filename, None, str(exc))
+                continue
+            archive_budget -= sum(len(content) for _, content in members if content is not None)
+            for name, content in members:
+                add(f"{filename}/{name}", content)
+        elif is_markdown(filename):
+            add(filename, data if len(data) <= max_bytes else None)
+        else:
+            add(filename, None, "Unsupported file type (expected .md, .zip, .tar or .tar.gz)")
+
+    items: list[_BulkItem] = []
+    outputs: set[str] = set()
+    for source, data, error in sources:
+        stem = Path(source).stem or "cv"
+        output, n = stem, 1
+        while output in outputs:
+            n += 1
+            output = f"{stem}-{n}"
+        outputs.add(output)
+        item = _BulkItem(source, output, error=error)
+        items.append(item)
+        if error:
+            continue
+        too_large = f"CV too large (max {MAX_MARKDOWN_CHARS} characters)"
+        if data is None:
+            item.error = too_large
+            continue
+        try:
+            item.markdown = _normalize_markdown(data.decode("utf-8"))
+        except UnicodeDecodeError:
+            item.error = "Not valid UTF-8"
+            continue
+        if len(item.markdown) > MAX_MARKDOWN_CHARS:
+            item.error = too_large
+    return items
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable stream: zipfile then writes entries one after
+    another (with data descriptors), so the archive can be sent as it grows."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _bulk_zip(items: list[_BulkItem], template: str) -> AsyncIterator[bytes]:
+    """Render ``items`` concurrently and yield the ZIP as renders complete.
+
+    Failed items become ``<name>.error.txt`` entries; ``results.json``
+    closes the archive with the outcome of every item, in upload order.
+    """
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def render(item: _BulkItem) -> tuple[_BulkItem, BinaryIO | None]:
+        if item.error:
+            return item, None
+        async with semaphore:
+            try:
+                # The batch has its own concurrency limit: wait for the
+                # render queue rather than fail items under load.
+                return item, await _cached_pdf(item.markdown, template, wait=True)
+            except Exception as exc:  # one bad CV must not fail the batch
+                logger.warning("Bulk render of %s failed: %s", item.source, exc)
+                item.error = str(exc) or type(exc).__name__
+                return item, None
+
+    tasks = [asyncio.ensure_future(render(item)) for item in items]
+    sink = _ZipSink()
+    try:
+        # Deflate rather than store: streaming readers cannot size stored
+        # entries written with data descriptors.
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for next_done in asyncio.as_completed(tasks):
+                item, pdf_file = await next_done
+                if pdf_file is None:
+                    zf.writestr(f"{item.output}.error.txt", f"{item.source}: {item.error}\n")
+                else:
+                    with pdf_file, zf.open(f"{item.output}.pdf", "w") as entry:
+                        while chunk := pdf_file.read(PDF_CHUNK_SIZE):
+                            entry.write(chunk)
+                            yield sink.drain()
+                yield sink.drain()
+            results = [
+                {"source": i.source, "file": None if i.error else f"{i.output}.pdf", "error": i.error or None}
+                for i in items
+            ]
+            zf.writestr("results.json", json.dumps(results, indent=2, ensure_ascii=False))
+        yield sink.drain()
+    finally:
+        # Client gone: stop pending renders and close finished ones.
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None and task.result()[1] is not None:
+                task.result()[1].close()
+
+
+@app.post("/api/pdf/bulk")
+async def pdf_bulk(files: list[UploadFile], template: str = Form("modern")) -> StreamingResponse:
+    """Render many CVs (Markdown files, or zip/tar archives of them) with
+    one template, streaming back a ZIP of ``<name>.pdf`` entries."""
+    _check_template(template)
+    uploads = []
+    remaining = BULK_MAX_UPLOAD_BYTES
+    too_large = HTTPException(400, f"Upload too large (max {BULK_MAX_UPLOAD_BYTES // (1024 * 1024)} MB)")
+    for file in files:
+        # Uploads are spooled to disk by the form parser: check the size
+        # before reading, and never read more than the remaining budget.
+        if file.size is not None and file.size > remaining:
+            raise too_large
+        data = await file.read(remaining + 1)
+        if len(data) > remaining:
+            raise too_large
+        remaining -= len(data)
+        uploads.append((file.filename or "cv.md", data))
+    items = await run_in_threadpool(_bulk_items, uploads)
+    if not items:
+        raise HTTPException(400, "No CVs found in the upload")
+
+    headers = {"Content-Disposition": "attachment; filename=cvs.zip"}
+    return StreamingResponse(_bulk_zip(items, template), media_type="application/zip", headers=headers)
+
+
+# --- HTML preview ---
+
+
+@app.post("/api/preview")
+def preview(req: RenderRequest) -> HTMLResponse:
+    """Fast preview: the template HTML with assets inlined, no PDF layout."""
+    _check_template(req.template)
+    html = render_preview_html(parse_cv(_normalize_markdown(req.markdown)), req.template)
+    return HTMLResponse(html)
+
+
 # --- AI document conversion ---
 
 
@@ -105,14 +638,18 @@ def _strip_code_fences(text: str) -> str:
     return re.sub(r"^```(?:markdown|md|yaml)?\n(.*?)```\s*$", r"\1", text, flags=re.DOTALL)
 
 
+def _ai_call(operation: str):
+    """Time a provider call in the ``cv_gen_ai_request_seconds`` histogram."""
+    return metrics.ai_call(os.getenv("AI_PROVIDER", ""), os.getenv("AI_MODEL", ""), operation)
+
+
 @app.get("/api/ai/status")
 def ai_status() -> dict:
     return {"available": is_ai_configured()}
 
 
-@app.post("/api/ai/convert")
-async def ai_convert(request: Request, file: UploadFile) -> dict:
-    await _ai_rate_limit(request)
+async def _read_convert_upload(file: UploadFile) -> tuple[bytes, str]:
+    """Validate an upload for AI conversion; return its content and name."""
     if not is_ai_configured():
         raise HTTPException(503, "AI conversion is not configured")
 
@@ -127,26 +664,63 @@ async def ai_convert(request: Request, file: UploadFile) -> dict:
     ext = get_extension(filename)
     if ext not in SUPPORTED_EXTENSIONS:
         raise HTTPException(400, f"Unsupported file type: {ext}. Supported: {', '.join(sorted(SUPPORTED_EXTENSIONS))}")
+    return content, filename
 
+
+async def _convert_document(content: bytes, filename: str) -> str:
+    """Convert a document to CV Markdown with the configured AI provider."""
     from cv_gen.ai.prompt import SYSTEM_PROMPT
 
+    ext = get_extension(filename)
     provider = get_provider()
 
     try:
         if ext == ".pdf":
-            raw = await provider.complete_with_pdf(SYSTEM_PROMPT, content)
+            with _ai_call("convert"):
+                raw = await provider.complete_with_pdf(SYSTEM_PROMPT, content)
         else:
             text = extract_text(content, filename)
             if not text.strip():
                 raise HTTPException(422, "Could not extract text from document")
-            raw = await provider.complete(SYSTEM_PROMPT, text)
+            with _ai_call("convert"):
+                raw = await provider.complete(SYSTEM_PROMPT, text)
     except HTTPException:
         raise
     except Exception:
         logger.exception("AI conversion failed")
         raise HTTPException(502, "AI conversion failed")
 
-    return {"markdown": _strip_code_fences(raw)}
+    return _strip_code_fences(raw)
+
+
+async def _cached_convert(content: bytes, filename: str) -> str:
+    """:func:`_convert_document` through the AI result cache; identical
+    uploads in flight share one call."""
+    from cv_gen.ai.prompt import SYSTEM_PROMPT_VERSION
+
+    provider, model = os.getenv("AI_PROVIDER", ""), os.getenv("AI_MODEL", "")
+    # The extension picks the conversion path (PDF to the model, or extracted text).
+    digest = hashlib.sha256(content).hexdigest()
+    key = cache_key("convert", digest, get_extension(filename), provider, model, SYSTEM_PROMPT_VERSION)
+    cached = await run_in_threadpool(_ai_cache.get, key)
+    metrics.AI_CACHE_LOOKUPS.inc(operation="convert", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached["markdown"]
+
+    async def convert() -> str:
+        markdown = await _convert_document(content, filename)
+        await run_in_threadpool(_ai_cache.put, key, {"markdown": markdown})
+        return markdown
+
+    markdown, _ = await _convert_flights.do(key, convert)
+    return markdown
+
+
+@app.post("/api/ai/convert")
+async def ai_convert(request: Request, file: UploadFile) -> dict:
+    await _ai_rate_limit(request)
+    content, filename = await _read_convert_upload(file)
+    return {"markdown": await _cached_convert(content, filename)}
 
 
 # --- AI CV adaptation + suggestions ---
@@ -162,6 +736,59 @@ def _parse_adapt_response(raw: str) -> tuple[str, str]:
     return _strip_code_fences(raw), ""
 
 
+async def _adapt_cv(markdown: str, job_offer: str) -> tuple[str, str]:
+    """Adapt a CV to a job offer; return the Markdown and the suggestions."""
+    from cv_gen.ai.prompt import ADAPT_AND_SUGGEST_SYSTEM_PROMPT, build_adapt_user_prompt
+
+    provider = get_provider()
+    user_text = build_adapt_user_prompt(markdown, job_offer)
+
+    try:
+        with _ai_call("adapt"):
+            raw = await provider.complete(ADAPT_AND_SUGGEST_SYSTEM_PROMPT, user_text)
+    except Exception:
+        logger.exception("AI adaptation failed")
+        raise HTTPException(502, "AI adaptation failed")
+
+    return _parse_adapt_response(raw)
+
+
+def _normalize_job_offer(text: str) -> str:
+    """Collapse the whitespace of a pasted job offer, keeping paragraphs."""
+    lines = [" ".join(line.split()) for line in _normalize_markdown(text).strip().split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+async def _cached_adapt(markdown: str, job_offer: str) -> dict:
+    """:func:`_adapt_cv` through the AI result cache; identical requests in
+    flight share one call.  Inputs must be normalized: the model sees
+    exactly what the key was computed from."""
+    from cv_gen.ai.prompt import ADAPT_AND_SUGGEST_PROMPT_VERSION
+
+    provider, model = os.getenv("AI_PROVIDER", ""), os.getenv("AI_MODEL", "")
+    key = cache_key(
+        "adapt",
+        hashlib.sha256(markdown.encode()).hexdigest(),
+        hashlib.sha256(job_offer.encode()).hexdigest(),
+        provider,
+        model,
+        ADAPT_AND_SUGGEST_PROMPT_VERSION,
+    )
+    cached = await run_in_threadpool(_ai_cache.get, key)
+    metrics.AI_CACHE_LOOKUPS.inc(operation="adapt", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+
+    async def adapt() -> dict:
+        adapted, suggestions = await _adapt_cv(markdown, job_offer)
+        result = {"markdown": adapted, "suggestions": suggestions}
+        await run_in_threadpool(_ai_cache.put, key, result)
+        return result
+
+    result, _ = await _adapt_flights.do(key, adapt)
+    return result
+
+
 class AdaptRequest(BaseModel):
     markdown: str = Field(..., max_length=15_000)
     job_offer: str = Field(..., max_length=8_000)
@@ -177,19 +804,119 @@ async def ai_adapt(request: Request, req: AdaptRequest) -> dict:
     if not req.job_offer.strip():
         raise HTTPException(400, "Job offer text is empty")
 
-    from cv_gen.ai.prompt import ADAPT_AND_SUGGEST_SYSTEM_PROMPT, build_adapt_user_prompt
+    return await _cached_adapt(_normalize_markdown(req.markdown), _normalize_job_offer(req.job_offer))
+
+
+# --- Background jobs ---
+
+_job_queue = JobQueue()
+# Set on submit so this process's workers start right away.
+_job_wake: asyncio.Event | None = None
+_job_workers: list[asyncio.Task] = []
+JOB_EVENTS_INTERVAL = 0.5
+JOB_EVENTS_KEEPALIVE = 15.0
+
+
+async def _pdf_job(params: dict, data: bytes | None) -> tuple[bytes, str]:
+    with await _cached_pdf(params["markdown"], params["template"], wait=True) as pdf_file:
+        return pdf_file.read(), "application/pdf"
 
-    provider = get_provider()
-    user_text = build_adapt_user_prompt(req.markdown, req.job_offer)
 
+async def _convert_job(params: dict, data: bytes | None) -> tuple[bytes, str]:
     try:
-        raw = await provider.complete(ADAPT_AND_SUGGEST_SYSTEM_PROMPT, user_text)
-    except Exception:
-        logger.exception("AI adaptation failed")
-        raise HTTPException(502, "AI adaptation failed")
+        markdown = await _cached_convert(data or b"", params["filename"])
+    except HTTPException as exc:
+        raise RuntimeError(exc.detail) from exc
+    return json.dumps({"markdown": markdown}).encode(), "application/json"
+
+
+_JOB_HANDLERS = {"pdf": _pdf_job, "convert": _convert_job}
+
+
+def _start_job_workers() -> None:
+    """Start this process's job workers, once per app run."""
+    if not _job_workers and _job_wake is not None:
+        _job_workers.extend(
+            asyncio.create_task(run_worker(_job_queue, _JOB_HANDLERS, wake=_job_wake)) for _ in range(JOB_WORKERS)
+        )
 
-    adapted, suggestions = _parse_adapt_response(raw)
-    return {"markdown": adapted, "suggestions": suggestions}
+
+async def _submit_job(kind: str, params: dict, data: bytes | None = None) -> JSONResponse:
+    job = await run_in_threadpool(_job_queue.submit, kind, params, data)
+    _start_job_workers()
+    if _job_wake is not None:
+        _job_wake.set()
+    url = f"/api/jobs/{job.id}"
+    return JSONResponse(job.to_dict(), status_code=202, headers={"Location": url})
+
+
+@app.post("/api/jobs/pdf", status_code=202)
+async def submit_pdf_job(req: RenderRequest) -> JSONResponse:
+    """Queue a PDF render; poll ``/api/jobs/{id}`` or follow its events."""
+    _check_template(req.template)
+    return await _submit_job("pdf", {"markdown": _normalize_markdown(req.markdown), "template": req.template})
+
+
+@app.post("/api/jobs/convert", status_code=202)
+async def submit_convert_job(request: Request, file: UploadFile) -> JSONResponse:
+    """Queue an AI document conversion; the result is ``{"markdown": ...}``."""
+    await _ai_rate_limit(request)
+    content, filename = await _read_convert_upload(file)
+    return await _submit_job("convert", {"filename": filename}, content)
+
+
+async def _get_job(job_id: str) -> Job:
+    job = await run_in_threadpool(_job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found or expired")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str) -> dict:
+    return (await _get_job(job_id)).to_dict()
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Server-sent events: one ``status`` event per status change, until
+    the job is done or failed."""
+    await _get_job(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        last_status = None
+        last_sent = perf_counter()
+        while True:
+            job = await run_in_threadpool(_job_queue.get, job_id)
+            if job is None:
+                yield "event: expired\ndata: {}\n\n"
+                return
+            if job.status != last_status:
+                last_status = job.status
+                last_sent = perf_counter()
+                yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+            elif perf_counter() - last_sent > JOB_EVENTS_KEEPALIVE:
+                last_sent = perf_counter()
+                yield ": keep-alive\n\n"
+            if job.status in (DONE, FAILED):
+                return
+            await asyncio.sleep(JOB_EVENTS_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def job_result(job_id: str) -> Response:
+    job = await _get_job(job_id)
+    if job.status != DONE:
+        detail = f"Job failed: {job.error}" if job.status == FAILED else f"Job is {job.status}"
+        raise HTTPException(409, detail)
+    stored = await run_in_threadpool(_job_queue.result, job_id)
+    if stored is None:
+        raise HTTPException(404, "Job not found or expired")
+    content, media_type = stored
+    headers = {"Content-Disposition": "attachment; filename=cv.pdf"} if media_type == "application/pdf" else {}
+    return Response(content=content, media_type=media_type, headers=headers)
 
 
 # --- Production: serve frontend build ---
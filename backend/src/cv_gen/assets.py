@@ -0,0 +1,275 @@
+"""Local asset store and offline URL fetcher for WeasyPrint renders.
+
+Template stylesheets reference remote resources (Google Fonts).  Fetching
+them while rendering makes latency depend on the network, and renders stall
+until a timeout in air-gapped containers.  Instead, remote assets are
+downloaded once into a local store (``cv-gen --fetch-assets``, run at image
+build time) and every render goes through :class:`AssetFetcher`, which
+serves them from memory and refuses unknown remote URLs.
+
+``AssetFetcher`` subclasses WeasyPrint's ``URLFetcher`` and is defined on
+first access, so importing this module does not load WeasyPrint.
+"""
+
+from __future__ import annotations
+
+import base64
+import functools
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urljoin
+from urllib.request import url2pathname
+
+from cv_gen.photos import load_photo
+
+if TYPE_CHECKING:
+    from weasyprint.urls import URLFetcher
+
+ASSETS_DIR = Path(os.getenv("CV_GEN_ASSETS_DIR") or Path.home() / ".cache" / "cv-gen" / "assets")
+# Remote URLs missing from the store are refused unless this is set to 1.
+ALLOW_REMOTE_ASSETS = os.getenv("CV_GEN_ALLOW_REMOTE_ASSETS", "0") == "1"
+REMOTE_TIMEOUT = float(os.getenv("CV_GEN_REMOTE_TIMEOUT", "3"))
+
+# Remote http(s) URLs in ``@import`` rules and ``url()`` references.
+_CSS_URL_RE = re.compile(
+    r"""(?:@import\s+(?:url\(\s*)?|url\(\s*)"""
+    r"""(?:"(https?://[^"]+)"|'(https?://[^']+)'|(https?://[^'")\s]+))"""
+)
+# Any ``@import`` rule and any ``url()`` reference, for inlining.
+_IMPORT_RULE_RE = re.compile(
+    r"""@import\s+(?:url\(\s*)?(?:"([^"]+)"|'([^']+)'|([^'")\s;]+))\s*\)?[^;]*;"""
+)
+_URL_RE = re.compile(r"""url\(\s*(?:"([^"]+)"|'([^']+)'|([^'")\s]+))\s*\)""")
+
+
+def find_remote_urls(css: str, base_url: str = "") -> list[str]:
+    """Return the absolute http(s) URLs referenced by ``@import`` and ``url()``."""
+    urls = []
+    for match in _CSS_URL_RE.finditer(css):
+        url = urljoin(base_url, next(group for group in match.groups() if group))
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def data_uri(body: bytes, content_type: str) -> str:
+    """Return ``body`` as a base64 ``data:`` URI."""
+    return f"data:{content_type};base64,{base64.b64encode(body).decode('ascii')}"
+
+
+def inline_css_assets(css: str, base_url: str, fetcher: URLFetcher, *, max_depth: int = 3) -> str:
+    """Inline the resources referenced by ``css`` so a browser needs no request.
+
+    ``@import`` rules are replaced by the imported stylesheet and ``url()``
+    references by ``data:`` URIs, both read through ``fetcher``.  References
+    it cannot serve (e.g. remote URLs missing from the asset store) are left
+    untouched.
+    """
+
+    def fetch(match: re.Match) -> tuple[str, bytes, str] | None:
+        url = urljoin(base_url, next(group for group in match.groups() if group))
+        if url.startswith("data:"):
+            return None
+        try:
+            response = fetcher.fetch(url)
+        except Exception:
+            return None
+        try:
+            return url, response.read(), response.content_type or ""
+        finally:
+            response.close()
+
+    def replace_import(match: re.Match) -> str:
+        fetched = fetch(match) if max_depth > 0 else None
+        if fetched is None:
+            return match.group(0)
+        url, body, _ = fetched
+        return inline_css_assets(body.decode("utf-8"), url, fetcher, max_depth=max_depth - 1)
+
+    def replace_url(match: re.Match) -> str:
+        fetched = fetch(match)
+        if fetched is None:
+            return match.group(0)
+        _, body, content_type = fetched
+        return f'url("{data_uri(body, content_type)}")'
+
+    # Imported stylesheets are inlined first and their url()s already
+    # rewritten, which the second pass leaves alone (data: URIs).
+    css = _IMPORT_RULE_RE.sub(replace_import, css)
+    return _URL_RE.sub(replace_url, css)
+
+
+class AssetStore:
+    """Remote assets keyed by URL, kept on disk and mirrored in memory."""
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+        self._memory: dict[str, tuple[bytes, str]] = {}
+        self._index: dict[str, dict[str, str]] | None = None
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> tuple[bytes, str] | None:
+        """Return ``(body, content_type)`` for a stored URL."""
+        cached = self._memory.get(url)
+        if cached is not None:
+            return cached
+        entry = self._load_index().get(url)
+        if entry is None:
+            return None
+        try:
+            body = (self._root / entry["file"]).read_bytes()
+        except FileNotFoundError:
+            return None
+        cached = self._memory[url] = (body, entry["content_type"])
+        return cached
+
+    def put(self, url: str, body: bytes, content_type: str) -> None:
+        """Store an asset on disk and in memory."""
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        with self._lock:
+            index = self._load_index()
+            self._root.mkdir(parents=True, exist_ok=True)
+            (self._root / name).write_bytes(body)
+            index[url] = {"file": name, "content_type": content_type}
+            (self._root / "index.json").write_text(json.dumps(index, indent=2, sort_keys=True), encoding="utf-8")
+            self._memory[url] = (body, content_type)
+
+    def prefetch(self, stylesheets: Iterable[str], timeout: float = 30) -> list[str]:
+        """Download every remote asset referenced by ``stylesheets``.
+
+        Fetched CSS files (e.g. the Google Fonts ``@import``) are scanned in
+        turn so the font files they point to are stored as well.  Returns the
+        URLs that were downloaded.
+        """
+        from weasyprint.urls import URLFetcher
+
+        fetcher = URLFetcher(timeout=timeout)
+        pending = [url for css in stylesheets for url in find_remote_urls(css)]
+        fetched: list[str] = []
+        while pending:
+            url = pending.pop(0)
+            if url in fetched or self.get(url) is not None:
+                continue
+            response = fetcher.fetch(url)
+            try:
+                body = response.read()
+                content_type = response.content_type
+            finally:
+                response.close()
+            self.put(url, body, content_type)
+            fetched.append(url)
+            if content_type == "text/css":
+                pending.extend(find_remote_urls(body.decode("utf-8"), url))
+        return fetched
+
+    def _load_index(self) -> dict[str, dict[str, str]]:
+        if self._index is None:
+            index_path = self._root / "index.json"
+            try:
+                self._index = json.loads(index_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._index = {}
+        return self._index
+
+
+def __getattr__(name: str):
+    if name == "AssetFetcher":
+        return _asset_fetcher_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.cache
+def _asset_fetcher_class() -> type[URLFetcher]:
+    from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+    class AssetFetcher(URLFetcher):
+        """URL fetcher that never waits on the network during a render.
+
+        - ``file://`` URLs inside ``local_roots`` are read once and served from
+          memory until the file changes.
+        - ``http(s)://`` URLs are served from the asset store.  Unknown remote
+          URLs are refused (WeasyPrint logs a warning and falls back to the next
+          font in the stack) unless ``allow_remote`` is set, in which case they
+          are fetched with a short timeout.
+        - ``photo_url`` (the resolved ``contact.photo``) goes through the photo
+          pipeline, which caches a downscaled copy.
+        """
+
+        def __init__(
+            self,
+            store: AssetStore,
+            *,
+            local_roots: Iterable[Path] = (),
+            allow_remote: bool = False,
+            timeout: float = REMOTE_TIMEOUT,
+            photo_url: str = "",
+        ) -> None:
+            super().__init__(timeout=timeout, allow_redirects=False)
+            self._store = store
+            self._local_roots = [str(root.resolve()) + os.sep for root in local_roots]
+            self._allow_remote = allow_remote
+            self._photo_url = photo_url
+
+        def fetch(self, url: str, headers: dict | None = None) -> URLFetcherResponse:
+            if self._photo_url and url == self._photo_url:
+                photo = load_photo(url)
+                return URLFetcherResponse(url, photo.data, {"Content-Type": photo.mime_type})
+
+            scheme = url.split(":", 1)[0].lower()
+
+            if scheme in ("http", "https"):
+                stored = self._store.get(url)
+                if stored is not None:
+                    body, content_type = stored
+                    return URLFetcherResponse(url, body, {"Content-Type": content_type})
+                if not self._allow_remote:
+                    raise ValueError(f"Remote URL not in the local asset store: {url}")
+
+            if scheme == "file":
+                path = os.path.realpath(url2pathname(url.split("?")[0].removeprefix("file:")))
+                if any(path.startswith(root) for root in self._local_roots):
+                    body = _read_local(path)
+                    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                    return URLFetcherResponse(url, body, {"Content-Type": content_type})
+
+            return super().fetch(url, headers)
+
+    return AssetFetcher
+
+
+_local_files: dict[str, tuple[float, bytes]] = {}
+
+
+def _read_local(path: str) -> bytes:
+    mtime = os.stat(path).st_mtime
+    cached = _local_files.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = _local_files[path] = (mtime, f.read())
+    return cached[1]
+
+
+_store = AssetStore(ASSETS_DIR)
+
+
+def get_asset_store() -> AssetStore:
+    """Return the process-wide asset store."""
+    return _store
+
+
+def make_url_fetcher(local_roots: Iterable[Path] = (), photo_url: str = "") -> URLFetcher:
+    """Return an ``AssetFetcher`` backed by the process-wide asset store."""
+    return _asset_fetcher_class()(
+        _store,
+        local_roots=local_roots,
+        allow_remote=ALLOW_REMOTE_ASSETS,
+        timeout=REMOTE_TIMEOUT,
+        photo_url=photo_url,
+    )
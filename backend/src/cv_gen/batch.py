@@ -0,0 +1,231 @@
+"""Batch rendering: many CVs times many templates on a process pool."""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tarfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+
+from cv_gen.models import CVData
+from cv_gen.parser import parse_cv
+from cv_gen.pool import warm_up
+from cv_gen.renderer import get_template, render_pdf
+
+MANIFEST_NAME = ".cv-gen-batch.json"
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+@dataclass
+class BatchItem:
+    source: Path
+    template: str
+    output: Path
+    key: str  # hash of the input bytes and the template version
+    status: str = "pending"  # rendered, skipped, failed
+    seconds: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class BatchFile:
+    source: Path
+    parse_seconds: float = 0.0
+    items: list[BatchItem] = field(default_factory=list)
+
+
+def expand_inputs(patterns: list[str]) -> list[Path]:
+    """Expand files, directories (their ``*.md``) and glob patterns."""
+    paths: list[Path] = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.glob("*.md"))
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(Path(p) for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        for match in matches:
+            if match not in paths:
+                paths.append(match)
+    return paths
+
+
+def is_markdown(name: str) -> bool:
+    """Markdown file that is not hidden nor macOS archive metadata."""
+    path = PurePosixPath(name)
+    if any(part.startswith(".") or part == "__MACOSX" for part in path.parts):
+        return False
+    return path.suffix.lower() in MARKDOWN_SUFFIXES
+
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class ArchiveLimitError(ValueError):
+    """An archive holds more Markdown files, or more data, than allowed."""
+
+
+def read_archive(
+    name: str,
+    data: bytes,
+    *,
+    max_member_bytes: int,
+    max_members: int | None = None,
+    max_total_bytes: int | None = None,
+) -> list[tuple[str, bytes | None]]:
+    """Return ``(path, content)`` for every Markdown file in a zip or tar archive.
+
+    ``content`` is None for members larger than ``max_member_bytes``; they
+    are never decompressed.  Limits are checked against the sizes declared
+    in the archive before anything is decompressed: more than
+    ``max_members`` Markdown files, or more than ``max_total_bytes`` to
+    decompress, raise ArchiveLimitError.  Raises ValueError if the archive
+    is unreadable.
+    """
+    members: list[tuple[str, bytes | None]] = []
+    total = 0
+
+    def admit(path: str, size: int) -> bool:
+        """Check the limits for one more member; return whether to read it."""
+        nonlocal total
+        if max_members is not None and len(members) >= max_members:
+            raise ArchiveLimitError(f"Archive '{name}' has more than {max_members} Markdown files")
+        if size > max_member_bytes:
+            return False
+        total += size
+        if max_total_bytes is not None and total > max_total_bytes:
+            raise ArchiveLimitError(f"Archive '{name}' expands to more than {max_total_bytes} bytes")
+        return True
+
+    try:
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                for info in zf.infolist():
+                    if info.is_dir() or not is_markdown(info.filename):
+                        continue
+                    content = zf.read(info) if admit(info.filename, info.file_size) else None
+                    members.append((info.filename, content))
+        else:
+            with tarfile.open(fileobj=io.BytesIO(data)) as tf:
+                for info in tf:
+                    if not info.isfile() or not is_markdown(info.name):
+                        continue
+                    content = tf.extractfile(info).read() if admit(info.name, info.size) else None
+                    members.append((info.name, content))
+    except (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError) as exc:
+        raise ValueError(f"Cannot read archive '{name}': {exc}") from exc
+    return members
+
+
+def _render_item(cv: CVData, template: str, output: str) -> float:
+    start = time.perf_counter()
+    render_pdf(cv, output, template)
+    return time.perf_counter() - start
+
+
+def run_batch(
+    sources: list[Path],
+    templates: list[str],
+    output_dir: Path,
+    *,
+    jobs: int = 0,
+    force: bool = False,
+    use_manifest: bool = True,
+) -> list[BatchFile]:
+    """Render every source with every template into ``output_dir``.
+
+    Each file is parsed once.  Outputs whose input bytes and template
+    version match the manifest from the previous run are skipped unless
+    ``force`` is set.  With ``use_manifest=False`` everything is rendered
+    and no manifest is written.
+
+    Sources with the same stem (``a/cv.md`` and ``b/cv.md``) get ``-2``,
+    ``-3``... appended in input order, so their outputs and manifest
+    entries stay separate.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest: dict[str, str] = {}
+    if use_manifest:
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    versions = {t: get_template(t).version for t in templates}
+    files: list[BatchFile] = []
+    pending: list[tuple[BatchItem, CVData]] = []
+    stems: set[str] = set()
+
+    for source in sources:
+        stem, n = source.stem, 1
+        while stem in stems:
+            n += 1
+            stem = f"{source.stem}-{n}"
+        stems.add(stem)
+        raw = source.read_bytes()
+        batch_file = BatchFile(source)
+        files.append(batch_file)
+        cv: CVData | None = None
+        for template in templates:
+            output = output_dir / f"{stem}-{template}.pdf"
+            key = hashlib.sha256(raw + b"\0" + versions[template].encode()).hexdigest()
+            item = BatchItem(source, template, output, key)
+            batch_file.items.append(item)
+            if not force and manifest.get(output.name) == key and output.exists():
+                item.status = "skipped"
+                continue
+            if cv is None:
+                start = time.perf_counter()
+                try:
+                    cv = parse_cv(raw.decode("utf-8"))
+                except Exception as exc:
+                    item.status = "failed"
+                    item.error = f"parse error: {exc}"
+                    continue
+                batch_file.parse_seconds = time.perf_counter() - start
+            pending.append((item, cv))
+
+    def finish(item: BatchItem, run) -> None:
+        try:
+            item.seconds = run()
+        except Exception as exc:  # one bad CV must not stop the batch
+            item.status = "failed"
+            item.error = str(exc) or type(exc).__name__
+            manifest.pop(item.output.name, None)
+        else:
+            item.status = "rendered"
+            manifest[item.output.name] = item.key
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(pending) <= 1:
+        for item, cv in pending:
+            finish(item, lambda: _render_item(cv, item.template, str(item.output)))
+    else:
+        # Spawned and warmed up like the API's RenderPool workers: a forked
+        # child would inherit the parent's fontconfig and Pango state.
+        with ProcessPoolExecutor(
+            min(jobs, len(pending)), mp_context=multiprocessing.get_context("spawn"), initializer=warm_up
+        ) as executor:
+            futures = {
+                executor.submit(_render_item, cv, item.template, str(item.output)): item
+                for item, cv in pending
+            }
+            for future in as_completed(futures):
+                finish(futures[future], future.result)
+
+    if use_manifest:
+        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return files
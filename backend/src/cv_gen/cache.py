@@ -0,0 +1,73 @@
+"""In-process caches shared by the renderer and the API."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe LRU cache bounded by the total size of its values.
+
+    ``sizeof`` measures a value (``len`` by default).  Values larger than
+    ``max_item_bytes`` are never stored, so a single huge entry cannot flush
+    the whole cache.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        *,
+        max_item_bytes: int | None = None,
+        sizeof: Callable[[V], int] = len,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._max_item_bytes = max_bytes if max_item_bytes is None else max_item_bytes
+        self._sizeof = sizeof
+        self._items: OrderedDict[Hashable, tuple[V, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached values."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable) -> V | None:
+        """Return the cached value and mark it as recently used."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Store a value, evicting the least recently used entries if needed."""
+        size = self._sizeof(value)
+        if size > self._max_item_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._items[key] = (value, size)
+            self._size += size
+            while self._size > self._max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
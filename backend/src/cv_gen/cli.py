@@ -4,30 +4,79 @@ from __future__ import annotations
 
 import subprocess
 import sys
+import time
+from collections import Counter
 from pathlib import Path
 
 import click
 
+from cv_gen.assets import ASSETS_DIR, get_asset_store
+from cv_gen.batch import BatchFile, expand_inputs, run_batch
 from cv_gen.parser import parse_cv_file
-from cv_gen.renderer import get_available_templates, render_html, render_pdf
+from cv_gen.profiling import format_report, profile_template, write_collapsed
+from cv_gen.renderer import get_available_templates, get_template, reload_templates, render_html, render_pdf
+from cv_gen.watch import Watcher
 
 
-@click.command()
+class _DefaultGroup(click.Group):
+    """Command group that falls back to ``render`` when no subcommand is given.
+
+    Keeps ``cv-gen resume.md -t minimal`` working alongside subcommands.
+    """
+
+    default_command = "render"
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and args[0] != "--help"):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultGroup)
+def main() -> None:
+    """Generate a professional PDF CV from a Markdown file.
+
+    Run 'cv-gen FILE' to render a single CV (see 'cv-gen render --help').
+    """
+
+
+@main.command()
 @click.argument("input_file", required=False, type=click.Path(exists=True))
-@click.option("-t", "--template", default="modern", help="Template name (default: modern).")
-@click.option("-o", "--output", default=None, help="Output file path.")
+@click.option(
+    "-t",
+    "--template",
+    "templates",
+    multiple=True,
+    help="Template name (default: modern). Repeat it to render several templates at once.",
+)
+@click.option("--all-templates", is_flag=True, help="Render with every template at once.")
+@click.option("-o", "--output", default=None, help="Output file path (directory with several templates).")
 @click.option("--list-templates", is_flag=True, help="List available templates.")
 @click.option("--preview", is_flag=True, help="Generate PDF and open it.")
 @click.option("--html", is_flag=True, help="Export HTML instead of PDF (debug).")
-def main(
+@click.option("--fetch-assets", is_flag=True, help="Download remote template assets (fonts) for offline rendering.")
+@click.option("--watch", is_flag=True, help="Keep running and re-render when the CV or the template changes.")
+def render(
     input_file: str | None,
-    template: str,
+    templates: tuple[str, ...],
+    all_templates: bool,
     output: str | None,
     list_templates: bool,
     preview: bool,
     html: bool,
+    fetch_assets: bool,
+    watch: bool,
 ) -> None:
-    """Generate a professional PDF CV from a Markdown file."""
+    """Render a Markdown CV to PDF (the default command)."""
+    if fetch_assets:
+        stylesheets = [get_template(t).css for t in get_available_templates()]
+        try:
+            fetched = get_asset_store().prefetch(stylesheets)
+        except OSError as exc:  # no network: renders fall back to local fonts
+            raise click.ClickException(f"Could not fetch template assets: {exc}") from exc
+        click.echo(f"Fetched {len(fetched)} asset(s) into {ASSETS_DIR}")
+        return
+
     if list_templates:
         templates = get_available_templates()
         click.echo("Available templates:")
@@ -39,22 +88,183 @@ def main(
     if not input_file:
         raise click.UsageError("Missing argument 'INPUT_FILE'. Use --list-templates or provide a Markdown file.")
 
-    cv = parse_cv_file(input_file)
     input_path = Path(input_file)
 
-    if html:
-        html_output = output or input_path.with_suffix(".html").name
-        html_string = render_html(cv, template)
-        Path(html_output).write_text(html_string, encoding="utf-8")
-        click.echo(f"HTML exported: {html_output}")
+    if all_templates or len(set(templates)) > 1:
+        if html or preview or watch:
+            raise click.UsageError("--html, --preview and --watch work with a single template.")
+        _render_templates(input_path, () if all_templates else templates, Path(output or "."))
         return
+    template = templates[0] if templates else "modern"
+
+    if html:
+        out_path = output or input_path.with_suffix(".html").name
+    else:
+        out_path = output or input_path.with_suffix(".pdf").name
+
+    def build() -> None:
+        start = time.perf_counter()
+        cv = parse_cv_file(input_file)
+        if html:
+            Path(out_path).write_text(render_html(cv, template), encoding="utf-8")
+            message = "HTML exported"
+        else:
+            render_pdf(cv, out_path, template)
+            message = "PDF generated"
+        elapsed = (time.perf_counter() - start) * 1000
+        click.echo(f"{message}: {out_path}" + (f" ({elapsed:.0f} ms)" if watch else ""))
+
+    build()
+
+    if preview and not html:
+        _open_file(out_path)
+
+    if watch:
+        _watch(input_path, Path(get_template(template).base_url), build)
+
+
+def _render_templates(input_path: Path, templates: tuple[str, ...], output_dir: Path) -> None:
+    """Parse the CV once and render it with several templates in parallel."""
+    selected = _select_templates(templates)
+    start = time.perf_counter()
+    files = run_batch([input_path], selected, output_dir, use_manifest=False)
+    if _report_batch(files, time.perf_counter() - start):
+        sys.exit(1)
+
+
+def _watch(input_path: Path, template_dir: Path, build, interval: float = 0.3) -> None:
+    """Re-run ``build`` whenever the CV or the template directory changes.
+
+    The process stays warm (modules imported, templates compiled), so each
+    rebuild only pays for parsing and rendering.
+    """
+    watcher = Watcher([input_path, template_dir])
+    click.echo(f"Watching {input_path} and {template_dir} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            if template_dir in changed:
+                reload_templates()
+            try:
+                build()
+            except Exception as exc:
+                click.echo(f"Error: {exc}", err=True)
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command()
+@click.argument("inputs", nargs=-1, required=True)
+@click.option("-t", "--template", "templates", multiple=True, help="Template to render (repeatable; default: all).")
+@click.option("-o", "--output-dir", default="out", show_default=True, help="Directory for the generated PDFs.")
+@click.option("-j", "--jobs", default=0, help="Worker processes (default: number of CPUs).")
+@click.option("--force", is_flag=True, help="Re-render even if inputs and templates are unchanged.")
+def batch(inputs: tuple[str, ...], templates: tuple[str, ...], output_dir: str, jobs: int, force: bool) -> None:
+    """Render many CVs to many templates in parallel.
+
+    INPUTS are Markdown files, directories (their *.md files) or glob
+    patterns.  Outputs are written as OUTPUT_DIR/<name>-<template>.pdf.
+    """
+    sources = expand_inputs(list(inputs))
+    if not sources:
+        raise click.UsageError("No Markdown files matched the given inputs.")
+
+    selected = _select_templates(templates)
+    start = time.perf_counter()
+    files = run_batch(sources, selected, Path(output_dir), jobs=jobs, force=force)
+    if _report_batch(files, time.perf_counter() - start):
+        sys.exit(1)
+
+
+def _report_batch(files: list[BatchFile], elapsed: float) -> int:
+    """Print per-file and per-template results; return the number of failures."""
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+    for batch_file in files:
+        click.echo(f"{batch_file.source}  (parse {batch_file.parse_seconds * 1000:.1f} ms)")
+        for item in batch_file.items:
+            counts[item.status] += 1
+            if item.status == "rendered":
+                click.echo(f"  {item.template:<12} {item.seconds * 1000:8.1f} ms  -> {item.output}")
+            elif item.status == "skipped":
+                click.echo(f"  {item.template:<12} {'skipped':>11}  (unchanged)")
+            else:
+                click.echo(f"  {item.template:<12} {'FAILED':>11}  {item.error}")
+
+    click.echo(
+        f"Rendered {counts['rendered']}, skipped {counts['skipped']}, "
+        f"failed {counts['failed']} in {elapsed:.2f}s"
+    )
+    return counts["failed"]
+
+
+@main.command()
+@click.argument("input_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("-t", "--template", "templates", multiple=True, help="Template to profile (repeatable; default: all).")
+@click.option("-n", "--runs", default=5, show_default=True, help="Pipeline runs per template in each pass.")
+@click.option(
+    "--sort",
+    default="cumulative",
+    show_default=True,
+    type=click.Choice(["cumulative", "tottime", "ncalls"]),
+    help="Sort order of the cProfile reports.",
+)
+@click.option("--limit", default=15, show_default=True, help="Functions and allocation sites shown per stage.")
+@click.option("--no-memory", is_flag=True, help="Skip the tracemalloc pass.")
+@click.option("--no-pdf", is_flag=True, help="Profile up to the HTML only (no WeasyPrint).")
+@click.option(
+    "--collapsed",
+    type=click.Path(dir_okay=False),
+    help="Sample stacks and write them in collapsed format (flamegraph.pl, speedscope) to this file.",
+)
+@click.option("--interval", default=0.005, show_default=True, help="Stack sampling interval in seconds.")
+def profile(
+    input_file: str,
+    templates: tuple[str, ...],
+    runs: int,
+    sort: str,
+    limit: int,
+    no_memory: bool,
+    no_pdf: bool,
+    collapsed: str | None,
+    interval: float,
+) -> None:
+    """Profile parsing and rendering of INPUT_FILE, stage by stage.
+
+    Prints per-stage timings, cProfile reports and the top allocation
+    sites (tracemalloc) for every template.
+    """
+    stacks = Counter()
+    for template in _select_templates(templates):
+        result = profile_template(
+            input_file,
+            template,
+            runs,
+            pdf=not no_pdf,
+            memory=not no_memory,
+            sample_interval=interval if collapsed else None,
+        )
+        click.echo(format_report(result, sort=sort, limit=limit))
+        stacks.update(result.stacks)
+
+    if collapsed:
+        write_collapsed(stacks, Path(collapsed))
+        click.echo(f"Collapsed stacks ({sum(stacks.values())} samples) written to {collapsed}")
 
-    pdf_output = output or input_path.with_suffix(".pdf").name
-    render_pdf(cv, pdf_output, template)
-    click.echo(f"PDF generated: {pdf_output}")
 
-    if preview:
-        _open_file(pdf_output)
+def _select_templates(templates: tuple[str, ...]) -> list[str]:
+    """Validate ``-t`` options; none selects every template."""
+    available = get_available_templates()
+    selected = list(dict.fromkeys(templates)) or available
+    unknown = [t for t in selected if t not in available]
+    if unknown:
+        raise click.BadParameter(
+            f"Unknown template(s): {', '.join(unknown)}. Available: {', '.join(available)}",
+            param_hint="'-t' / '--template'",
+        )
+    return selected
 
 
 def _open_file(path: str) -> None:
@@ -0,0 +1,282 @@
+"""SQLite-backed job queue for long renders and AI conversions.
+
+Jobs outlive the request that submitted them and the process that runs
+them: every process using the same database file shares the queue, and
+any worker in any of them may claim a queued job.  A worker that stops
+cleanly puts its job back in the queue; one that dies keeps it until its
+lease runs out, then another worker claims it again (up to
+``JOB_MAX_ATTEMPTS`` times).  Finished jobs, results included, are
+deleted ``JOB_TTL`` seconds after they finish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB = Path(os.getenv("CV_GEN_JOBS_DB") or Path.home() / ".cache" / "cv-gen" / "jobs.sqlite3")
+JOB_TTL = float(os.getenv("CV_GEN_JOB_TTL", "3600"))
+# A running job whose worker has not finished it after this many seconds
+# is considered lost and can be claimed again.
+JOB_LEASE = float(os.getenv("CV_GEN_JOB_LEASE", "300"))
+JOB_WORKERS = int(os.getenv("CV_GEN_JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 0.5
+PURGE_INTERVAL = 60.0
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    input BLOB,
+    result BLOB,
+    media_type TEXT NOT NULL DEFAULT '',
+    error TEXT NOT NULL DEFAULT '',
+    worker TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    lease_until REAL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires);
+"""
+
+_JOB_COLUMNS = "id, kind, status, params, media_type, error, attempts, created, started, finished, expires"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    params: dict
+    media_type: str = ""
+    error: str = ""
+    attempts: int = 0
+    created: float = 0.0
+    started: float | None = None
+    finished: float | None = None
+    expires: float | None = None
+
+    @classmethod
+    def _from_row(cls, row: Mapping) -> Job:
+        return cls(**{**dict(row), "params": json.loads(row["params"])})
+
+    def to_dict(self) -> dict:
+        """Public view of the job (parameters and input are not included)."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "error": self.error or None,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "expires": self.expires,
+        }
+
+
+class JobQueue:
+    """Jobs table in a SQLite database shared by every process.
+
+    The database is created on first use.  Methods block on SQLite; call
+    them from a thread in async code.
+    """
+
+    def __init__(
+        self,
+        path: Path = JOBS_DB,
+        *,
+        ttl: float = JOB_TTL,
+        lease: float = JOB_LEASE,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def submit(self, kind: str, params: Mapping, data: bytes | None = None) -> Job:
+        job = Job(uuid.uuid4().hex, kind, QUEUED, dict(params), created=time.time())
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, status, params, input, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (job.id, kind, QUEUED, json.dumps(job.params), data, job.created),
+        )
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Return the job, or None if it does not exist or has expired."""
+        row = self._connect().execute(
+            f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ? AND (expires IS NULL OR expires > ?)",
+            (job_id, time.time()),
+        ).fetchone()
+        return Job._from_row(row) if row else None
+
+    def result(self, job_id: str) -> tuple[bytes, str] | None:
+        """Return ``(result, media_type)`` of a finished job."""
+        row = self._connect().execute(
+            "SELECT result, media_type FROM jobs WHERE id = ? AND status = ? AND expires > ?",
+            (job_id, DONE, time.time()),
+        ).fetchone()
+        return (row["result"], row["media_type"]) if row else None
+
+    def claim(self, kinds: Iterable[str], worker: str) -> tuple[Job, bytes | None] | None:
+        """Take the oldest queued job of one of ``kinds`` (or a lost one)."""
+        kinds = list(kinds)
+        placeholders = ", ".join("?" * len(kinds))
+        now = time.time()
+        conn = self._connect()
+        # IMMEDIATE takes the write lock up front: two processes can never
+        # select the same job.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished = ?, expires = ?, input = NULL"
+                " WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "Worker lost", now, now + self.ttl, RUNNING, now, self.max_attempts),
+            )
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE kind IN ({placeholders})"
+                " AND (status = ? OR (status = ? AND lease_until < ?))"
+                " ORDER BY created LIMIT 1",
+                (*kinds, QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started = ?, lease_until = ?, attempts = attempts + 1"
+                " WHERE id = ?",
+                (RUNNING, worker, now, now + self.lease, row["id"]),
+            )
+            query = f"SELECT {_JOB_COLUMNS}, input FROM jobs WHERE id = ?"
+            claimed = dict(conn.execute(query, (row["id"],)).fetchone())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        data = claimed.pop("input")
+        return Job._from_row(claimed), data
+
+    def _finish(self, job_id: str, worker: str, status: str, **fields: object) -> bool:
+        now = time.time()
+        fields.update(status=status, finished=now, expires=now + self.ttl, input=None)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        # Only the worker holding the job may finish it: a worker that lost
+        # its lease must not overwrite the result of the one that took over.
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND status = ? AND worker = ?",
+            (*fields.values(), job_id, RUNNING, worker),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker: str, result: bytes, media_type: str) -> bool:
+        return self._finish(job_id, worker, DONE, result=result, media_type=media_type)
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._finish(job_id, worker, FAILED, error=error)
+
+    def release(self, job_id: str, worker: str) -> None:
+        """Put a claimed job back in the queue (its worker is stopping)."""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, worker = '', started = NULL, lease_until = NULL, attempts = attempts - 1"
+            " WHERE id = ? AND status = ? AND worker = ?",
+            (QUEUED, job_id, RUNNING, worker),
+        )
+
+    def purge_expired(self) -> int:
+        cursor = self._connect().execute("DELETE FROM jobs WHERE expires <= ?", (time.time(),))
+        return cursor.rowcount
+
+
+# Runs a job: (params, input) -> (result, media type).
+Handler = Callable[[dict, bytes | None], Awaitable[tuple[bytes, str]]]
+
+
+async def run_worker(
+    queue: JobQueue,
+    handlers: Mapping[str, Handler],
+    *,
+    wake: asyncio.Event | None = None,
+    poll_interval: float = POLL_INTERVAL,
+) -> None:
+    """Claim and run jobs until cancelled.
+
+    ``wake`` lets jobs submitted in this process start without waiting for
+    the next poll; jobs submitted elsewhere are picked up by polling.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    last_purge = 0.0
+    while True:
+        claim = asyncio.ensure_future(asyncio.to_thread(queue.claim, handlers, worker))
+        try:
+            claimed = await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            # The claim finishes in its thread anyway: give the job back.
+            claimed = await claim
+            if claimed is not None:
+                await asyncio.to_thread(queue.release, claimed[0].id, worker)
+            raise
+        except (sqlite3.Error, OSError):
+            logger.exception("Cannot read the job queue at %s", queue.path)
+            claimed = None
+        if claimed is None:
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                try:
+                    await asyncio.to_thread(queue.purge_expired)
+                except (sqlite3.Error, OSError):
+                    logger.exception("Cannot purge the job queue at %s", queue.path)
+            if wake is None:
+                await asyncio.sleep(poll_interval)
+            else:
+                try:
+                    await asyncio.wait_for(wake.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+            continue
+
+        job, data = claimed
+        try:
+            result, media_type = await handlers[job.kind](job.params, data)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(queue.release, job.id, worker)
+            raise
+        except Exception as exc:
+            logger.warning("Job %s (%s) failed: %s", job.id, job.kind, exc)
+            await asyncio.to_thread(queue.fail, job.id, worker, str(exc) or type(exc).__name__)
+        else:
+            await asyncio.to_thread(queue.complete, job.id, worker, result, media_type)
@@ -0,0 +1,272 @@
+"""Per-stage timings and Prometheus-text metrics.
+
+:func:`stage` times one step of the render pipeline (frontmatter, Markdown,
+Jinja, WeasyPrint layout, PDF serialization...).  Each duration goes into
+the ``cv_gen_stage_seconds`` histogram and, inside :func:`collect_timings`,
+into a per-request list the API returns as a ``Server-Timing`` header.
+
+Metrics live in the process that records them; the render pool sends its
+workers' timings back with each result.  Standard library only, so the
+parser and renderer can use it without slowing down imports.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+AI_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    """Cumulative histogram with labels, rendered in Prometheus text format."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts with +Inf last, sum)
+        self._series: dict[tuple[str, ...], tuple[list[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._series[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+        return sum(series[0]) if series else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = ",".join([*labels, f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class _Value:
+    """Labelled numbers rendered as one Prometheus metric of ``kind``."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            labels = ",".join(f'{name}="{_escape(v)}"' for name, v in zip(self.labelnames, key))
+            lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+        return lines
+
+
+class Counter(_Value):
+    """Value that only goes up (requests rejected, ...)."""
+
+    kind = "counter"
+
+
+class Gauge(_Value):
+    """Value that goes up and down (queue depth, ...)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_registry: list[Histogram | _Value] = []
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Create a histogram and register it for :func:`render_metrics`."""
+    h = Histogram(name, documentation, labelnames, buckets)
+    _registry.append(h)
+    return h
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Create a counter and register it for :func:`render_metrics`."""
+    c = Counter(name, documentation, labelnames)
+    _registry.append(c)
+    return c
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Create a gauge and register it for :func:`render_metrics`."""
+    g = Gauge(name, documentation, labelnames)
+    _registry.append(g)
+    return g
+
+
+def render_metrics() -> str:
+    """Return every registered metric in Prometheus text format 0.0.4."""
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+STAGE_SECONDS = histogram(
+    "cv_gen_stage_seconds", "Duration of each render pipeline stage.", ("stage",),
+)
+HTTP_REQUEST_SECONDS = histogram(
+    "cv_gen_http_request_seconds", "Duration of HTTP requests.", ("method", "route", "status"),
+)
+AI_REQUEST_SECONDS = histogram(
+    "cv_gen_ai_request_seconds",
+    "Latency of AI provider calls.",
+    ("provider", "model", "operation", "outcome"),
+    buckets=AI_BUCKETS,
+)
+AI_CACHE_LOOKUPS = counter(
+    "cv_gen_ai_cache_lookups_total", "AI result cache lookups, per operation and result.", ("operation", "result"),
+)
+COALESCED_CALLS = counter(
+    "cv_gen_coalesced_calls_total", "Calls that shared an identical call already in flight.", ("flight",),
+)
+QUEUE_ACTIVE = gauge("cv_gen_queue_active", "Work items running, per admission queue.", ("queue",))
+QUEUE_DEPTH = gauge("cv_gen_queue_depth", "Work items waiting for a slot, per admission queue.", ("queue",))
+QUEUE_WAIT_SECONDS = histogram(
+    "cv_gen_queue_wait_seconds", "Time waited for a slot, per admission queue.", ("queue",),
+)
+QUEUE_REJECTED = counter(
+    "cv_gen_queue_rejected_total", "Work items turned away, per admission queue and reason.", ("queue", "reason"),
+)
+
+
+# --- Per-request timings ---
+
+_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar("cv_gen_timings", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and the current request."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+# Called with (stage name, entering) around every stage; see cv_gen.profiling.
+_stage_listeners: list[Callable[[str, bool], None]] = []
+
+
+def add_stage_listener(listener: Callable[[str, bool], None]) -> None:
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener: Callable[[str, bool], None]) -> None:
+    _stage_listeners.remove(listener)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as pipeline stage ``name``."""
+    for listener in _stage_listeners:
+        listener(name, True)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        for listener in _stage_listeners:
+            listener(name, False)
+        record_stage(name, seconds)
+
+
+@contextmanager
+def collect_timings() -> Iterator[list[tuple[str, float]]]:
+    """Collect the stages recorded in this context (threads started from it included)."""
+    timings: list[tuple[str, float]] = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def server_timing(timings: Sequence[tuple[str, float]]) -> str:
+    """Format timings as a ``Server-Timing`` header value (durations in ms)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings)
+
+
+@contextmanager
+def ai_call(provider: str, model: str, operation: str) -> Iterator[None]:
+    """Time an AI provider call, labelled by outcome (``ok`` or ``error``)."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        seconds = time.perf_counter() - start
+        AI_REQUEST_SECONDS.observe(seconds, provider=provider, model=model, operation=operation, outcome=outcome)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append(("ai", seconds))
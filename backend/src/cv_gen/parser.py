@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import copy
+import dataclasses
+import hashlib
 import re
+import threading
 import unicodedata
+from collections.abc import Callable
 
-import frontmatter
-import markdown
-
+from cv_gen import metrics
+from cv_gen.cache import LRUCache
 from cv_gen.models import CVData, ContactInfo, Section
 
 # Keywords for section type detection (multilingual: ES, EN, FR, DE)
@@ -67,17 +71,108 @@ def _detect_section_type(heading: str) -> str:
     return "other"
 
 
+_md_local = threading.local()
+
+
 def _render_md(text: str) -> str:
     """Render Markdown text to HTML."""
-    return markdown.markdown(text, extensions=MD_EXTENSIONS)
+    # One converter per thread: building a Markdown instance (and loading
+    # its extensions) costs more than converting a typical section.
+    converter = getattr(_md_local, "converter", None)
+    if converter is None:
+        import markdown
+
+        converter = _md_local.converter = markdown.Markdown(extensions=MD_EXTENSIONS)
+    return converter.reset().convert(text)
+
+
+# Memoization layers, all keyed by a hash of the raw source: whole
+# documents, frontmatter blocks and individual sections.  While editing, a
+# keystroke changes one section, so only that section is converted again.
+_document_cache: LRUCache[CVData] = LRUCache(256, sizeof=lambda _: 1)
+_frontmatter_cache: LRUCache[dict] = LRUCache(1024, sizeof=lambda _: 1)
+_section_cache: LRUCache[Section] = LRUCache(4096, sizeof=lambda _: 1)
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def clear_caches() -> None:
+    """Drop all memoized documents, frontmatter and sections."""
+    _document_cache.clear()
+    _frontmatter_cache.clear()
+    _section_cache.clear()
+
+
+def _split_frontmatter(text: str) -> tuple[dict, str]:
+    """Return ``(metadata, body)`` like ``frontmatter.parse``, caching the metadata."""
+    import frontmatter
+
+    text = text.strip()
+    handler = frontmatter.detect_format(text, frontmatter.handlers)
+    if handler is None:
+        return {}, text
+    try:
+        fm, content = handler.split(text)
+    except ValueError:
+        return {}, text
+
+    key = _digest(type(handler).__name__, fm)
+    metadata = _frontmatter_cache.get(key)
+    if metadata is None:
+        loaded = handler.load(fm)
+        metadata = loaded if isinstance(loaded, dict) else {}
+        _frontmatter_cache.put(key, metadata)
+    return metadata, content.strip()
+
+
+def _cached_section(key: str, build: Callable[[], Section]) -> Section:
+    section = _section_cache.get(key)
+    if section is None:
+        section = build()
+        _section_cache.put(key, section)
+    return dataclasses.replace(section)
+
+
+def _build_section(part: str) -> Section:
+    lines = part.split("\n", 1)
+    heading = lines[0].strip()
+    content = lines[1] if len(lines) > 1 else ""
+    content = content.strip()
+
+    section_type = _detect_section_type(heading)
+    content_html = _render_md(content) if content else ""
+
+    return Section(
+        heading=heading,
+        slug=_slugify(heading),
+        content_html=content_html,
+        section_type=section_type,
+    )
 
 
 def parse_cv(text: str) -> CVData:
     """Parse a Markdown CV string into CVData."""
-    post = frontmatter.loads(text)
+    with metrics.stage("parse"):
+        key = _digest(text)
+        cached = _document_cache.get(key)
+        if cached is None:
+            cached = _parse_cv(text)
+            _document_cache.put(key, cached)
+        # Callers get their own copy, so mutating it cannot corrupt the cache.
+        return copy.deepcopy(cached)
+
+
+def _parse_cv(text: str) -> CVData:
+    with metrics.stage("frontmatter"):
+        meta, body = _split_frontmatter(text)
 
     # Build ContactInfo from frontmatter
-    meta = post.metadata
     contact = ContactInfo(
         name=str(meta.get("name", "")),
         title=str(meta.get("title", "")),
@@ -90,8 +185,14 @@ def parse_cv(text: str) -> CVData:
         photo=str(meta.get("photo", "")),
     )
 
+    with metrics.stage("markdown"):
+        sections = _parse_sections(body)
+
+    return CVData(contact=contact, sections=sections)
+
+
+def _parse_sections(body: str) -> list[Section]:
     # Split body by h2 headings (## )
-    body = post.content
     sections: list[Section] = []
 
     # Content before the first ## is treated as profile
@@ -100,31 +201,18 @@ def parse_cv(text: str) -> CVData:
     # First part is content before any ## heading
     preamble = parts[0].strip()
     if preamble:
-        sections.append(Section(
+        sections.append(_cached_section(_digest("preamble", preamble), lambda: Section(
             heading="Perfil",
             slug="perfil",
             content_html=_render_md(preamble),
             section_type="profile",
-        ))
+        )))
 
     # Remaining parts are "Heading\ncontent..."
     for part in parts[1:]:
-        lines = part.split("\n", 1)
-        heading = lines[0].strip()
-        content = lines[1] if len(lines) > 1 else ""
-        content = content.strip()
+        sections.append(_cached_section(_digest("section", part), lambda: _build_section(part)))
 
-        section_type = _detect_section_type(heading)
-        content_html = _render_md(content) if content else ""
-
-        sections.append(Section(
-            heading=heading,
-            slug=_slugify(heading),
-            content_html=content_html,
-            section_type=section_type,
-        ))
-
-    return CVData(contact=contact, sections=sections)
+    return sections
 
 
 def parse_cv_file(path: str) -> CVData:
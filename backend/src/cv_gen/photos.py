@@ -0,0 +1,160 @@
+"""Contact photo pipeline: fetch, downscale and cache photos for renders.
+
+``contact.photo`` can point to a large local file or a remote URL.  Each
+source is read once (with a timeout and a size cap), decoded, downscaled to
+the resolution the templates print it at and kept in an LRU keyed by source
+and content hash.  Later renders get the same bytes without touching the
+source again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import mimetypes
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urljoin
+from urllib.request import url2pathname
+
+from cv_gen.cache import LRUCache
+
+# The modern template prints the photo at 35mm: ~413px at 300 dpi.
+PHOTO_MAX_PX = int(os.getenv("CV_GEN_PHOTO_MAX_PX", "420"))
+PHOTO_MAX_BYTES = int(os.getenv("CV_GEN_PHOTO_MAX_MB", "10")) * 1024 * 1024
+PHOTO_TIMEOUT = float(os.getenv("CV_GEN_PHOTO_TIMEOUT", "5"))
+PHOTO_CACHE_MB = int(os.getenv("CV_GEN_PHOTO_CACHE_MB", "32"))
+
+_SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+class PhotoError(ValueError):
+    """The photo could not be fetched or decoded."""
+
+
+@dataclass(frozen=True)
+class Photo:
+    data: bytes
+    mime_type: str
+    digest: str  # sha256 of the source bytes
+
+
+def resolve_photo_url(photo: str, base_url: str) -> str:
+    """Return the absolute URL WeasyPrint requests for ``<img src=photo>``."""
+    from weasyprint.urls import iri_to_uri
+
+    if not _SCHEME_RE.match(photo):
+        photo = urljoin(Path(base_url).resolve().as_uri() + "/", photo)
+    return iri_to_uri(photo)
+
+
+class PhotoCache:
+    """Processed photos by content hash, plus a source -> hash index."""
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = PHOTO_CACHE_MB * 1024 * 1024,
+        max_px: int = PHOTO_MAX_PX,
+        max_source_bytes: int = PHOTO_MAX_BYTES,
+        timeout: float = PHOTO_TIMEOUT,
+    ) -> None:
+        self._photos: LRUCache[Photo] = LRUCache(max_bytes, sizeof=lambda p: len(p.data))
+        self._sources: LRUCache[str] = LRUCache(1024, sizeof=lambda _: 1)
+        self._max_px = max_px
+        self._max_source_bytes = max_source_bytes
+        self._timeout = timeout
+
+    def load(self, url: str) -> Photo:
+        """Return the processed photo for ``url``, reading it only on a miss."""
+        key = self._source_key(url)
+        digest = self._sources.get(key)
+        if digest is not None:
+            photo = self._photos.get(digest)
+            if photo is not None:
+                return photo
+
+        raw, mime_type = self._read(url)
+        digest = hashlib.sha256(raw).hexdigest()
+        photo = self._photos.get(digest)
+        if photo is None:
+            photo = self._process(raw, mime_type, digest)
+            self._photos.put(digest, photo)
+        self._sources.put(key, digest)
+        return photo
+
+    def clear(self) -> None:
+        self._photos.clear()
+        self._sources.clear()
+
+    def _source_key(self, url: str) -> tuple:
+        if url.startswith("file:"):
+            path = _file_path(url)
+            try:
+                stat = os.stat(path)
+            except OSError as exc:
+                raise PhotoError(f"Photo not found: {path}") from exc
+            return ("file", path, stat.st_mtime_ns, stat.st_size)
+        return ("url", hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def _read(self, url: str) -> tuple[bytes, str]:
+        if url.startswith("file:"):
+            path = _file_path(url)
+            try:
+                if os.path.getsize(path) > self._max_source_bytes:
+                    raise PhotoError(f"Photo too large: {path}")
+                with open(path, "rb") as f:
+                    return f.read(), mimetypes.guess_type(path)[0] or ""
+            except OSError as exc:  # a directory, unreadable, or removed since the stat
+                raise PhotoError(f"Cannot read photo {path}: {exc.strerror or exc}") from exc
+
+        from weasyprint.urls import URLFetcher
+
+        try:
+            response = URLFetcher(timeout=self._timeout, allowed_protocols={"http", "https", "data"}).fetch(url)
+        except Exception as exc:
+            raise PhotoError(f"Could not fetch photo {url}: {exc}") from exc
+        try:
+            raw = response.read(self._max_source_bytes + 1)
+            mime_type = response.content_type
+        finally:
+            response.close()
+        if len(raw) > self._max_source_bytes:
+            raise PhotoError(f"Photo too large: {url}")
+        return raw, mime_type
+
+    def _process(self, raw: bytes, mime_type: str, digest: str) -> Photo:
+        if mime_type == "image/svg+xml":
+            return Photo(raw, mime_type, digest)
+
+        from PIL import Image, ImageOps, UnidentifiedImageError
+
+        try:
+            with Image.open(io.BytesIO(raw)) as image:
+                source_format = image.format
+                if max(image.size) <= self._max_px and source_format in ("JPEG", "PNG"):
+                    return Photo(raw, Image.MIME[source_format], digest)
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((self._max_px, self._max_px), Image.Resampling.LANCZOS)
+                out = io.BytesIO()
+                if image.mode in ("RGBA", "LA", "P"):
+                    image.save(out, format="PNG", optimize=True)
+                    return Photo(out.getvalue(), "image/png", digest)
+                image.convert("RGB").save(out, format="JPEG", quality=85, optimize=True)
+                return Photo(out.getvalue(), "image/jpeg", digest)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+            raise PhotoError(f"Could not decode photo: {exc}") from exc
+
+
+def _file_path(url: str) -> str:
+    return os.path.realpath(url2pathname(url.split("?")[0].removeprefix("file:")))
+
+
+_cache = PhotoCache()
+
+
+def load_photo(url: str) -> Photo:
+    """Return the processed photo from the process-wide cache."""
+    return _cache.load(url)
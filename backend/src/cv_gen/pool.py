@@ -0,0 +1,207 @@
+"""Process pool for CPU-bound PDF rendering.
+
+WeasyPrint layout is pure Python, so renders running in the API's thread
+pool are serialized by the GIL.  :class:`RenderPool` dispatches them to
+worker processes instead.  Workers are pre-warmed (templates compiled,
+stylesheets parsed, fontconfig initialized) and recycled after a number of
+tasks or when their resident memory grows past a ceiling.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import BinaryIO
+
+from cv_gen import metrics
+from cv_gen.models import ContactInfo, CVData, Section
+from cv_gen.parser import parse_cv
+from cv_gen.renderer import get_available_templates, get_template, render_pdf, render_pdf_bytes
+
+# 0 disables the pool: renders run in-process on the thread pool.
+RENDER_WORKERS = int(os.getenv("CV_GEN_RENDER_WORKERS", "0"))
+RENDER_MAX_TASKS = int(os.getenv("CV_GEN_RENDER_MAX_TASKS", "500"))
+RENDER_MAX_RSS_MB = int(os.getenv("CV_GEN_RENDER_MAX_RSS_MB", "768"))
+
+# CV rendered once per template to warm up a process.
+WARMUP_CV_PATH = Path(
+    os.getenv("CV_GEN_WARMUP_CV") or Path(__file__).resolve().parents[2] / "examples" / "sample_cv.md"
+)
+
+_WARMUP_CV = CVData(
+    contact=ContactInfo(name="Warmup", title="cv-gen"),
+    sections=[Section(heading="Perfil", slug="perfil", content_html="<p>Warmup</p>", section_type="profile")],
+)
+
+
+def _warmup_cv() -> CVData:
+    try:
+        return parse_cv(WARMUP_CV_PATH.read_text(encoding="utf-8"))
+    except OSError:
+        # Not shipped (e.g. installed from a wheel): use the built-in CV.
+        return _WARMUP_CV
+
+
+def warm_up() -> None:
+    """Compile every template and render the sample CV once with each.
+
+    Used as the pool initializer and at API startup so the first real
+    request does not pay for template compilation, fontconfig
+    initialization and font loading.
+    """
+    cv = _warmup_cv()
+    for name in get_available_templates():
+        get_template(name).stylesheet()
+        render_pdf_bytes(cv, name)
+
+
+def current_rss() -> int:
+    """Return the resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+def _render_task(source: str | CVData, template: str) -> tuple[str, int, list[tuple[str, float]]]:
+    # Write to a temporary file rather than returning the bytes, so the PDF
+    # is never pickled through the result pipe or held whole in memory.
+    fd, path = tempfile.mkstemp(prefix="cv-gen-", suffix=".pdf")
+    try:
+        with metrics.collect_timings() as timings, os.fdopen(fd, "wb") as f:
+            cv = parse_cv(source) if isinstance(source, str) else source
+            render_pdf(cv, f, template)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, current_rss(), timings
+
+
+def _open_and_unlink(path: str) -> BinaryIO:
+    f = open(path, "rb")
+    os.unlink(path)  # the open handle keeps the data until it is closed
+    return f
+
+
+class RenderPool:
+    """Pre-warmed pool of render worker processes.
+
+    Workers are replaced after ``max_tasks_per_worker`` renders.  When a
+    worker reports an RSS above ``max_rss_bytes`` the whole executor is
+    swapped for a fresh one; the old one finishes its in-flight renders
+    and exits.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        *,
+        max_tasks_per_worker: int = RENDER_MAX_TASKS,
+        max_rss_bytes: int = RENDER_MAX_RSS_MB * 1024 * 1024,
+    ) -> None:
+        self._workers = workers
+        self._max_tasks = max_tasks_per_worker
+        self._max_rss = max_rss_bytes
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._tasks = 0
+        self.recycles = 0
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        kwargs = {}
+        if self._max_tasks and sys.version_info >= (3, 11):
+            kwargs["max_tasks_per_child"] = self._max_tasks
+        # "spawn": forking a process that runs threads (uvicorn, fontconfig)
+        # is unsafe, and max_tasks_per_child does not support "fork".
+        return ProcessPoolExecutor(
+            self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up,
+            **kwargs,
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+                self._tasks = 0
+            elif (
+                self._max_tasks
+                and sys.version_info < (3, 11)
+                and self._tasks >= self._max_tasks * self._workers
+            ):
+                self._swap_executor()
+            self._tasks += 1
+            return self._executor
+
+    def _swap_executor(self) -> None:
+        # Caller holds self._lock.
+        old = self._executor
+        self._executor = self._new_executor()
+        self._tasks = 0
+        self.recycles += 1
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def recycle(self, executor: ProcessPoolExecutor | None = None) -> None:
+        """Replace the executor (only if it is still ``executor``, when given)."""
+        with self._lock:
+            if executor is None or executor is self._executor:
+                self._swap_executor()
+
+    async def start(self) -> None:
+        """Spawn and warm up every worker."""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, _noop) for _ in range(self._workers)))
+
+    async def render_pdf(self, source: str | CVData, template: str) -> BinaryIO:
+        """Parse and render ``source`` to PDF in a worker process.
+
+        ``source`` is Markdown, or an already parsed CV (so rendering one CV
+        with several templates parses it only once).  Returns the PDF as an
+        open temporary file; the caller closes it.  The worker's stage
+        timings are recorded in this process.
+        """
+        executor = self._get_executor()
+        try:
+            path, rss, timings = await asyncio.wrap_future(executor.submit(_render_task, source, template))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): retry once on a fresh pool.
+            self.recycle(executor)
+            executor = self._get_executor()
+            path, rss, timings = await asyncio.wrap_future(executor.submit(_render_task, source, template))
+        for name, seconds in timings:
+            metrics.record_stage(name, seconds)
+        if self._max_rss and rss > self._max_rss:
+            self.recycle(executor)
+        return _open_and_unlink(path)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,290 @@
+"""Stage-by-stage profiling of the render pipeline (``cv-gen profile``).
+
+Every pass runs the whole pipeline (parse with cold caches, then render)
+``runs`` times per template, after one warm-up run.  Work is attributed
+to the innermost :func:`cv_gen.metrics.stage` running at the time, or to
+``other`` outside any stage:
+
+- timings: wall-clock time of each stage, without profiler overhead
+- cProfile: one profile per stage
+- tracemalloc: memory still allocated when each stage ends, by source
+  line (a stage includes the stages nested in it)
+- sampling: collapsed stacks (``template;stage;frame;... count``) for
+  flamegraph.pl or speedscope
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import statistics
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from cv_gen import metrics, parser
+from cv_gen.renderer import render_html, render_pdf
+
+OTHER = "other"
+
+
+def run_pipeline(path: str, template: str, *, pdf: bool = True) -> None:
+    """Parse ``path`` with empty parser caches and render it with ``template``."""
+    parser.clear_caches()
+    cv = parser.parse_cv_file(path)
+    if pdf:
+        render_pdf(cv, io.BytesIO(), template)
+    else:
+        render_html(cv, template)
+
+
+class _StageTracker:
+    """Follow the innermost stage running in the thread that created it.
+
+    Subclasses override :meth:`switch` to react when it changes.
+    """
+
+    def __init__(self) -> None:
+        self._thread = threading.get_ident()
+        self._stack = [OTHER]
+
+    @property
+    def current(self) -> str:
+        return self._stack[-1]
+
+    def __call__(self, name: str, entering: bool) -> None:
+        if threading.get_ident() != self._thread:
+            return
+        previous = self._stack[-1]
+        if entering:
+            self._stack.append(name)
+        else:
+            self._stack.pop()
+        self.switch(previous, self._stack[-1], entering)
+
+    def switch(self, previous: str, current: str, entering: bool) -> None:
+        pass
+
+    @contextmanager
+    def tracking(self) -> Iterator[None]:
+        metrics.add_stage_listener(self)
+        try:
+            yield
+        finally:
+            metrics.remove_stage_listener(self)
+
+
+class _StageProfiler(_StageTracker):
+    """One cProfile profile per stage, enabled only while it is innermost."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.profiles: dict[str, cProfile.Profile] = {}
+
+    def _profile(self, name: str) -> cProfile.Profile:
+        if name not in self.profiles:
+            self.profiles[name] = cProfile.Profile()
+        return self.profiles[name]
+
+    def switch(self, previous: str, current: str, entering: bool) -> None:
+        self._profile(previous).disable()
+        self._profile(current).enable()
+
+    @contextmanager
+    def tracking(self) -> Iterator[None]:
+        with super().tracking():
+            self._profile(self.current).enable()
+            try:
+                yield
+            finally:
+                self._profile(self.current).disable()
+
+
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+class _StageAllocations(_StageTracker):
+    """Net allocations of each stage, by source line (needs tracemalloc)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._snapshots: list[tracemalloc.Snapshot] = []
+        # stage -> "file:line" -> [bytes, blocks]
+        self.sites: dict[str, dict[str, list[int]]] = {}
+
+    def switch(self, previous: str, current: str, entering: bool) -> None:
+        if entering:
+            self._snapshots.append(_snapshot())
+            return
+        before = self._snapshots.pop()
+        sites = self.sites.setdefault(previous, {})
+        for diff in _snapshot().compare_to(before, "lineno"):
+            site = sites.setdefault(str(diff.traceback[0]), [0, 0])
+            site[0] += diff.size_diff
+            site[1] += diff.count_diff
+
+
+class _StackSampler(_StageTracker):
+    """Sample the tracked thread's stack every ``interval`` seconds."""
+
+    def __init__(self, interval: float, prefix: str) -> None:
+        super().__init__()
+        self.interval = interval
+        self.prefix = prefix
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self._thread)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            name = getattr(code, "co_qualname", code.co_name)
+            names.append(f"{name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            if code is run_pipeline.__code__:
+                break
+            frame = frame.f_back
+        if frame is None:
+            return  # between two runs
+        self.stacks[";".join([self.prefix, self.current, *reversed(names)])] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    @contextmanager
+    def tracking(self) -> Iterator[None]:
+        thread = threading.Thread(target=self._run, name="cv-gen-sampler", daemon=True)
+        with super().tracking():
+            thread.start()
+            try:
+                yield
+            finally:
+                self._stop.set()
+                thread.join()
+
+
+@dataclass
+class StageProfile:
+    """What was measured for one stage of one template."""
+
+    name: str
+    seconds: list[float] = field(default_factory=list)  # one per call
+    stats: pstats.Stats | None = None
+    allocations: list[tuple[str, int, int]] = field(default_factory=list)  # (site, bytes, blocks) per run
+
+
+@dataclass
+class TemplateProfile:
+    template: str
+    runs: int
+    stages: dict[str, StageProfile] = field(default_factory=dict)
+    stacks: Counter[str] = field(default_factory=Counter)
+
+    def stage(self, name: str) -> StageProfile:
+        if name not in self.stages:
+            self.stages[name] = StageProfile(name)
+        return self.stages[name]
+
+
+def profile_template(
+    path: str,
+    template: str,
+    runs: int = 5,
+    *,
+    pdf: bool = True,
+    memory: bool = True,
+    sample_interval: float | None = None,
+) -> TemplateProfile:
+    """Profile the pipeline for ``template``: timings, cProfile, and
+    optionally tracemalloc and stack sampling, one pass each."""
+
+    def run_all() -> None:
+        for _ in range(runs):
+            run_pipeline(path, template, pdf=pdf)
+
+    run_pipeline(path, template, pdf=pdf)  # compile the template, load fonts
+    result = TemplateProfile(template, runs)
+
+    with metrics.collect_timings() as timings:
+        run_all()
+    for name, seconds in timings:
+        result.stage(name).seconds.append(seconds)
+
+    profiler = _StageProfiler()
+    with profiler.tracking():
+        run_all()
+    for name, profile in profiler.profiles.items():
+        result.stage(name).stats = pstats.Stats(profile)
+
+    if memory:
+        allocations = _StageAllocations()
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            with allocations.tracking():
+                run_all()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        for name, sites in allocations.sites.items():
+            top = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)
+            result.stage(name).allocations = [
+                (site, size // runs, count // runs) for site, (size, count) in top if size > 0
+            ]
+
+    if sample_interval:
+        sampler = _StackSampler(sample_interval, prefix=template)
+        with sampler.tracking():
+            run_all()
+        result.stacks = sampler.stacks
+
+    return result
+
+
+def format_report(result: TemplateProfile, *, sort: str = "cumulative", limit: int = 15) -> str:
+    out = io.StringIO()
+    out.write(f"=== {result.template} ({result.runs} runs) ===\n\n")
+    out.write("Stage timings (a stage includes the stages nested in it):\n")
+    out.write(f"  {'stage':<14} {'calls':>6} {'median':>10} {'min':>10}\n")
+    for stage in result.stages.values():
+        if stage.seconds:
+            out.write(
+                f"  {stage.name:<14} {len(stage.seconds):>6} "
+                f"{statistics.median(stage.seconds) * 1000:>8.2f}ms {min(stage.seconds) * 1000:>8.2f}ms\n"
+            )
+
+    for stage in result.stages.values():
+        if stage.stats is not None:
+            out.write(f"\n--- cProfile: {stage.name} (sorted by {sort}) ---\n")
+            stage.stats.stream = out
+            stage.stats.sort_stats(sort).print_stats(limit)
+
+    for stage in result.stages.values():
+        if stage.allocations:
+            out.write(f"\n--- tracemalloc: {stage.name} (memory held at stage end, per run) ---\n")
+            for site, size, count in stage.allocations[:limit]:
+                out.write(f"  {size / 1024:>10.1f} KiB {count:>8} blocks  {site}\n")
+    return out.getvalue()
+
+
+def write_collapsed(stacks: Counter[str], path: Path) -> None:
+    """Write stacks in the collapsed format read by flamegraph.pl and speedscope."""
+    lines = [f"{stack} {count}" for stack, count in sorted(stacks.items())]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
@@ -0,0 +1,173 @@
+"""Rate limiting with GCRA (the generic cell rate algorithm).
+
+GCRA behaves like a token bucket refilled continuously but keeps a single
+number per key, the *theoretical arrival time* (TAT): the moment the
+key's bucket would be full again.  A request is allowed when it would not
+push the TAT further than one window ahead of now; each allowed request
+moves the TAT forward by ``window / limit`` seconds.  A key whose TAT is
+in the past has a full bucket and carries no information, so it can be
+evicted.
+
+The state lives in a backend: :class:`MemoryBackend` for one process, or
+:class:`SQLiteBackend` when several processes (uvicorn workers) must share
+the same limits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+SWEEP_INTERVAL = 60.0
+
+
+class RateLimitBackend(Protocol):
+    # True if acquire() does I/O and must not run on the event loop.
+    blocking: bool
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> float:
+        """Take one request for ``key``; return 0 if allowed, else the
+        seconds until it would be."""
+        ...
+
+
+def _gcra(tat: float | None, now: float, interval: float, window: float) -> tuple[float | None, float]:
+    """Return ``(new TAT or None if denied, retry after)``."""
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    allow_at = new_tat - window
+    if allow_at > now:
+        return None, allow_at - now
+    return new_tat, 0.0
+
+
+class _Shard:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.tats: dict[str, float] = {}
+        self.last_sweep = 0.0
+
+
+class MemoryBackend:
+    """Per-process state: one float per active key, split into shards
+    that each have their own lock.  Idle keys are swept periodically."""
+
+    blocking = False
+
+    def __init__(self, shards: int = 16, *, sweep_interval: float = SWEEP_INTERVAL) -> None:
+        self._shards = [_Shard() for _ in range(shards)]
+        self._sweep_interval = sweep_interval
+
+    def __len__(self) -> int:
+        return sum(len(shard.tats) for shard in self._shards)
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> float:
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            if now - shard.last_sweep >= self._sweep_interval:
+                shard.last_sweep = now
+                shard.tats = {k: tat for k, tat in shard.tats.items() if tat > now}
+            new_tat, retry_after = _gcra(shard.tats.get(key), now, interval, window)
+            if new_tat is not None:
+                shard.tats[key] = new_tat
+            return retry_after
+
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+
+
+class SQLiteBackend:
+    """State in a SQLite table, shared by every process using the file.
+
+    Each check is one short write transaction; idle keys are deleted
+    periodically.
+    """
+
+    blocking = True
+
+    def __init__(self, path: Path, *, sweep_interval: float = SWEEP_INTERVAL) -> None:
+        self.path = Path(path)
+        self._sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> float:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if now - self._last_sweep >= self._sweep_interval:
+                self._last_sweep = now
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            new_tat, retry_after = _gcra(row[0] if row else None, now, interval, window)
+            if new_tat is not None:
+                conn.execute(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?)"
+                    " ON CONFLICT (key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: float = 0.0  # seconds, when not allowed
+
+
+class RateLimiter:
+    """Allow ``limit`` requests per ``window`` seconds for each key.
+
+    A full bucket allows a burst of ``limit`` requests; after that, one
+    more every ``window / limit`` seconds.  ``clock`` must be the same
+    wall clock in every process sharing a backend.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float,
+        backend: RateLimitBackend | None = None,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if limit < 1 or window <= 0:
+            raise ValueError(f"Invalid rate limit: {limit} per {window}s")
+        self.limit = limit
+        self.window = window
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._clock = clock
+
+    def hit(self, key: str) -> RateLimitResult:
+        retry_after = self.backend.acquire(key, self._clock(), self.window / self.limit, self.window)
+        return RateLimitResult(retry_after == 0.0, retry_after)
+
+    async def check(self, key: str) -> RateLimitResult:
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.hit, key)
+        return self.hit(key)
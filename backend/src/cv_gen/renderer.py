@@ -1,58 +1,367 @@
-"""Render CVData to HTML and PDF using Jinja2 + WeasyPrint."""
+"""Render CVData to HTML and PDF using Jinja2 + WeasyPrint.
+
+WeasyPrint (Pango, cairo, fontconfig) is only imported on the first PDF
+render, so listing templates and rendering HTML stay fast.
+"""
 
 from __future__ import annotations
 
+import dataclasses
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
 import jinja2
-import weasyprint
 
+from cv_gen import metrics
+from cv_gen.assets import data_uri, inline_css_assets, make_url_fetcher
 from cv_gen.models import CVData
+from cv_gen.photos import load_photo, resolve_photo_url
+
+if TYPE_CHECKING:
+    import weasyprint
+    from weasyprint.text.fonts import FontConfiguration
+
+logger = logging.getLogger(__name__)
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 
+# Set CV_GEN_TEMPLATE_AUTO_RELOAD=0 in production to skip the per-render
+# mtime check once templates have been compiled.
+TEMPLATE_AUTO_RELOAD = os.getenv("CV_GEN_TEMPLATE_AUTO_RELOAD", "1") != "0"
+# Optional directory for Jinja's on-disk bytecode cache (faster cold starts).
+JINJA_CACHE_DIR = os.getenv("CV_GEN_JINJA_CACHE_DIR", "")
+
+
+@dataclass
+class CompiledTemplate:
+    """A template compiled once and kept together with its CSS."""
+
+    name: str
+    template: jinja2.Template
+    css: str
+    base_url: str
+    version: str  # content hash of template.html + style.css
+    mtimes: tuple[float, float]
+    _preview_css: str | None = field(default=None, repr=False)
+
+    def stylesheet(self) -> weasyprint.CSS:
+        """Return the template CSS parsed by WeasyPrint, built on first use
+        in each thread (it is bound to the thread's font configuration)."""
+        stylesheets = _thread_state().stylesheets
+        cached = stylesheets.get(self.name)
+        if cached is None or cached[0] != self.version:
+            import weasyprint
+
+            css = weasyprint.CSS(
+                string=self.css,
+                base_url=self.base_url,
+                url_fetcher=make_url_fetcher([Path(self.base_url)]),
+                font_config=get_font_config(),
+            )
+            cached = stylesheets[self.name] = (self.version, css)
+        return cached[1]
+
+    def preview_css(self) -> str:
+        """Return the template CSS with its fonts and images inlined, built on first use."""
+        if self._preview_css is None:
+            self._preview_css = inline_css_assets(
+                self.css,
+                Path(self.base_url).resolve().as_uri() + "/",
+                make_url_fetcher([Path(self.base_url)]),
+            )
+        return self._preview_css
+
+
+class TemplateRegistry:
+    """Process-wide cache of compiled templates.
+
+    Each template is read and compiled on first use.  When ``auto_reload`` is
+    enabled, the mtimes of ``template.html`` and ``style.css`` are checked on
+    every lookup and the entry is rebuilt if either file changed.
+    """
+
+    def __init__(
+        self,
+        templates_dir: Path,
+        *,
+        auto_reload: bool = True,
+        bytecode_cache_dir: str | None = None,
+    ) -> None:
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+
+        self._templates_dir = templates_dir
+        self._auto_reload = auto_reload
+        self._env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(str(templates_dir)),
+            autoescape=True,
+            auto_reload=auto_reload,
+            bytecode_cache=bytecode_cache,
+        )
+        self._entries: dict[str, CompiledTemplate] = {}
+        self._names: tuple[float, list[str]] | None = None
+        self._lock = threading.Lock()
+
+    def available(self) -> list[str]:
+        """Return the names of all templates found on disk.
+
+        The directory is scanned once; with ``auto_reload`` it is scanned
+        again when its mtime changes (a template added or removed).
+        """
+        names = self._names
+        if names is not None and (not self._auto_reload or names[0] == _mtime(self._templates_dir)):
+            return list(names[1])
+
+        mtime = _mtime(self._templates_dir)
+        found = sorted(
+            d.name for d in self._templates_dir.iterdir()
+            if d.is_dir() and (d / "template.html").exists()
+        )
+        self._names = (mtime, found)
+        return list(found)
+
+    def get(self, name: str) -> CompiledTemplate:
+        """Return the compiled template, loading or reloading it if needed."""
+        entry = self._entries.get(name)
+        if entry is not None and (not self._auto_reload or entry.mtimes == self._mtimes(name)):
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or (self._auto_reload and entry.mtimes != self._mtimes(name)):
+                entry = self._load(name)
+                self._entries[name] = entry
+            return entry
+
+    def clear(self) -> None:
+        """Drop every compiled template."""
+        with self._lock:
+            self._entries.clear()
+            self._names = None
+            if self._env.cache is not None:
+                self._env.cache.clear()
+
+    def _mtimes(self, name: str) -> tuple[float, float]:
+        template_dir = self._templates_dir / name
+        return (
+            _mtime(template_dir / "template.html"),
+            _mtime(template_dir / "style.css"),
+        )
+
+    def _load(self, name: str) -> CompiledTemplate:
+        names = self.available()
+        if name not in names:
+            raise ValueError(
+                f"Template '{name}' not found. Available: {', '.join(names)}"
+            )
+
+        template_dir = self._templates_dir / name
+        css_path = template_dir / "style.css"
+        # Read mtimes before contents so a concurrent edit triggers a reload.
+        mtimes = self._mtimes(name)
+        html_source = (template_dir / "template.html").read_bytes()
+        css = css_path.read_text(encoding="utf-8") if css_path.exists() else ""
+
+        return CompiledTemplate(
+            name=name,
+            template=self._env.get_template(f"{name}/template.html"),
+            css=css,
+            base_url=str(template_dir),
+            version=hashlib.sha256(html_source + b"\0" + css.encode("utf-8")).hexdigest()[:16],
+            mtimes=mtimes,
+        )
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+# Pango font maps and FreeType libraries must not be used from several
+# threads at once, and the API renders on a thread pool: each thread gets
+# its own FontConfiguration and the stylesheets parsed with it.
+_local = threading.local()
+
+
+def _thread_state() -> threading.local:
+    if not hasattr(_local, "stylesheets"):
+        from weasyprint.text.fonts import FontConfiguration
+
+        _local.font_config = FontConfiguration()
+        _local.stylesheets = {}  # template name -> (version, weasyprint.CSS)
+    return _local
+
+
+def get_font_config() -> FontConfiguration:
+    """Return the FontConfiguration shared by the stylesheets and renders
+    of the current thread.
+
+    Fonts declared with ``@font-face`` are registered on the configuration
+    used to parse the stylesheet, so renders must use the same instance.
+    """
+    return _thread_state().font_config
+
+
+_registry = TemplateRegistry(
+    TEMPLATES_DIR,
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    bytecode_cache_dir=JINJA_CACHE_DIR or None,
+)
+
 
 def get_available_templates() -> list[str]:
     """Return list of available template names."""
-    return sorted(
-        d.name for d in TEMPLATES_DIR.iterdir()
-        if d.is_dir() and (d / "template.html").exists()
-    )
+    return _registry.available()
+
+
+def get_template(template_name: str) -> CompiledTemplate:
+    """Return the compiled template from the process-wide registry."""
+    return _registry.get(template_name)
+
+
+def reload_templates() -> None:
+    """Drop every compiled template so it is rebuilt on next use."""
+    _registry.clear()
+
+
+def render_html(cv: CVData, template_name: str = "modern", *, inline_css: bool = True) -> str:
+    """Render CVData to HTML string using the specified template.
 
+    With ``inline_css=False`` the ``<style>`` block is left out; the PDF path
+    passes the pre-parsed stylesheet to WeasyPrint instead.
+    """
+    compiled = get_template(template_name)
+    return _render_template(compiled, cv, compiled.css if inline_css else "")
 
-def render_html(cv: CVData, template_name: str = "modern") -> str:
-    """Render CVData to HTML string using the specified template."""
-    template_dir = TEMPLATES_DIR / template_name
-    html_path = template_dir / "template.html"
-    css_path = template_dir / "style.css"
 
-    if not html_path.exists():
-        available = ", ".join(get_available_templates())
-        raise ValueError(
-            f"Template '{template_name}' not found. Available: {available}"
+def _render_template(compiled: CompiledTemplate, cv: CVData, css: str) -> str:
+    with metrics.stage("jinja"):
+        return compiled.template.render(
+            cv=cv,
+            contact=cv.contact,
+            sections=cv.sections,
+            sidebar_sections=cv.sidebar_sections(),
+            main_sections=cv.main_sections(),
+            css=css,
         )
 
-    html_template = html_path.read_text(encoding="utf-8")
-    css = css_path.read_text(encoding="utf-8") if css_path.exists() else ""
 
-    env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(str(template_dir)),
-        autoescape=True,
+def render_preview_html(cv: CVData, template_name: str = "modern") -> str:
+    """Render self-contained HTML for a live preview in the browser.
+
+    Much faster than a PDF: there is no layout step.  The CSS comes with the
+    stored fonts inlined and the photo is embedded as a ``data:`` URI, so the
+    page renders without further requests.
+    """
+    compiled = get_template(template_name)
+    if cv.contact.photo:
+        try:
+            photo = load_photo(resolve_photo_url(cv.contact.photo, compiled.base_url))
+            photo_src = data_uri(photo.data, photo.mime_type)
+        except ValueError as exc:
+            # Like WeasyPrint, skip an unreadable photo instead of failing.
+            logger.warning("Preview without photo: %s", exc)
+            photo_src = ""
+        cv = dataclasses.replace(cv, contact=dataclasses.replace(cv.contact, photo=photo_src))
+
+    return _render_template(compiled, cv, compiled.preview_css())
+
+
+def _document_stylesheets(html: weasyprint.HTML) -> list[weasyprint.CSS]:
+    """Take the stylesheets embedded in the document (raw ``<style>`` or
+    ``<link>`` in the CV's Markdown) out of the author origin.
+
+    WeasyPrint gives stylesheets passed to ``render()`` the user origin, below
+    anything in the document.  Passing these after the template sheet, in the
+    same origin, keeps the cascade of the inline ``<style>`` it replaces:
+    specificity, then source order, decides between the CV and the template.
+    """
+    import weasyprint
+    from weasyprint.urls import get_url_attribute
+
+    sheets = []
+    for element in html.etree_element.iter():
+        if element.tag not in ("style", "link"):
+            continue
+        if element.get("type", "text/css").split(";", 1)[0].strip() != "text/css":
+            continue
+        media = {m.strip() for m in (element.get("media") or "all").split(",")}
+        if element.tag == "link":
+            rel = (element.get("rel") or "").lower().split()
+            if "stylesheet" not in rel or "alternate" in rel or not element.get("href"):
+                continue
+        # Hidden from WeasyPrint's own stylesheet lookup.
+        element.set("type", "text/x-cv-gen-moved")
+        if not media & {"all", "print"}:
+            continue
+        options = dict(url_fetcher=html.url_fetcher, media_type="print", font_config=get_font_config())
+        if element.tag == "style":
+            sheets.append(weasyprint.CSS(string="".join(element.itertext()), base_url=html.base_url, **options))
+        else:
+            url = get_url_attribute(element, "href", html.base_url)
+            try:
+                sheets.append(weasyprint.CSS(url=url, **options))
+            except Exception as exc:  # like WeasyPrint, skip a stylesheet it cannot load
+                logger.warning("Cannot load stylesheet %s: %s", url, exc)
+    return sheets
+
+
+def _render_document(compiled: CompiledTemplate, html_string: str, photo_url: str = "") -> weasyprint.Document:
+    import weasyprint
+
+    html = weasyprint.HTML(
+        string=html_string,
+        base_url=compiled.base_url,
+        url_fetcher=make_url_fetcher([Path(compiled.base_url)], photo_url=photo_url),
     )
-    template = env.from_string(html_template)
-
-    return template.render(
-        cv=cv,
-        contact=cv.contact,
-        sections=cv.sections,
-        sidebar_sections=cv.sidebar_sections(),
-        main_sections=cv.main_sections(),
-        css=css,
+    return html.render(
+        font_config=get_font_config(),
+        stylesheets=[compiled.stylesheet(), *_document_stylesheets(html)],
+        pdf_identifier=False,
     )
 
 
-def render_pdf(cv: CVData, output_path: str, template_name: str = "modern") -> None:
-    """Render CVData to PDF file."""
-    html_string = render_html(cv, template_name)
-    html = weasyprint.HTML(string=html_string, base_url=str(TEMPLATES_DIR / template_name))
-    html.write_pdf(output_path)
+def _write_pdf(cv: CVData, template_name: str, target=None) -> bytes | None:
+    compiled = get_template(template_name)
+    photo_url = ""
+    if cv.contact.photo:
+        # Point the <img> at the resolved URL so the fetcher can recognize it
+        # and serve the cached, downscaled photo.
+        photo_url = resolve_photo_url(cv.contact.photo, compiled.base_url)
+        cv = dataclasses.replace(cv, contact=dataclasses.replace(cv.contact, photo=photo_url))
+
+    html_string = render_html(cv, template_name, inline_css=False)
+    # Same as HTML.write_pdf(), split so layout and serialization are timed
+    # separately.  No /ID and no creation date: identical inputs give
+    # byte-identical PDFs.
+    with metrics.stage("layout"):
+        document = _render_document(compiled, html_string, photo_url)
+    with metrics.stage("pdf_write"):
+        return document.write_pdf(target, pdf_identifier=False)
+
+
+def render_pdf(cv: CVData, output_path: str | os.PathLike | BinaryIO, template_name: str = "modern") -> None:
+    """Render CVData to PDF file.
+
+    ``output_path`` may also be a binary file object; the document is then
+    written to it incrementally instead of being built in memory first.
+    """
+    _write_pdf(cv, template_name, output_path)
+
+
+def render_pdf_bytes(cv: CVData, template_name: str = "modern") -> bytes:
+    """Render CVData to PDF and return the document bytes.
+
+    The output is deterministic: the same CV and template version always
+    produce the same bytes.
+    """
+    return _write_pdf(cv, template_name)
@@ -0,0 +1,70 @@
+"""Coalesce identical concurrent calls into one ("single flight").
+
+The first caller for a key starts the call; callers arriving with the same
+key while it runs wait for that call instead of starting their own, and
+all of them get its result or its exception.  Nothing is kept once the
+call finishes: this is not a cache, only deduplication of work in flight.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from cv_gen import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Calls in flight by key; ``name`` labels the coalescing metric."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._flights: dict[Hashable, asyncio.Future[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _forget(self, key: Hashable, flight: asyncio.Future[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()  # retrieved, even if every caller has gone
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        discard: Callable[[T], object] | None = None,
+    ) -> tuple[T, bool]:
+        """Return ``(result, joined)``; ``joined`` is True when this caller
+        shared a call started by another one.
+
+        The call runs in its own task: a caller that is cancelled (client
+        disconnected) does not cancel it for the others.  If the caller that
+        started it is cancelled, ``discard`` gets the result once the call
+        finishes, for results only that caller would have used (an open
+        file).
+        """
+        flight = self._flights.get(key)
+        joined = flight is not None and flight.get_loop() is asyncio.get_running_loop()
+        if joined:
+            metrics.COALESCED_CALLS.inc(flight=self.name)
+        else:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._forget(key, done))
+        try:
+            return await asyncio.shield(flight), joined
+        except asyncio.CancelledError:
+            if discard is not None and not joined:
+                flight.add_done_callback(lambda done: _discard_result(done, discard))
+            raise
+
+
+def _discard_result(flight: asyncio.Future[T], discard: Callable[[T], object]) -> None:
+    if not flight.cancelled() and flight.exception() is None:
+        discard(flight.result())
@@ -0,0 +1,61 @@
+"""Polling file watcher for the CLI's --watch mode."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+
+class Watcher:
+    """Detect content changes in a set of files and directories.
+
+    Each poll stats every file and only hashes the ones whose mtime or size
+    changed, so touching a file without editing it does not count as a
+    change.
+    """
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        self._roots = [Path(p) for p in paths]
+        self._stats: dict[Path, tuple[int, int]] = {}
+        self._hashes: dict[Path, str] = {}
+        self.poll()
+
+    def _files(self, root: Path) -> list[Path]:
+        if root.is_dir():
+            return sorted(p for p in root.rglob("*") if p.is_file())
+        return [root] if root.exists() else []
+
+    def poll(self) -> list[Path]:
+        """Return the watched roots whose content changed since the last poll."""
+        changed: list[Path] = []
+        seen: set[Path] = set()
+        for root in self._roots:
+            root_changed = False
+            for path in self._files(root):
+                seen.add(path)
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self._stats.get(path) == signature:
+                    continue
+                self._stats[path] = signature
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                if self._hashes.get(path) != digest:
+                    self._hashes[path] = digest
+                    root_changed = True
+            removed = [p for p in self._hashes if p not in seen and _is_under(p, root)]
+            for path in removed:
+                del self._hashes[path]
+                self._stats.pop(path, None)
+                root_changed = True
+            if root_changed:
+                changed.append(root)
+        return changed
+
+
+def _is_under(path: Path, root: Path) -> bool:
+    return path == root or str(path).startswith(str(root) + os.sep)
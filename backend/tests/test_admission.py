@@ -0,0 +1,137 @@
+"""Tests for render admission control."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+
+import pytest
+
+from cv_gen import metrics
+from cv_gen.admission import AdmissionQueue, Overloaded
+
+
+_names = itertools.count()
+
+
+def _queue(limit: int = 1, *, max_queue: int = 1, max_wait: float = 5.0) -> AdmissionQueue:
+    # A fresh name per test keeps the shared metrics apart.
+    return AdmissionQueue(f"test-{next(_names)}", limit, max_queue=max_queue, max_wait=max_wait)
+
+
+async def _hold(queue: AdmissionQueue, release: asyncio.Event, **kwargs) -> None:
+    async with queue.slot(**kwargs):
+        await release.wait()
+
+
+def test_runs_up_to_limit_then_queues():
+    queue = _queue(limit=2, max_queue=5)
+
+    async def run():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(queue, release)) for _ in range(4)]
+        await asyncio.sleep(0)
+        assert (queue.active, queue.queued) == (2, 2)
+        assert metrics.QUEUE_DEPTH.value(queue=queue.name) == 2
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert (queue.active, queue.queued) == (0, 0)
+    assert metrics.QUEUE_WAIT_SECONDS.count(queue=queue.name) == 4
+
+
+def test_full_queue_is_rejected_at_once():
+    queue = _queue(max_wait=30.0)
+
+    async def run():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(queue, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            async with queue.slot():
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return excinfo.value
+
+    exc = asyncio.run(run())
+    assert exc.retry_after == 30
+    assert metrics.QUEUE_REJECTED.value(queue=queue.name, reason="full") == 1
+
+
+def test_wait_deadline():
+    queue = _queue(max_wait=0.01)
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(queue, release))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded, match="Timed out"):
+            async with queue.slot():
+                pass
+        assert queue.queued == 0
+        release.set()
+        await holder
+
+    asyncio.run(run())
+    assert metrics.QUEUE_REJECTED.value(queue=queue.name, reason="timeout") == 1
+    assert queue.active == 0
+
+
+def test_waiters_are_served_in_order():
+    queue = _queue(max_queue=10)
+    order = []
+
+    async def work(n):
+        async with queue.slot():
+            order.append(n)
+            await asyncio.sleep(0)
+
+    async def run():
+        await asyncio.gather(*(work(n) for n in range(5)))
+
+    asyncio.run(run())
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    queue = _queue()
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(queue, release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(queue, release))
+        await asyncio.sleep(0)
+        assert queue.queued == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert queue.queued == 0
+        release.set()
+        await holder
+
+    asyncio.run(run())
+    assert queue.active == 0
+
+
+def test_background_work_waits_past_the_limits():
+    queue = _queue(max_queue=0, max_wait=0.001)
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(queue, release))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(_hold(queue, release, wait=True))
+        await asyncio.sleep(0.01)
+        assert not background.done()
+        release.set()
+        await asyncio.gather(holder, background)
+
+    asyncio.run(run())
+    assert queue.active == 0
+
+
+def test_invalid_limit():
+    with pytest.raises(ValueError, match="Invalid concurrency limit"):
+        AdmissionQueue("render", 0, max_queue=1, max_wait=1)
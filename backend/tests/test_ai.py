@@ -9,16 +9,34 @@ import pytest
 from docx import Document
 from fastapi.testclient import TestClient
 
+from cv_gen import api
 from cv_gen.ai.base import AIProvider
+from cv_gen.ai.cache import AIResultCache
 from cv_gen.ai.prompt import SYSTEM_PROMPT
 from cv_gen.ai.providers import get_provider, is_ai_configured
 from cv_gen.api import _strip_code_fences, app
+from cv_gen.ratelimit import RateLimiter
 
 client = TestClient(app)
 
 FAKE_MARKDOWN = "---\nname: Test\n---\n\n## Experience\n"
 
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limit(monkeypatch):
+    # AI endpoints allow a few calls per minute and IP; the test client
+    # always has the same IP.
+    monkeypatch.setattr(api, "_ai_limiter", RateLimiter(api.AI_RATE_LIMIT, api.AI_RATE_WINDOW))
+
+
+@pytest.fixture(autouse=True)
+def ai_cache(tmp_path, monkeypatch):
+    # Every test starts with an empty cache, away from the user's.
+    cache = AIResultCache(tmp_path / "ai.sqlite3")
+    monkeypatch.setattr(api, "_ai_cache", cache)
+    return cache
+
+
 # --- helpers ---
 
 
@@ -200,6 +218,180 @@ class TestAiConvert:
         call_text = provider.complete.call_args[0][1]
         assert "John Doe" in call_text
 
+    def test_provider_failure_is_timed(self, monkeypatch):
+        from cv_gen import metrics
+
+        monkeypatch.setenv("AI_PROVIDER", "google")
+        monkeypatch.setenv("AI_API_KEY", "key")
+        monkeypatch.setenv("AI_MODEL", "model")
+        labels = dict(provider="google", model="model", operation="convert", outcome="error")
+        before = metrics.AI_REQUEST_SECONDS.count(**labels)
+
+        provider = _mock_provider()
+        provider.complete_with_pdf.side_effect = RuntimeError("quota exceeded")
+        with patch("cv_gen.api.get_provider", return_value=provider):
+            resp = client.post("/api/ai/convert", files={"file": ("cv.pdf", b"%PDF-1.4 fake", "application/pdf")})
+
+        assert resp.status_code == 502
+        assert metrics.AI_REQUEST_SECONDS.count(**labels) == before + 1
+        assert "ai;dur=" in resp.headers["server-timing"]
+
+
+    def test_repeat_upload_is_served_from_cache(self, monkeypatch):
+        monkeypatch.setenv("AI_PROVIDER", "google")
+        monkeypatch.setenv("AI_API_KEY", "key")
+        monkeypatch.setenv("AI_MODEL", "model")
+        upload = {"file": ("cv.pdf", b"%PDF-1.4 cached", "application/pdf")}
+
+        provider = _mock_provider()
+        with patch("cv_gen.api.get_provider", return_value=provider) as get_provider:
+            first = client.post("/api/ai/convert", files=upload)
+            second = client.post("/api/ai/convert", files=upload)
+
+        assert first.json() == second.json() == {"markdown": FAKE_MARKDOWN}
+        get_provider.assert_called_once()
+        provider.complete_with_pdf.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda mp: mp.setenv("AI_MODEL", "other-model"),
+            lambda mp: mp.setattr("cv_gen.ai.prompt.SYSTEM_PROMPT_VERSION", "edited"),
+        ],
+        ids=["model", "prompt"],
+    )
+    def test_cache_is_keyed_by_model_and_prompt(self, monkeypatch, change):
+        monkeypatch.setenv("AI_PROVIDER", "google")
+        monkeypatch.setenv("AI_API_KEY", "key")
+        monkeypatch.setenv("AI_MODEL", "model")
+        upload = {"file": ("cv.pdf", b"%PDF-1.4 cached", "application/pdf")}
+
+        provider = _mock_provider()
+        with patch("cv_gen.api.get_provider", return_value=provider):
+            client.post("/api/ai/convert", files=upload)
+            change(monkeypatch)
+            client.post("/api/ai/convert", files=upload)
+
+        assert provider.complete_with_pdf.call_count == 2
+
+    def test_cache_is_keyed_by_extension(self, monkeypatch):
+        monkeypatch.setenv("AI_PROVIDER", "google")
+        monkeypatch.setenv("AI_API_KEY", "key")
+        monkeypatch.setenv("AI_MODEL", "model")
+        docx_bytes = _make_docx(["Jane Doe", "Cached Engineer"])
+
+        provider = _mock_provider()
+        with patch("cv_gen.api.get_provider", return_value=provider):
+            client.post("/api/ai/convert", files={"file": ("cv.docx", docx_bytes, "application/octet-stream")})
+            client.post("/api/ai/convert", files={"file": ("cv.pdf", docx_bytes, "application/octet-stream")})
+            client.post("/api/ai/convert", files={"file": ("other.PDF", docx_bytes, "application/octet-stream")})
+
+        provider.complete.assert_called_once()
+        provider.complete_with_pdf.assert_called_once()
+
+    def test_failures_are_not_cached(self, monkeypatch):
+        monkeypatch.setenv("AI_PROVIDER", "google")
+        monkeypatch.setenv("AI_API_KEY", "key")
+        monkeypatch.setenv("AI_MODEL", "model")
+        upload = {"file": ("cv.pdf", b"%PDF-1.4 flaky", "application/pdf")}
+
+        provider = _mock_provider()
+        provider.complete_with_pdf.side_effect = [RuntimeError("timeout"), FAKE_MARKDOWN]
+        with patch("cv_gen.api.get_provider", return_value=provider):
+            assert client.post("/api/ai/convert", files=upload).status_code == 502
+            assert client.post("/api/ai/convert", files=upload).json()["markdown"] == FAKE_MARKDOWN
+
+    def test_identical_uploads_share_one_call(self, monkeypatch):
+        import asyncio
+
+        import httpx
+
+        monkeypatch.setenv("AI_PROVIDER", "google")
+        monkeypatch.setenv("AI_API_KEY", "key")
+        monkeypatch.setenv("AI_MODEL", "model")
+
+        async def slow_complete(system_prompt, pdf_bytes):
+            await asyncio.sleep(0.05)
+            return FAKE_MARKDOWN
+
+        provider = _mock_provider()
+        provider.complete_with_pdf.side_effect = slow_complete
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                upload = {"file": ("cv.pdf", b"%PDF-1.4 same", "application/pdf")}
+                return await asyncio.gather(*(async_client.post("/api/ai/convert", files=upload) for _ in range(2)))
+
+        with patch("cv_gen.api.get_provider", return_value=provider):
+            responses = asyncio.run(scenario())
+
+        assert [resp.json()["markdown"] for resp in responses] == [FAKE_MARKDOWN] * 2
+        provider.complete_with_pdf.assert_called_once()
+
+    def test_rate_limited(self, monkeypatch):
+        monkeypatch.delenv("AI_PROVIDER", raising=False)
+        monkeypatch.setattr(api, "_ai_limiter", RateLimiter(1, 60))
+        upload = {"file": ("cv.pdf", b"%PDF-1.4", "application/pdf")}
+        assert client.post("/api/ai/convert", files=upload).status_code == 503
+        resp = client.post("/api/ai/convert", files=upload)
+        assert resp.status_code == 429
+        assert resp.headers["retry-after"] == "60"
+
+
+class TestAiAdapt:
+    RAW = "===CV_ADAPTED===\n" + FAKE_MARKDOWN + "\n===SUGGESTIONS===\n- Mention Kubernetes\n"
+    OFFER = "Backend engineer.\n\nPython,   FastAPI and Kubernetes."
+
+    @pytest.fixture(autouse=True)
+    def configured(self, monkeypatch):
+        monkeypatch.setenv("AI_PROVIDER", "google")
+        monkeypatch.setenv("AI_API_KEY", "key")
+        monkeypatch.setenv("AI_MODEL", "model")
+
+    def _adapt(self, provider, *requests):
+        with patch("cv_gen.api.get_provider", return_value=provider):
+            return [client.post("/api/ai/adapt", json=body) for body in requests]
+
+    def _provider(self):
+        provider = _mock_provider()
+        provider.complete.return_value = self.RAW
+        return provider
+
+    def test_adapt(self):
+        (resp,) = self._adapt(self._provider(), {"markdown": FAKE_MARKDOWN, "job_offer": self.OFFER})
+        assert resp.status_code == 200
+        assert resp.json() == {"markdown": FAKE_MARKDOWN.strip(), "suggestions": "- Mention Kubernetes"}
+
+    def test_repeat_is_served_from_cache(self):
+        provider = self._provider()
+        first, second = self._adapt(
+            provider,
+            {"markdown": FAKE_MARKDOWN, "job_offer": self.OFFER},
+            # Same content: different line endings and spacing.
+            {"markdown": FAKE_MARKDOWN.replace("\n", "\r\n") + "\n\n", "job_offer": f"  {self.OFFER} \n\n\n"},
+        )
+        assert first.json() == second.json()
+        assert first.json()["suggestions"]
+        provider.complete.assert_called_once()
+
+    def test_different_offer_is_a_miss(self):
+        provider = self._provider()
+        self._adapt(
+            provider,
+            {"markdown": FAKE_MARKDOWN, "job_offer": self.OFFER},
+            {"markdown": FAKE_MARKDOWN, "job_offer": "Frontend engineer."},
+        )
+        assert provider.complete.call_count == 2
+
+    def test_editing_the_prompt_invalidates(self, monkeypatch):
+        provider = self._provider()
+        body = {"markdown": FAKE_MARKDOWN, "job_offer": self.OFFER}
+        self._adapt(provider, body)
+        monkeypatch.setattr("cv_gen.ai.prompt.ADAPT_AND_SUGGEST_PROMPT_VERSION", "edited")
+        self._adapt(provider, body)
+        assert provider.complete.call_count == 2
+
 
 # --- Provider instantiation ---
 
@@ -0,0 +1,73 @@
+"""Tests for the persistent AI result cache."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from cv_gen.ai.cache import AIResultCache, cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AIResultCache(tmp_path / "ai.sqlite3", ttl=60, max_mb=1)
+
+
+def test_round_trip(cache):
+    cache.put("k", {"markdown": "# CV"})
+    assert cache.get("k") == {"markdown": "# CV"}
+    assert cache.get("missing") is None
+
+
+def test_replace(cache):
+    cache.put("k", {"markdown": "old"})
+    cache.put("k", {"markdown": "new"})
+    assert cache.get("k") == {"markdown": "new"}
+    assert len(cache) == 1
+
+
+def test_expired_entries_are_misses(cache):
+    cache.ttl = 0.01
+    cache.put("k", {"markdown": "# CV"})
+    time.sleep(0.02)
+    assert cache.get("k") is None
+
+
+def test_evicts_least_recently_used_over_size_bound(cache):
+    cache.max_bytes = 300
+    value = {"markdown": "x" * 80}  # ~95 bytes of JSON
+    for key in ("a", "b", "c"):
+        cache.put(key, value)
+        time.sleep(0.001)
+    cache.get("a")  # now more recent than b and c
+    cache.put("d", value)
+    assert cache.get("b") is None
+    assert all(cache.get(key) == value for key in ("a", "c", "d"))
+
+
+def test_value_larger_than_cache_is_not_stored(cache):
+    cache.max_bytes = 10
+    cache.put("k", {"markdown": "x" * 100})
+    assert cache.get("k") is None
+
+
+def test_disabled(tmp_path):
+    cache = AIResultCache(tmp_path / "ai.sqlite3", max_mb=0)
+    cache.put("k", {"markdown": "# CV"})
+    assert cache.get("k") is None
+    assert not (tmp_path / "ai.sqlite3").exists()
+
+
+def test_database_errors_are_misses(tmp_path):
+    cache = AIResultCache(tmp_path)  # a directory, not a database
+    cache.put("k", {"markdown": "# CV"})
+    assert cache.get("k") is None
+
+
+def test_cache_key_covers_every_part():
+    base = cache_key("convert", "sha", "google", "model", "v1")
+    assert base == cache_key("convert", "sha", "google", "model", "v1")
+    assert base != cache_key("convert", "sha", "google", "model", "v2")
+    assert base != cache_key("convert", "sha", "openai", "model", "v1")
+    assert base != cache_key("adapt", "sha", "google", "model", "v1")
@@ -2,17 +2,51 @@
 
 from __future__ import annotations
 
+import asyncio
+import io
+import json
+import threading
+import time
+import zipfile
 from pathlib import Path
+from unittest.mock import patch
 
+import httpx
+import pytest
 from fastapi.testclient import TestClient
 
+from cv_gen import api
+from cv_gen.ai.cache import AIResultCache
 from cv_gen.api import app
+from cv_gen.jobs import JobQueue
+from cv_gen.models import CVData
+from cv_gen.ratelimit import RateLimiter
 
 client = TestClient(app)
 
 SAMPLE_MD = (Path(__file__).resolve().parent.parent / "examples" / "sample_cv.md").read_text(encoding="utf-8")
 
 
+@pytest.fixture(autouse=True)
+def job_queue(tmp_path, monkeypatch):
+    # Keep the app's job workers away from the user's job database.
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(api, "_job_queue", queue)
+    return queue
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limit(monkeypatch):
+    # AI endpoints allow a few calls per minute and IP; the test client
+    # always has the same IP.
+    monkeypatch.setattr(api, "_ai_limiter", RateLimiter(api.AI_RATE_LIMIT, api.AI_RATE_WINDOW))
+
+
+@pytest.fixture(autouse=True)
+def ai_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "_ai_cache", AIResultCache(tmp_path / "ai.sqlite3"))
+
+
 def test_list_templates():
     resp = client.get("/api/templates")
     assert resp.status_code == 200
@@ -22,6 +56,59 @@ def test_list_templates():
     assert data["default"] == "modern"
 
 
+# --- Startup warmup / readiness ---
+
+
+def _wait_for_warmup(test_client):
+    for _ in range(100):
+        resp = test_client.get("/api/health/ready")
+        if resp.json()["status"] != "starting":
+            return resp
+        time.sleep(0.01)
+    return resp
+
+
+def test_ready_after_warmup(monkeypatch):
+    warmed = []
+    monkeypatch.setattr(api, "warm_up", lambda: warmed.append(threading.get_ident()))
+    with TestClient(app) as test_client:
+        resp = _wait_for_warmup(test_client)
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ready", "templates": ["minimal", "modern"]}
+    # Every render thread, each once.
+    assert len(set(warmed)) == len(warmed) == api.RENDER_CONCURRENCY
+
+
+def test_renders_run_on_the_warmed_threads(empty_pdf_cache, monkeypatch):
+    warmed = set()
+    monkeypatch.setattr(api, "warm_up", lambda: warmed.add(threading.get_ident()))
+    rendered = []
+    render = api._render_in_process
+
+    def recording_render(source, template):
+        rendered.append(threading.get_ident())
+        return render(source, template)
+
+    monkeypatch.setattr(api, "_render_in_process", recording_render)
+    with TestClient(app) as test_client:
+        _wait_for_warmup(test_client)
+        for template in ("modern", "minimal"):
+            assert test_client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": template}).status_code == 200
+    assert len(rendered) == 2
+    assert set(rendered) <= warmed
+
+
+def test_not_ready_when_warmup_fails(monkeypatch):
+    def broken():
+        raise RuntimeError("no fonts")
+
+    monkeypatch.setattr(api, "warm_up", broken)
+    with TestClient(app) as test_client:
+        resp = _wait_for_warmup(test_client)
+    assert resp.status_code == 503
+    assert resp.json() == {"status": "failed", "error": "no fonts"}
+
+
 def test_pdf_download():
     resp = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "modern"})
     assert resp.status_code == 200
@@ -38,3 +125,524 @@ def test_pdf_empty_markdown():
     resp = client.post("/api/pdf", json={"markdown": "", "template": "modern"})
     assert resp.status_code == 200
     assert resp.headers["content-type"] == "application/pdf"
+
+
+def test_preview_returns_html():
+    resp = client.post("/api/preview", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/html")
+    assert "<style>" in resp.text
+    assert "Experiencia" in resp.text
+
+
+def test_preview_invalid_template():
+    resp = client.post("/api/preview", json={"markdown": SAMPLE_MD, "template": "nonexistent"})
+    assert resp.status_code == 400
+
+
+# --- PDF cache / ETag ---
+
+
+@pytest.fixture
+def empty_pdf_cache():
+    api._pdf_cache.clear()
+    yield
+    api._pdf_cache.clear()
+
+
+def test_pdf_is_deterministic(empty_pdf_cache):
+    first = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    api._pdf_cache.clear()
+    second = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    assert first.content == second.content
+    assert first.headers["etag"] == second.headers["etag"]
+
+
+def test_pdf_etag_is_strong_and_varies_by_template(empty_pdf_cache):
+    modern = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "modern"})
+    minimal = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    assert modern.headers["etag"].startswith('"')
+    assert modern.headers["etag"] != minimal.headers["etag"]
+
+
+def test_pdf_if_none_match_returns_304(empty_pdf_cache):
+    etag = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "modern"}).headers["etag"]
+    with patch("cv_gen.api.render_pdf") as render:
+        resp = client.post(
+            "/api/pdf",
+            json={"markdown": SAMPLE_MD, "template": "modern"},
+            headers={"If-None-Match": f'"other", {etag}'},
+        )
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+    assert resp.content == b""
+    render.assert_not_called()
+
+
+def test_pdf_served_from_cache(empty_pdf_cache):
+    def fake_render(cv, output, template):
+        output.write(b"%PDF-fake")
+
+    with patch("cv_gen.api.render_pdf", side_effect=fake_render) as render:
+        first = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "modern"})
+        # Line endings and trailing whitespace do not change the cache key.
+        crlf = SAMPLE_MD.replace("\n", "\r\n") + "\n\n"
+        second = client.post("/api/pdf", json={"markdown": crlf, "template": "modern"})
+    assert first.content == second.content == b"%PDF-fake"
+    assert first.headers["etag"] == second.headers["etag"]
+    render.assert_called_once()
+
+
+def test_pdf_dispatches_to_render_pool(empty_pdf_cache, monkeypatch):
+    calls = []
+
+    class FakePool:
+        async def render_pdf(self, markdown, template):
+            calls.append(template)
+            return io.BytesIO(b"%PDF-pool")
+
+    monkeypatch.setattr(api, "_render_pool", FakePool())
+    resp = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    assert resp.status_code == 200
+    assert resp.content == b"%PDF-pool"
+    assert calls == ["minimal"]
+
+
+def test_large_pdf_is_streamed_and_not_cached(empty_pdf_cache, monkeypatch):
+    body = b"%PDF-" + b"x" * 300_000
+
+    class FakePool:
+        async def render_pdf(self, markdown, template):
+            return io.BytesIO(body)
+
+    monkeypatch.setattr(api, "_render_pool", FakePool())
+    monkeypatch.setattr(api, "PDF_SPOOL_BYTES", 100_000)
+    resp = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "modern"})
+    assert resp.status_code == 200
+    assert resp.headers["content-length"] == str(len(body))
+    assert resp.headers["etag"]
+    assert resp.content == body
+    assert len(api._pdf_cache) == 0
+
+
+def test_render_in_process_spools_to_disk(monkeypatch):
+    def fake_render(cv, output, template):
+        output.write(b"%PDF-" + b"x" * 1000)
+
+    monkeypatch.setattr(api, "render_pdf", fake_render)
+    monkeypatch.setattr(api, "PDF_SPOOL_BYTES", 100)
+    with api._render_in_process(SAMPLE_MD, "modern") as pdf_file:
+        assert pdf_file._rolled  # moved from memory to a temporary file
+        pdf_file.seek(0)
+        assert pdf_file.read(5) == b"%PDF-"
+
+
+# --- Admission control ---
+
+
+def test_pdf_rejected_with_503_when_render_queue_is_full(empty_pdf_cache, monkeypatch):
+    from cv_gen.admission import AdmissionQueue
+
+    monkeypatch.setattr(api, "_render_queue", AdmissionQueue("render", 1, max_queue=0, max_wait=7))
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold():
+            async with api._render_queue.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            resp = await async_client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "modern"})
+        release.set()
+        await holder
+        return resp
+
+    resp = asyncio.run(scenario())
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "7"
+    assert resp.json()["detail"].startswith("Server busy")
+
+
+def test_render_queue_metrics_exposed(empty_pdf_cache):
+    client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    text = client.get("/metrics").text
+    assert 'cv_gen_queue_wait_seconds_count{queue="render"}' in text
+    assert 'cv_gen_queue_depth{queue="render"} 0' in text
+
+
+# --- Single flight ---
+
+
+def test_identical_concurrent_pdf_requests_share_one_render(empty_pdf_cache, monkeypatch):
+    renders = []
+
+    def slow_render(cv, output, template):
+        renders.append(template)
+        time.sleep(0.05)
+        output.write(b"%PDF-shared")
+
+    monkeypatch.setattr(api, "render_pdf", slow_render)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            body = {"markdown": SAMPLE_MD, "template": "modern"}
+            return await asyncio.gather(*(async_client.post("/api/pdf", json=body) for _ in range(3)))
+
+    responses = asyncio.run(scenario())
+    assert [resp.content for resp in responses] == [b"%PDF-shared"] * 3
+    assert len({resp.headers["etag"] for resp in responses}) == 1
+    assert renders == ["modern"]
+
+
+def test_large_pdf_is_not_shared(empty_pdf_cache, monkeypatch):
+    monkeypatch.setattr(api, "PDF_SPOOL_BYTES", 4)
+    monkeypatch.setattr(api, "render_pdf", lambda cv, output, template: (time.sleep(0.05), output.write(b"%PDF-big")))
+
+    async def scenario():
+        files = await asyncio.gather(*(api._cached_pdf(SAMPLE_MD, "modern") for _ in range(2)))
+        return [f.read() for f in files]
+
+    assert asyncio.run(scenario()) == [b"%PDF-big", b"%PDF-big"]
+
+
+def test_large_pdf_of_cancelled_request_is_closed(empty_pdf_cache, monkeypatch):
+    rendered = []
+
+    class SlowPool:
+        async def render_pdf(self, source, template):
+            await asyncio.sleep(0.02)
+            rendered.append(io.BytesIO(b"%PDF-big"))
+            return rendered[-1]
+
+    monkeypatch.setattr(api, "PDF_SPOOL_BYTES", 4)
+    monkeypatch.setattr(api, "_render_pool", SlowPool())
+
+    async def scenario():
+        request = asyncio.create_task(api._cached_pdf(SAMPLE_MD, "modern"))
+        await asyncio.sleep(0)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert len(rendered) == 1 and rendered[0].closed
+
+
+# --- Multi-template render ---
+
+
+class RecordingPool:
+    def __init__(self):
+        self.calls = []
+
+    async def render_pdf(self, source, template):
+        self.calls.append((source, template))
+        return io.BytesIO(f"%PDF-{template}".encode())
+
+
+def _zip_entries(resp):
+    with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def test_pdf_templates_parses_once_and_renders_all(empty_pdf_cache, monkeypatch):
+    pool = RecordingPool()
+    monkeypatch.setattr(api, "_render_pool", pool)
+    resp = client.post("/api/pdf/templates", json={"markdown": SAMPLE_MD})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/zip"
+    assert _zip_entries(resp) == {"cv-minimal.pdf": b"%PDF-minimal", "cv-modern.pdf": b"%PDF-modern"}
+    sources = [source for source, _ in pool.calls]
+    assert sorted(template for _, template in pool.calls) == ["minimal", "modern"]
+    assert isinstance(sources[0], CVData) and sources[0] is sources[1]
+
+
+def test_pdf_templates_reuses_pdf_cache(empty_pdf_cache, monkeypatch):
+    pool = RecordingPool()
+    monkeypatch.setattr(api, "_render_pool", pool)
+    single = client.post("/api/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    resp = client.post("/api/pdf/templates", json={"markdown": SAMPLE_MD, "templates": ["minimal", "minimal"]})
+    assert _zip_entries(resp) == {"cv-minimal.pdf": single.content}
+    assert len(pool.calls) == 1
+
+
+def test_pdf_templates_invalid_template():
+    resp = client.post("/api/pdf/templates", json={"markdown": SAMPLE_MD, "templates": ["modern", "nonexistent"]})
+    assert resp.status_code == 400
+
+
+# --- Bulk render ---
+
+
+def _zip_bytes(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buf.getvalue()
+
+
+class BulkPool:
+    async def render_pdf(self, markdown, template):
+        if "BROKEN" in markdown:
+            raise ValueError("layout exploded")
+        return io.BytesIO(f"%PDF-{markdown.splitlines()[0]}".encode())
+
+
+def test_pdf_bulk_renders_files_and_archives(empty_pdf_cache, monkeypatch):
+    monkeypatch.setattr(api, "_render_pool", BulkPool())
+    archive = _zip_bytes({"team/carla.md": "carla", "team/notes.txt": "skip", "__MACOSX/._x.md": "skip"})
+    resp = client.post(
+        "/api/pdf/bulk",
+        files=[
+            ("files", ("ana.md", b"ana", "text/markdown")),
+            ("files", ("ana.markdown", b"ana again", "text/markdown")),
+            ("files", ("team.zip", archive, "application/zip")),
+        ],
+        data={"template": "minimal"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/zip"
+    entries = _zip_entries(resp)
+    assert entries["ana.pdf"] == b"%PDF-ana"
+    assert entries["ana-2.pdf"] == b"%PDF-ana again"
+    assert entries["carla.pdf"] == b"%PDF-carla"
+    results = json.loads(entries["results.json"])
+    assert [r["source"] for r in results] == ["ana.md", "ana.markdown", "team.zip/team/carla.md"]
+    assert all(r["error"] is None for r in results)
+
+
+def test_pdf_bulk_reports_errors_per_item(empty_pdf_cache, monkeypatch):
+    monkeypatch.setattr(api, "_render_pool", BulkPool())
+    resp = client.post(
+        "/api/pdf/bulk",
+        files=[
+            ("files", ("good.md", b"good", "text/markdown")),
+            ("files", ("broken.md", b"BROKEN", "text/markdown")),
+            ("files", ("latin1.md", "Jos\u00e9".encode("latin-1"), "text/markdown")),
+            ("files", ("cv.docx", b"PK", "application/octet-stream")),
+            ("files", ("bad.zip", b"not a zip", "application/zip")),
+        ],
+    )
+    assert resp.status_code == 200
+    entries = _zip_entries(resp)
+    assert entries["good.pdf"] == b"%PDF-good"
+    assert b"layout exploded" in entries["broken.error.txt"]
+    assert b"UTF-8" in entries["latin1.error.txt"]
+    assert b"Unsupported file type" in entries["cv.error.txt"]
+    assert b"Cannot read archive" in entries["bad.error.txt"]
+    errors = {r["source"]: r["error"] for r in json.loads(entries["results.json"])}
+    assert errors["good.md"] is None
+    assert errors["broken.md"] == "layout exploded"
+
+
+def test_pdf_bulk_too_many_items(monkeypatch):
+    monkeypatch.setattr(api, "BULK_MAX_ITEMS", 1)
+    resp = client.post(
+        "/api/pdf/bulk",
+        files=[("files", ("a.md", b"a", "text/markdown")), ("files", ("b.md", b"b", "text/markdown"))],
+    )
+    assert resp.status_code == 400
+
+
+def test_pdf_bulk_archive_with_too_many_members(monkeypatch):
+    monkeypatch.setattr(api, "BULK_MAX_ITEMS", 5)
+    archive = _zip_bytes({f"cvs/cv{i}.md": "cv" for i in range(50)})
+    resp = client.post(
+        "/api/pdf/bulk",
+        files=[("files", ("a.md", b"a", "text/markdown")), ("files", ("cvs.zip", archive, "application/zip"))],
+    )
+    assert resp.status_code == 400
+    assert "more than 4 Markdown files" in resp.json()["detail"]
+
+
+def test_pdf_bulk_rejects_oversized_upload_before_reading_it(monkeypatch):
+    from starlette.datastructures import UploadFile
+
+    monkeypatch.setattr(api, "BULK_MAX_UPLOAD_BYTES", 1000)
+    reads = []
+    read = UploadFile.read
+
+    async def recording_read(self, size=-1):
+        reads.append((self.filename, size))
+        return await read(self, size)
+
+    monkeypatch.setattr(UploadFile, "read", recording_read)
+    resp = client.post(
+        "/api/pdf/bulk",
+        files=[("files", ("a.md", b"a" * 600, "text/markdown")), ("files", ("b.md", b"b" * 600, "text/markdown"))],
+    )
+    assert resp.status_code == 400
+    assert "Upload too large" in resp.json()["detail"]
+    assert reads == [("a.md", 1001)]
+
+
+def test_pdf_bulk_invalid_template():
+    resp = client.post("/api/pdf/bulk", files=[("files", ("a.md", b"a", "text/markdown"))], data={"template": "nope"})
+    assert resp.status_code == 400
+
+
+def test_bulk_zip_streams_entries_as_they_complete(empty_pdf_cache, monkeypatch):
+    async def scenario():
+        release = asyncio.Event()
+
+        class SlowPool:
+            async def render_pdf(self, markdown, template):
+                if markdown == "slow":
+                    await release.wait()
+                return io.BytesIO(b"%PDF-" + markdown.encode())
+
+        monkeypatch.setattr(api, "_render_pool", SlowPool())
+        items = [api._BulkItem("slow.md", "slow", markdown="slow"), api._BulkItem("fast.md", "fast", markdown="fast")]
+        stream = api._bulk_zip(items, "modern")
+        head = b""
+        while b"fast.pdf" not in head:
+            head += await stream.__anext__()
+        assert b"slow.pdf" not in head  # sent before the slow render finished
+        release.set()
+        return head + b"".join([chunk async for chunk in stream])
+
+    with zipfile.ZipFile(io.BytesIO(asyncio.run(scenario()))) as zf:
+        assert zf.read("fast.pdf") == b"%PDF-fast"
+        assert zf.read("slow.pdf") == b"%PDF-slow"
+
+
+# --- Background jobs ---
+
+
+@pytest.fixture
+def job_client(monkeypatch):
+    monkeypatch.setattr(api, "warm_up", lambda: None)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_job_workers_start_with_the_first_job(job_client, job_queue):
+    assert not job_queue.path.exists()
+    assert api._job_workers == []
+    url = job_client.post("/api/jobs/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"}).headers["location"]
+    assert len(api._job_workers) == api.JOB_WORKERS
+    assert _wait_for_job(job_client, url)["status"] == "done"
+
+
+def test_job_workers_start_at_startup_for_existing_queue(job_queue, monkeypatch):
+    monkeypatch.setattr(api, "warm_up", lambda: None)
+    job = job_queue.submit("pdf", {"markdown": SAMPLE_MD, "template": "minimal"})
+    with TestClient(app) as test_client:
+        assert len(api._job_workers) == api.JOB_WORKERS
+        assert _wait_for_job(test_client, f"/api/jobs/{job.id}")["status"] == "done"
+    assert api._job_workers == []
+
+
+def _wait_for_job(test_client, url):
+    for _ in range(500):
+        job = test_client.get(url).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    return job
+
+
+def test_pdf_job(job_client):
+    resp = job_client.post("/api/jobs/pdf", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "queued"
+    url = resp.headers["location"]
+    assert url == f"/api/jobs/{resp.json()['id']}"
+
+    assert _wait_for_job(job_client, url)["status"] == "done"
+    result = job_client.get(f"{url}/result")
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "application/pdf"
+    assert result.content[:5] == b"%PDF-"
+
+
+def test_pdf_job_invalid_template(job_client):
+    resp = job_client.post("/api/jobs/pdf", json={"markdown": SAMPLE_MD, "template": "nonexistent"})
+    assert resp.status_code == 400
+
+
+def test_job_events_stream_until_done(job_client):
+    url = job_client.post("/api/jobs/pdf", json={"markdown": SAMPLE_MD, "template": "modern"}).headers["location"]
+    with job_client.stream("GET", f"{url}/events") as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        body = "".join(resp.iter_text())
+    statuses = [json.loads(line[len("data: ") :])["status"] for line in body.splitlines() if line.startswith("data: ")]
+    assert statuses[-1] == "done"
+    assert len(statuses) == len(set(statuses))  # one event per change
+
+
+def test_convert_job_failure(job_client, monkeypatch):
+    monkeypatch.setenv("AI_PROVIDER", "google")
+    monkeypatch.setenv("AI_API_KEY", "key")
+    monkeypatch.setenv("AI_MODEL", "model")
+    with patch("cv_gen.api.get_provider") as get_provider:
+        get_provider.return_value.complete_with_pdf.side_effect = RuntimeError("quota exceeded")
+        resp = job_client.post("/api/jobs/convert", files={"file": ("cv.pdf", b"%PDF-1.4 fake", "application/pdf")})
+        assert resp.status_code == 202
+        job = _wait_for_job(job_client, resp.headers["location"])
+    assert job["status"] == "failed"
+    assert job["error"]
+    result = job_client.get(f"{resp.headers['location']}/result")
+    assert result.status_code == 409
+    assert result.json()["detail"].startswith("Job failed")
+
+
+def test_convert_job_validates_upload(job_client, monkeypatch):
+    monkeypatch.setenv("AI_PROVIDER", "google")
+    monkeypatch.setenv("AI_API_KEY", "key")
+    monkeypatch.setenv("AI_MODEL", "model")
+    resp = job_client.post("/api/jobs/convert", files={"file": ("cv.txt", b"text", "text/plain")})
+    assert resp.status_code == 400
+
+
+def test_queued_job_result_is_409(monkeypatch):
+    monkeypatch.setattr(api, "warm_up", lambda: None)
+    monkeypatch.setattr(api, "JOB_WORKERS", 0)
+    with TestClient(app) as test_client:
+        url = test_client.post("/api/jobs/pdf", json={"markdown": SAMPLE_MD}).headers["location"]
+        resp = test_client.get(f"{url}/result")
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Job is queued"
+
+
+def test_unknown_job_is_404():
+    assert client.get("/api/jobs/does-not-exist").status_code == 404
+    assert client.get("/api/jobs/does-not-exist/events").status_code == 404
+    assert client.get("/api/jobs/does-not-exist/result").status_code == 404
+
+
+def test_job_submitted_elsewhere_is_visible(job_queue):
+    # Another process sharing the database file submitted this one.
+    job = JobQueue(job_queue.path).submit("pdf", {"markdown": SAMPLE_MD, "template": "modern"})
+    assert client.get(f"/api/jobs/{job.id}").json()["status"] == "queued"
+
+
+# --- Server-Timing / metrics ---
+
+
+def test_preview_reports_server_timing():
+    resp = client.post("/api/preview", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    stages = [entry.split(";")[0] for entry in resp.headers["server-timing"].split(", ")]
+    assert {"parse", "jinja"} <= set(stages)
+    assert stages[-1] == "total"
+
+
+def test_metrics_endpoint_exposes_histograms():
+    client.post("/api/preview", json={"markdown": SAMPLE_MD, "template": "minimal"})
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'cv_gen_stage_seconds_count{stage="jinja"}' in resp.text
+    assert 'route="/api/preview",status="200"' in resp.text
+
+
+def test_unmatched_routes_share_one_label():
+    client.get("/api/does-not-exist-123")
+    assert "/api/does-not-exist-123" not in client.get("/metrics").text
@@ -0,0 +1,117 @@
+"""Tests for the local asset store and offline URL fetcher."""
+
+from __future__ import annotations
+
+import pytest
+
+from cv_gen.assets import AssetFetcher, AssetStore, find_remote_urls, inline_css_assets
+from cv_gen.renderer import TEMPLATES_DIR
+
+FONTS_CSS_URL = "https://fonts.googleapis.com/css2?family=Fira+Sans:wght@0,300;0,400&display=swap"
+
+
+def test_find_remote_urls():
+    css = (
+        f"@import url('{FONTS_CSS_URL}');\n"
+        '@import "https://example.com/extra.css";\n'
+        "@font-face { src: url(https://fonts.gstatic.com/s/fira.ttf) format('truetype'); }\n"
+        "body { background: url('local.png'); }\n"
+    )
+    assert find_remote_urls(css) == [
+        FONTS_CSS_URL,
+        "https://example.com/extra.css",
+        "https://fonts.gstatic.com/s/fira.ttf",
+    ]
+
+
+def test_templates_only_reference_remote_fonts():
+    for template_dir in TEMPLATES_DIR.iterdir():
+        css = (template_dir / "style.css").read_text(encoding="utf-8")
+        for url in find_remote_urls(css):
+            assert url.startswith("https://fonts.googleapis.com/")
+
+
+def test_store_roundtrip(tmp_path):
+    store = AssetStore(tmp_path)
+    assert store.get(FONTS_CSS_URL) is None
+    store.put(FONTS_CSS_URL, b"@font-face {}", "text/css")
+    assert store.get(FONTS_CSS_URL) == (b"@font-face {}", "text/css")
+    # A fresh store (new process) reads the asset back from disk.
+    assert AssetStore(tmp_path).get(FONTS_CSS_URL) == (b"@font-face {}", "text/css")
+
+
+def test_fetcher_serves_stored_assets(tmp_path):
+    store = AssetStore(tmp_path)
+    store.put(FONTS_CSS_URL, b"@font-face {}", "text/css")
+    response = AssetFetcher(store).fetch(FONTS_CSS_URL)
+    assert response.read() == b"@font-face {}"
+    assert response.content_type == "text/css"
+
+
+def test_fetcher_refuses_unknown_remote_urls(tmp_path):
+    with pytest.raises(ValueError, match="not in the local asset store"):
+        AssetFetcher(AssetStore(tmp_path)).fetch("https://example.com/font.ttf")
+
+
+def test_fetcher_serves_local_files_from_memory(tmp_path):
+    asset = tmp_path / "logo.svg"
+    asset.write_bytes(b"<svg/>")
+    fetcher = AssetFetcher(AssetStore(tmp_path / "store"), local_roots=[tmp_path])
+    assert fetcher.fetch(asset.as_uri()).read() == b"<svg/>"
+    assert fetcher.fetch(asset.as_uri()).content_type == "image/svg+xml"
+
+
+def test_prefetch_follows_css_imports(tmp_path, monkeypatch):
+    font_url = "https://fonts.gstatic.com/s/fira.ttf"
+    responses = {
+        FONTS_CSS_URL: (f"@font-face {{ src: url({font_url}); }}".encode(), "text/css"),
+        font_url: (b"\x00\x01font", "font/ttf"),
+    }
+
+    class FakeResponse:
+        def __init__(self, url):
+            self._body, self.content_type = responses[url]
+
+        def read(self):
+            return self._body
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr("weasyprint.urls.URLFetcher.fetch", lambda self, url, headers=None: FakeResponse(url))
+    store = AssetStore(tmp_path)
+    fetched = store.prefetch([f"@import url('{FONTS_CSS_URL}');"])
+    assert fetched == [FONTS_CSS_URL, font_url]
+    assert store.get(font_url) == (b"\x00\x01font", "font/ttf")
+    # Already stored assets are not downloaded again.
+    assert store.prefetch([f"@import url('{FONTS_CSS_URL}');"]) == []
+
+
+def test_fetcher_serves_cached_photo(tmp_path):
+    from PIL import Image
+
+    photo_path = tmp_path / "photo.png"
+    Image.new("RGB", (2000, 2000), "red").save(photo_path)
+    fetcher = AssetFetcher(AssetStore(tmp_path / "store"), photo_url=photo_path.as_uri())
+    response = fetcher.fetch(photo_path.as_uri())
+    assert response.content_type == "image/jpeg"
+    assert len(response.read()) < photo_path.stat().st_size
+
+
+def test_inline_css_assets(tmp_path):
+    font_url = "https://fonts.gstatic.com/s/fira.ttf"
+    store = AssetStore(tmp_path / "store")
+    store.put(FONTS_CSS_URL, f"@font-face {{ src: url({font_url}); }}".encode(), "text/css")
+    store.put(font_url, b"font", "font/ttf")
+    (tmp_path / "bg.svg").write_bytes(b"<svg/>")
+    css = (
+        f"@import url('{FONTS_CSS_URL}');\n"
+        "body { background: url('bg.svg'); }\n"
+        "h1 { background: url(https://example.com/missing.png); }\n"
+    )
+    inlined = inline_css_assets(css, tmp_path.as_uri() + "/", AssetFetcher(store, local_roots=[tmp_path]))
+    assert "@import" not in inlined
+    assert 'url("data:font/ttf;base64,Zm9udA==")' in inlined
+    assert 'url("data:image/svg+xml;base64,PHN2Zy8+")' in inlined
+    # Assets that cannot be served offline are left for the browser.
+    assert "url(https://example.com/missing.png)" in inlined
@@ -0,0 +1,80 @@
+"""Tests for batch input helpers."""
+
+from __future__ import annotations
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from cv_gen.batch import ArchiveLimitError, is_archive, is_markdown, read_archive
+
+
+def _tar_gz(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tf.addfile(info, io.BytesIO(content))
+    return buf.getvalue()
+
+
+def test_is_markdown():
+    assert is_markdown("cvs/ana.md")
+    assert is_markdown("ANA.MARKDOWN")
+    assert not is_markdown("ana.txt")
+    assert not is_markdown(".hidden.md")
+    assert not is_markdown("__MACOSX/cvs/._ana.md")
+
+
+def test_is_archive():
+    assert is_archive("cvs.zip")
+    assert is_archive("cvs.TAR.GZ")
+    assert is_archive("cvs.tgz")
+    assert not is_archive("cv.md")
+
+
+def test_read_tar_gz():
+    data = _tar_gz({"cvs/ana.md": b"ana", "cvs/photo.jpg": b"jpg"})
+    assert read_archive("cvs.tar.gz", data, max_member_bytes=100) == [("cvs/ana.md", b"ana")]
+
+
+def test_read_zip_skips_oversized_members():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("small.md", "ok")
+        zf.writestr("huge.md", "x" * 10_000)
+    members = read_archive("cvs.zip", buf.getvalue(), max_member_bytes=100)
+    assert members == [("small.md", b"ok"), ("huge.md", None)]
+
+
+@pytest.mark.parametrize("name", ["cvs.zip", "cvs.tar", "cvs.tgz"])
+def test_read_corrupt_archive(name):
+    with pytest.raises(ValueError, match="Cannot read archive"):
+        read_archive(name, b"garbage", max_member_bytes=100)
+
+
+def test_read_archive_stops_at_member_limit():
+    data = _tar_gz({f"cv{i}.md": b"cv" for i in range(10)})
+    assert len(read_archive("cvs.tgz", data, max_member_bytes=100, max_members=10)) == 10
+    with pytest.raises(ArchiveLimitError, match="more than 9 Markdown files"):
+        read_archive("cvs.tgz", data, max_member_bytes=100, max_members=9)
+
+
+def test_read_archive_checks_declared_sizes_before_decompressing(monkeypatch):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(3):
+            zf.writestr(f"cv{i}.md", "x" * 1000)  # compresses to a few bytes each
+    reads = []
+    original = zipfile.ZipFile.read
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda self, info: reads.append(info) or original(self, info))
+    with pytest.raises(ArchiveLimitError, match="expands to more than 2500 bytes"):
+        read_archive("cvs.zip", buf.getvalue(), max_member_bytes=1000, max_total_bytes=2500)
+    assert len(reads) == 2
+
+
+def test_archive_limit_is_a_value_error():
+    assert issubclass(ArchiveLimitError, ValueError)
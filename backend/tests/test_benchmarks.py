@@ -0,0 +1,64 @@
+"""Tests for the benchmark helpers (synthetic CVs and result comparison)."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from benchmarks import compare, run
+from benchmarks.synthetic import CVSpec, synthetic_cv
+from cv_gen.parser import parse_cv
+
+
+@pytest.mark.parametrize("language", ["es", "en", "fr", "de"])
+def test_synthetic_cv_section_types(language):
+    cv = parse_cv(synthetic_cv(CVSpec(sections=6, bullets=2, language=language)))
+    assert [s.section_type for s in cv.sections] == [
+        "profile", "experience", "education", "skills", "languages", "projects",
+    ]
+
+
+def test_synthetic_cv_shape():
+    spec = CVSpec(sections=10, bullets=4, tables=3, photo=True)
+    markdown = synthetic_cv(spec, photo_path="photo.jpg")
+    cv = parse_cv(markdown)
+    assert len(cv.sections) == 10
+    assert cv.contact.photo == "photo.jpg"
+    assert sum(s.content_html.count("<table>") for s in cv.sections) == 3
+    assert cv.sections[1].content_html.count("<li>") == 4
+    # Deterministic for a given seed.
+    assert synthetic_cv(spec, photo_path="photo.jpg") == markdown
+
+
+def test_run_no_pdf_skips_weasyprint_stages(capsys):
+    run.main(["--no-pdf", "-n", "1", "--case", "small", "--template", "minimal"])
+    stages = {line.split()[2] for line in capsys.readouterr().out.splitlines()[1:]}
+    assert stages == {"parse", "parse_cached", "html"}
+
+
+def _results(**medians):
+    return {"results": [
+        {"case": "small", "template": "modern", "stage": stage, "median_ms": ms}
+        for stage, ms in medians.items()
+    ]}
+
+
+def test_compare_flags_regressions():
+    base = _results(parse=10.0, html=0.2, pdf=100.0)
+    new = _results(parse=10.5, html=0.6, pdf=130.0)
+    changes = {c.stage: c for c in compare.compare(base, new, threshold=0.10, min_delta_ms=0.5)}
+    assert not changes["parse"].regressed  # within the threshold
+    assert not changes["html"].regressed  # 3x slower but below the absolute floor
+    assert changes["pdf"].regressed
+    assert changes["pdf"].ratio == pytest.approx(0.30)
+
+
+def test_compare_exit_status(tmp_path, capsys):
+    base, new = tmp_path / "base.json", tmp_path / "new.json"
+    base.write_text(json.dumps(_results(pdf=100.0)))
+    new.write_text(json.dumps(_results(pdf=100.0)))
+    assert compare.main([str(base), str(new)]) == 0
+    new.write_text(json.dumps(_results(pdf=150.0)))
+    assert compare.main([str(base), str(new)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
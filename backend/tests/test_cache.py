@@ -0,0 +1,55 @@
+"""Tests for the in-process caches."""
+
+from cv_gen.cache import LRUCache
+
+
+def test_get_and_put():
+    cache = LRUCache(max_bytes=100)
+    assert cache.get("a") is None
+    cache.put("a", b"123")
+    assert cache.get("a") == b"123"
+    assert cache.size == 3
+    assert len(cache) == 1
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", b"1234")
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.size == 8
+
+
+def test_replacing_key_updates_size():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", b"1234")
+    cache.put("a", b"12")
+    assert cache.size == 2
+    assert len(cache) == 1
+
+
+def test_skips_oversized_items():
+    cache = LRUCache(max_bytes=100, max_item_bytes=5)
+    cache.put("small", b"123")
+    cache.put("big", b"123456")
+    assert "small" in cache
+    assert "big" not in cache
+
+
+def test_custom_sizeof():
+    cache = LRUCache(max_bytes=2, sizeof=lambda _: 1)
+    for key in "abc":
+        cache.put(key, object())
+    assert len(cache) == 2
+
+
+def test_clear():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", b"1")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
@@ -65,3 +65,173 @@ Hello world.
     content = out_file.read_text()
     assert "Test" in content
     assert "Hello world" in content
+
+
+def test_fetch_assets(monkeypatch):
+    seen = []
+
+    def fake_prefetch(self, stylesheets):
+        seen.extend(stylesheets)
+        return ["https://fonts.googleapis.com/css2"]
+
+    monkeypatch.setattr("cv_gen.assets.AssetStore.prefetch", fake_prefetch)
+    runner = CliRunner()
+    result = runner.invoke(main, ["--fetch-assets"])
+    assert result.exit_code == 0
+    assert "Fetched 1 asset(s)" in result.output
+    assert any("fonts.googleapis.com" in css for css in seen)
+
+
+def test_fetch_assets_offline(monkeypatch):
+    def offline(self, stylesheets):
+        raise OSError("Name or service not known")
+
+    monkeypatch.setattr("cv_gen.assets.AssetStore.prefetch", offline)
+    result = CliRunner().invoke(main, ["--fetch-assets"])
+    assert result.exit_code == 1
+    assert "Could not fetch template assets: Name or service not known" in result.output
+
+
+# --- Batch mode ---
+
+
+def _write_cv(path, name):
+    path.write_text(f"---\nname: {name}\ntitle: Dev\n---\n\n## Perfil\nHello.\n", encoding="utf-8")
+
+
+def test_batch_renders_cross_product(tmp_path):
+    cvs = tmp_path / "cvs"
+    cvs.mkdir()
+    _write_cv(cvs / "ana.md", "Ana")
+    _write_cv(cvs / "luis.md", "Luis")
+    out = tmp_path / "out"
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["batch", str(cvs), "-t", "modern", "-t", "minimal", "-o", str(out), "-j", "2"])
+    assert result.exit_code == 0, result.output
+    for name in ("ana", "luis"):
+        for template in ("modern", "minimal"):
+            assert (out / f"{name}-{template}.pdf").stat().st_size > 0
+    assert "Rendered 4, skipped 0, failed 0" in result.output
+    assert "parse" in result.output
+
+
+def test_batch_skips_unchanged(tmp_path):
+    _write_cv(tmp_path / "ana.md", "Ana")
+    _write_cv(tmp_path / "luis.md", "Luis")
+    out = tmp_path / "out"
+    args = ["batch", str(tmp_path / "*.md"), "-t", "minimal", "-o", str(out), "-j", "1"]
+
+    runner = CliRunner()
+    assert runner.invoke(main, args).exit_code == 0
+
+    _write_cv(tmp_path / "luis.md", "Luis Changed")
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert "Rendered 1, skipped 1, failed 0" in result.output
+
+    result = runner.invoke(main, [*args, "--force"])
+    assert "Rendered 2, skipped 0, failed 0" in result.output
+
+
+def test_batch_same_stem_in_different_directories(tmp_path):
+    for folder, name in (("a", "Ana"), ("b", "Bea")):
+        (tmp_path / folder).mkdir()
+        _write_cv(tmp_path / folder / "cv.md", name)
+    out = tmp_path / "out"
+    args = ["batch", str(tmp_path / "a"), str(tmp_path / "b"), "-t", "minimal", "-o", str(out), "-j", "1"]
+
+    runner = CliRunner()
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert "Rendered 2, skipped 0, failed 0" in result.output
+    assert (out / "cv-minimal.pdf").stat().st_size > 0
+    assert (out / "cv-2-minimal.pdf").stat().st_size > 0
+
+    result = runner.invoke(main, args)
+    assert "Rendered 0, skipped 2, failed 0" in result.output
+
+
+def test_batch_unknown_template(tmp_path):
+    _write_cv(tmp_path / "ana.md", "Ana")
+    runner = CliRunner()
+    result = runner.invoke(main, ["batch", str(tmp_path), "-t", "nonexistent"])
+    assert result.exit_code != 0
+    assert "Unknown template" in result.output
+
+
+def test_batch_no_inputs(tmp_path):
+    runner = CliRunner()
+    result = runner.invoke(main, ["batch", str(tmp_path / "*.md")])
+    assert result.exit_code != 0
+
+
+def test_watch_rerenders_on_change(tmp_path, monkeypatch):
+    md_file = tmp_path / "cv.md"
+    _write_cv(md_file, "Ana")
+    out_file = tmp_path / "cv.html"
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 1:
+            _write_cv(md_file, "Ana Updated")
+        elif len(sleeps) == 2:
+            pass  # no change: no re-render
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr("cv_gen.cli.time.sleep", fake_sleep)
+    runner = CliRunner()
+    result = runner.invoke(main, [str(md_file), "--html", "-o", str(out_file), "--watch"])
+    assert result.exit_code == 0, result.output
+    assert result.output.count("HTML exported") == 2
+    assert "Ana Updated" in out_file.read_text()
+
+
+def test_render_all_templates(tmp_path):
+    cv = tmp_path / "ana.md"
+    _write_cv(cv, "Ana")
+    out = tmp_path / "out"
+
+    runner = CliRunner()
+    result = runner.invoke(main, [str(cv), "--all-templates", "-o", str(out)])
+    assert result.exit_code == 0, result.output
+    assert sorted(p.name for p in out.iterdir()) == ["ana-minimal.pdf", "ana-modern.pdf"]
+    assert "Rendered 2, skipped 0, failed 0" in result.output
+
+
+def test_render_several_templates_rejects_html(tmp_path):
+    cv = tmp_path / "ana.md"
+    _write_cv(cv, "Ana")
+    runner = CliRunner()
+    result = runner.invoke(main, [str(cv), "-t", "modern", "-t", "minimal", "--html"])
+    assert result.exit_code != 0
+    assert "single template" in result.output
+
+
+# --- Profiling ---
+
+
+def test_profile_writes_report_and_stacks(tmp_path):
+    cv = tmp_path / "cv.md"
+    _write_cv(cv, "Ana")
+    stacks = tmp_path / "stacks.txt"
+
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["profile", str(cv), "-t", "minimal", "-n", "1", "--no-memory", "--collapsed", str(stacks)]
+    )
+    assert result.exit_code == 0, result.output
+    assert "=== minimal (1 runs) ===" in result.output
+    assert "--- cProfile: layout" in result.output
+    assert stacks.exists()
+
+
+def test_profile_unknown_template(tmp_path):
+    cv = tmp_path / "cv.md"
+    _write_cv(cv, "Ana")
+    runner = CliRunner()
+    result = runner.invoke(main, ["profile", str(cv), "-t", "nope"])
+    assert result.exit_code != 0
+    assert "Unknown template" in result.output
@@ -0,0 +1,48 @@
+"""Import-time budget: starting the CLI or the API must stay cheap."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+# Loaded on first use only (PDF render, Markdown parse, DOCX extraction).
+HEAVY_PACKAGES = {"weasyprint", "markdown", "frontmatter", "docx", "PIL", "yaml"}
+
+# Cumulative import time in microseconds, generous enough for slow CI machines.
+BUDGETS_US = {
+    "cv_gen.cli": 500_000,
+    "cv_gen.api": 1_500_000,
+}
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Return the cumulative import time of every module loaded by ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_US))
+def test_startup_skips_heavy_imports(module):
+    loaded = {name.split(".")[0] for name in _import_times(module)}
+    assert not loaded & HEAVY_PACKAGES
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_US))
+def test_startup_import_budget(module):
+    # Best of three runs to smooth out noise from a busy machine.
+    best = min(_import_times(module)[module] for _ in range(3))
+    assert best < BUDGETS_US[module], f"importing {module} took {best / 1000:.0f} ms"
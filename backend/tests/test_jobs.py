@@ -0,0 +1,152 @@
+"""Tests for the SQLite-backed job queue."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cv_gen.jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue, run_worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "jobs.sqlite3", ttl=60, lease=30)
+
+
+def test_submit_claim_complete(queue):
+    job = queue.submit("pdf", {"template": "modern"}, b"input")
+    assert queue.get(job.id).status == QUEUED
+
+    claimed, data = queue.claim(["pdf"], "w1")
+    assert claimed.id == job.id
+    assert claimed.params == {"template": "modern"}
+    assert data == b"input"
+    assert queue.get(job.id).status == RUNNING
+    assert queue.claim(["pdf"], "w2") is None
+
+    assert queue.complete(job.id, "w1", b"%PDF", "application/pdf")
+    finished = queue.get(job.id)
+    assert finished.status == DONE
+    assert finished.expires == pytest.approx(finished.finished + 60)
+    assert queue.result(job.id) == (b"%PDF", "application/pdf")
+
+
+def test_claim_oldest_of_requested_kinds(queue):
+    first = queue.submit("convert", {})
+    queue.submit("pdf", {})
+    assert queue.claim(["pdf"], "w1")[0].kind == "pdf"
+    assert queue.claim(["pdf", "convert"], "w1")[0].id == first.id
+
+
+def test_fail(queue):
+    job = queue.submit("pdf", {})
+    queue.claim(["pdf"], "w1")
+    assert queue.fail(job.id, "w1", "boom")
+    assert queue.get(job.id).status == FAILED
+    assert queue.get(job.id).error == "boom"
+    assert queue.result(job.id) is None
+
+
+def test_release_requeues(queue):
+    job = queue.submit("pdf", {})
+    queue.claim(["pdf"], "w1")
+    queue.release(job.id, "w1")
+    assert queue.get(job.id).status == QUEUED
+    assert queue.claim(["pdf"], "w2")[0].attempts == 1
+
+
+def test_lost_job_is_claimed_again(queue):
+    queue.lease = 0
+    job = queue.submit("pdf", {})
+    queue.claim(["pdf"], "dead-worker")
+    time.sleep(0.01)
+    reclaimed, _ = queue.claim(["pdf"], "w2")
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+    # The worker that lost the lease cannot overwrite the new owner's result.
+    assert not queue.complete(job.id, "dead-worker", b"stale", "application/pdf")
+    assert queue.complete(job.id, "w2", b"fresh", "application/pdf")
+    assert queue.result(job.id) == (b"fresh", "application/pdf")
+
+
+def test_job_lost_too_often_fails(queue):
+    queue.lease = 0
+    queue.max_attempts = 1
+    job = queue.submit("pdf", {})
+    queue.claim(["pdf"], "dead-worker")
+    time.sleep(0.01)
+    assert queue.claim(["pdf"], "w2") is None
+    assert queue.get(job.id).status == FAILED
+    assert queue.get(job.id).error == "Worker lost"
+
+
+def test_expired_jobs_disappear(queue):
+    queue.ttl = 0
+    job = queue.submit("pdf", {})
+    queue.claim(["pdf"], "w1")
+    queue.complete(job.id, "w1", b"%PDF", "application/pdf")
+    assert queue.get(job.id) is None
+    assert queue.result(job.id) is None
+    assert queue.purge_expired() == 1
+
+
+def test_queues_on_one_file_never_share_a_job(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    ids = {JobQueue(path).submit("pdf", {}).id for _ in range(40)}
+    claimed: list[str] = []
+
+    def work(name):
+        queue = JobQueue(path)  # its own connection, like another process
+        while (result := queue.claim(["pdf"], name)) is not None:
+            claimed.append(result[0].id)
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+# --- Workers ---
+
+
+def _run(queue, handlers, until):
+    async def scenario():
+        worker = asyncio.create_task(run_worker(queue, handlers, poll_interval=0.01))
+        for _ in range(500):
+            if until():
+                break
+            await asyncio.sleep(0.01)
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_worker_runs_jobs(queue):
+    async def render(params, data):
+        if params.get("fail"):
+            raise ValueError("bad CV")
+        return data.upper(), "text/plain"
+
+    good = queue.submit("pdf", {}, b"cv")
+    bad = queue.submit("pdf", {"fail": True})
+    _run(queue, {"pdf": render}, lambda: queue.get(bad.id).status == FAILED)
+    assert queue.result(good.id) == (b"CV", "text/plain")
+    assert queue.get(bad.id).error == "bad CV"
+
+
+def test_stopped_worker_requeues_its_job(queue):
+    started = threading.Event()
+
+    async def slow(params, data):
+        started.set()
+        await asyncio.sleep(60)
+
+    job = queue.submit("pdf", {})
+    _run(queue, {"pdf": slow}, started.is_set)
+    assert queue.get(job.id).status == QUEUED
@@ -0,0 +1,128 @@
+"""Memory budgets for the render pipeline.
+
+Peak memory is measured with tracemalloc (Python allocations, which is
+where WeasyPrint's box tree and layout live).  Leaks are checked both with
+tracemalloc and with the process RSS, which also sees native allocations
+(Pango, HarfBuzz, fontconfig) that tracemalloc cannot.
+"""
+
+from __future__ import annotations
+
+import gc
+import io
+import tracemalloc
+from collections.abc import Callable
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import CVSpec, synthetic_cv
+from cv_gen import api
+from cv_gen.parser import parse_cv
+from cv_gen.pool import current_rss
+from cv_gen.renderer import render_pdf
+
+MB = 1024 * 1024
+
+# CVs of increasing size; "large" stays under the API's 20k character limit.
+SIZES = {
+    "small": CVSpec(sections=4, bullets=3),
+    "medium": CVSpec(sections=10, bullets=5, tables=1),
+    "large": CVSpec(sections=20, bullets=6, tables=3),
+}
+
+# Peak traced memory of one render, in MB.
+PEAK_BUDGETS_MB = {"small": 64, "medium": 128, "large": 192}
+
+# Growth allowed over LEAK_RUNS renders once caches are warm.
+LEAK_RUNS = 10
+LEAK_TRACED_BYTES = 512 * 1024
+LEAK_RSS_BYTES = 32 * MB
+
+
+def _peak_traced(fn: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _growth(fn: Callable[[], object], *, warmup: int = 3, runs: int = LEAK_RUNS) -> tuple[int, int]:
+    """Return the (traced, RSS) growth in bytes over ``runs`` calls after ``warmup`` calls."""
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    rss_before = current_rss()
+    tracemalloc.start()
+    try:
+        for _ in range(runs):
+            fn()
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return traced, current_rss() - rss_before
+
+
+def _render(markdown: str, template: str = "modern") -> Callable[[], None]:
+    return lambda: render_pdf(parse_cv(markdown), io.BytesIO(), template)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(api.app)
+
+
+def _api_render(client: TestClient, markdown: str, template: str = "modern") -> Callable[[], None]:
+    def post() -> None:
+        api._pdf_cache.clear()  # render every time
+        resp = client.post("/api/pdf", json={"markdown": markdown, "template": template})
+        assert resp.status_code == 200
+
+    return post
+
+
+# --- Peak memory ---
+
+
+@pytest.mark.parametrize("size", sorted(SIZES))
+def test_render_pdf_peak_memory(size):
+    markdown = synthetic_cv(SIZES[size])
+    _render(markdown)()  # compile the template and load fonts outside the measurement
+    peak = _peak_traced(_render(markdown))
+    assert peak < PEAK_BUDGETS_MB[size] * MB, f"{size}: peak {peak / MB:.1f} MB"
+
+
+@pytest.mark.parametrize("size", sorted(SIZES))
+def test_api_pdf_peak_memory(client, size):
+    markdown = synthetic_cv(SIZES[size])
+    _api_render(client, markdown)()
+    peak = _peak_traced(_api_render(client, markdown))
+    assert peak < PEAK_BUDGETS_MB[size] * MB, f"{size}: peak {peak / MB:.1f} MB"
+
+
+# --- Leaks ---
+
+
+@pytest.mark.parametrize("template", ["modern", "minimal"])
+def test_repeated_render_pdf_does_not_grow(template):
+    traced, rss = _growth(_render(synthetic_cv(SIZES["medium"]), template))
+    assert traced < LEAK_TRACED_BYTES, f"traced memory grew {traced / 1024:.0f} KiB over {LEAK_RUNS} renders"
+    assert rss < LEAK_RSS_BYTES, f"RSS grew {rss / MB:.1f} MB over {LEAK_RUNS} renders"
+
+
+def test_repeated_api_pdf_does_not_grow(client):
+    traced, rss = _growth(_api_render(client, synthetic_cv(SIZES["medium"])))
+    assert traced < LEAK_TRACED_BYTES, f"traced memory grew {traced / 1024:.0f} KiB over {LEAK_RUNS} requests"
+    assert rss < LEAK_RSS_BYTES, f"RSS grew {rss / MB:.1f} MB over {LEAK_RUNS} requests"
+
+
+def test_distinct_cvs_retain_little_memory():
+    # Every distinct CV stays in the (bounded) parser caches: that should
+    # cost kilobytes per CV, never anything from the render itself.
+    markdowns = iter(synthetic_cv(SIZES["small"], seed=seed) for seed in range(1000))
+    traced, _ = _growth(lambda: _render(next(markdowns))(), warmup=3, runs=LEAK_RUNS)
+    assert traced < 2 * MB, f"traced memory grew {traced / MB:.1f} MB over {LEAK_RUNS} distinct CVs"
@@ -0,0 +1,127 @@
+"""Tests for stage timings and Prometheus histograms."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from cv_gen import metrics
+from cv_gen.metrics import Counter, Gauge, Histogram
+
+
+def test_histogram_render():
+    h = Histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    h.observe(0.05, stage="a")
+    h.observe(0.5, stage="a")
+    h.observe(5, stage="a")
+    assert h.render() == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="a",le="0.1"} 1',
+        'test_seconds_bucket{stage="a",le="1.0"} 2',
+        'test_seconds_bucket{stage="a",le="+Inf"} 3',
+        'test_seconds_sum{stage="a"} 5.55',
+        'test_seconds_count{stage="a"} 3',
+    ]
+
+
+def test_histogram_bucket_bounds_are_inclusive():
+    h = Histogram("test_seconds", "Test.", buckets=(1.0,))
+    h.observe(1.0)
+    assert 'test_seconds_bucket{le="1.0"} 1' in h.render()
+
+
+def test_counter_and_gauge_render():
+    c = Counter("test_total", "Test.", ("reason",))
+    c.inc(reason="full")
+    c.inc(2, reason="full")
+    assert c.render() == ["# HELP test_total Test.", "# TYPE test_total counter", 'test_total{reason="full"} 3.0']
+    g = Gauge("test_depth", "Test.")
+    g.set(5)
+    g.dec()
+    assert g.value() == 4
+    assert g.render()[1:] == ["# TYPE test_depth gauge", "test_depth 4.0"]
+
+
+def test_histogram_escapes_label_values():
+    h = Histogram("test_seconds", "Test.", ("model",))
+    h.observe(1, model='a"b\\c')
+    assert 'model="a\\"b\\\\c"' in h.render()[2]
+
+
+def test_histogram_count_and_clear():
+    h = Histogram("test_seconds", "Test.", ("stage",))
+    h.observe(0.1, stage="a")
+    h.observe(0.1, stage="b")
+    assert h.count(stage="a") == 1
+    h.clear()
+    assert h.count(stage="a") == 0
+
+
+# --- Per-request timings ---
+
+
+def test_stage_records_histogram_and_timings():
+    before = metrics.STAGE_SECONDS.count(stage="unit")
+    with metrics.collect_timings() as timings:
+        with metrics.stage("unit"):
+            pass
+    assert [name for name, _ in timings] == ["unit"]
+    assert metrics.STAGE_SECONDS.count(stage="unit") == before + 1
+
+
+def test_stage_outside_collect_only_records_histogram():
+    with metrics.stage("unit"):
+        pass
+    with metrics.collect_timings() as timings:
+        pass
+    assert timings == []
+
+
+def test_stage_records_on_error():
+    with metrics.collect_timings() as timings, pytest.raises(ValueError):
+        with metrics.stage("unit"):
+            raise ValueError
+    assert len(timings) == 1
+
+
+def test_collect_timings_is_per_thread():
+    seen = []
+
+    def other_thread():
+        with metrics.stage("unit"):
+            pass
+        with metrics.collect_timings() as timings:
+            seen.append(timings)
+
+    with metrics.collect_timings() as timings:
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+    assert timings == []
+    assert seen == [[]]
+
+
+def test_server_timing():
+    assert metrics.server_timing([("parse", 0.0012), ("total", 0.5)]) == "parse;dur=1.20, total;dur=500.00"
+
+
+def test_ai_call_outcome():
+    labels = dict(provider="p", model="m", operation="convert")
+    before_ok = metrics.AI_REQUEST_SECONDS.count(**labels, outcome="ok")
+    before_error = metrics.AI_REQUEST_SECONDS.count(**labels, outcome="error")
+    with metrics.ai_call("p", "m", "convert"):
+        pass
+    with pytest.raises(RuntimeError), metrics.ai_call("p", "m", "convert"):
+        raise RuntimeError
+    assert metrics.AI_REQUEST_SECONDS.count(**labels, outcome="ok") == before_ok + 1
+    assert metrics.AI_REQUEST_SECONDS.count(**labels, outcome="error") == before_error + 1
+
+
+def test_render_metrics_lists_registered_metrics():
+    text = metrics.render_metrics()
+    for name in ("cv_gen_stage_seconds", "cv_gen_http_request_seconds", "cv_gen_ai_request_seconds"):
+        assert f"# TYPE {name} histogram" in text
+    assert "# TYPE cv_gen_queue_depth gauge" in text
+    assert "# TYPE cv_gen_queue_rejected_total counter" in text
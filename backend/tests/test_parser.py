@@ -1,5 +1,8 @@
 """Tests for the Markdown CV parser."""
 
+import pytest
+
+from cv_gen import parser
 from cv_gen.parser import parse_cv, _detect_section_type, _slugify
 
 
@@ -139,3 +142,63 @@ name: Test
     cv = parse_cv(md)
     assert len(cv.sections) == 1
     assert cv.sections[0].content_html == ""
+
+
+# --- Memoization ---
+
+
+@pytest.fixture
+def md_calls(monkeypatch):
+    """Clear the parser caches and record every Markdown conversion."""
+    parser.clear_caches()
+    calls: list[str] = []
+    render_md = parser._render_md
+
+    def counting(text: str) -> str:
+        calls.append(text)
+        return render_md(text)
+
+    monkeypatch.setattr(parser, "_render_md", counting)
+    yield calls
+    parser.clear_caches()
+
+
+def test_parse_cached_document(md_calls):
+    first = parse_cv(SAMPLE_MD)
+    converted = len(md_calls)
+    second = parse_cv(SAMPLE_MD)
+    assert second == first
+    assert len(md_calls) == converted
+
+
+def test_parse_returns_independent_copies(md_calls):
+    first = parse_cv(SAMPLE_MD)
+    first.sections[0].content_html = "<p>mutated</p>"
+    first.contact.name = "Mutated"
+    second = parse_cv(SAMPLE_MD)
+    assert second.sections[0].content_html != "<p>mutated</p>"
+    assert second.contact.name == "Test User"
+
+
+def test_edit_rerenders_only_changed_section(md_calls):
+    parse_cv(SAMPLE_MD)
+    md_calls.clear()
+    edited = SAMPLE_MD.replace("- Logro 2", "- Logro 2\n- Logro 3")
+    cv = parse_cv(edited)
+    assert len(md_calls) == 1
+    assert "Logro 3" in md_calls[0]
+    assert "Logro 3" in cv.sections[1].content_html
+
+
+def test_frontmatter_edit_reuses_sections(md_calls):
+    parse_cv(SAMPLE_MD)
+    md_calls.clear()
+    cv = parse_cv(SAMPLE_MD.replace("name: Test User", "name: Other User"))
+    assert md_calls == []
+    assert cv.contact.name == "Other User"
+    assert len(cv.sections) == 5
+
+
+def test_parse_cached_matches_uncached(md_calls):
+    cached = parse_cv(SAMPLE_MD)
+    assert cached == parser._parse_cv(SAMPLE_MD)
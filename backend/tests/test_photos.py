@@ -0,0 +1,128 @@
+"""Tests for the contact photo pipeline."""
+
+from __future__ import annotations
+
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from cv_gen.photos import PhotoCache, PhotoError, resolve_photo_url
+
+
+def _image_bytes(size, fmt="JPEG", mode="RGB") -> bytes:
+    buf = io.BytesIO()
+    Image.new(mode, size, "red").save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return path.as_uri()
+
+
+def test_resolve_relative_photo(tmp_path):
+    assert resolve_photo_url("my photo.jpg", str(tmp_path)) == (tmp_path / "my photo.jpg").as_uri()
+
+
+def test_resolve_absolute_photo(tmp_path):
+    assert resolve_photo_url("https://example.com/a.jpg", str(tmp_path)) == "https://example.com/a.jpg"
+    assert resolve_photo_url(str(tmp_path / "a.jpg"), "/elsewhere") == (tmp_path / "a.jpg").as_uri()
+
+
+def test_large_photo_is_downscaled(tmp_path):
+    url = _write(tmp_path / "big.jpg", _image_bytes((2000, 1500)))
+    photo = PhotoCache(max_px=400).load(url)
+    assert photo.mime_type == "image/jpeg"
+    with Image.open(io.BytesIO(photo.data)) as image:
+        assert max(image.size) == 400
+    assert len(photo.data) < (tmp_path / "big.jpg").stat().st_size
+
+
+def test_small_photo_is_kept(tmp_path):
+    data = _image_bytes((100, 100), "PNG")
+    photo = PhotoCache(max_px=400).load(_write(tmp_path / "small.png", data))
+    assert photo.data == data
+    assert photo.mime_type == "image/png"
+
+
+def test_transparent_photo_stays_png(tmp_path):
+    url = _write(tmp_path / "alpha.png", _image_bytes((1000, 1000), "PNG", "RGBA"))
+    assert PhotoCache(max_px=400).load(url).mime_type == "image/png"
+
+
+def test_photo_is_read_once(tmp_path, monkeypatch):
+    url = _write(tmp_path / "big.jpg", _image_bytes((1000, 1000)))
+    cache = PhotoCache(max_px=400)
+    first = cache.load(url)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("photo source read again")
+
+    monkeypatch.setattr(cache, "_read", fail)
+    assert cache.load(url) is first
+
+
+def test_same_content_shares_entry(tmp_path):
+    data = _image_bytes((1000, 1000))
+    cache = PhotoCache(max_px=400)
+    first = cache.load(_write(tmp_path / "a.jpg", data))
+    second = cache.load(_write(tmp_path / "b.jpg", data))
+    assert first is second
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / "a.png"
+    cache = PhotoCache(max_px=400)
+    first = cache.load(_write(path, _image_bytes((10, 10), "PNG")))
+    path.write_bytes(_image_bytes((20, 20), "PNG"))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.load(path.as_uri()).digest != first.digest
+
+
+def test_size_cap(tmp_path):
+    url = _write(tmp_path / "big.jpg", _image_bytes((1000, 1000)))
+    with pytest.raises(PhotoError, match="too large"):
+        PhotoCache(max_source_bytes=100).load(url)
+
+
+def test_missing_and_invalid_photos(tmp_path):
+    cache = PhotoCache()
+    with pytest.raises(PhotoError, match="not found"):
+        cache.load((tmp_path / "missing.jpg").as_uri())
+    with pytest.raises(PhotoError, match="decode"):
+        cache.load(_write(tmp_path / "bad.jpg", b"not an image"))
+
+
+def test_directory_photo(tmp_path):
+    with pytest.raises(PhotoError, match="Cannot read"):
+        PhotoCache().load(tmp_path.as_uri())
+
+
+def test_unreadable_photo(tmp_path, monkeypatch):
+    url = _write(tmp_path / "locked.jpg", _image_bytes((10, 10)))
+
+    def denied(*args, **kwargs):
+        raise PermissionError(13, "Permission denied")
+
+    # Patched at module level: chmod does not stop root from reading.
+    monkeypatch.setattr("cv_gen.photos.open", denied, raising=False)
+    with pytest.raises(PhotoError, match="Permission denied"):
+        PhotoCache().load(url)
+
+
+def test_photo_removed_after_stat(tmp_path):
+    with pytest.raises(PhotoError, match="Cannot read"):
+        PhotoCache()._read((tmp_path / "gone.jpg").as_uri())
+
+
+def test_data_url_photo():
+    import base64
+
+    data = _image_bytes((1000, 1000))
+    url = "data:image/jpeg;base64," + base64.b64encode(data).decode()
+    photo = PhotoCache(max_px=400).load(url)
+    with Image.open(io.BytesIO(photo.data)) as image:
+        assert max(image.size) == 400
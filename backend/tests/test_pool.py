@@ -0,0 +1,85 @@
+"""Tests for the render process pool."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from cv_gen.pool import RenderPool, current_rss
+
+SAMPLE_MD = (Path(__file__).resolve().parent.parent / "examples" / "sample_cv.md").read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(1, max_tasks_per_worker=10)
+    yield pool
+    pool.shutdown()
+
+
+def test_current_rss():
+    assert current_rss() > 0
+
+
+def test_render_in_worker(pool):
+    async def run():
+        await pool.start()
+        with await pool.render_pdf(SAMPLE_MD, "modern") as pdf_file:
+            return pdf_file.read(5)
+
+    assert asyncio.run(run()) == b"%PDF-"
+    assert pool.recycles == 0
+
+
+def test_recycles_when_rss_exceeds_ceiling():
+    pool = RenderPool(1, max_rss_bytes=1)
+    try:
+        with asyncio.run(pool.render_pdf(SAMPLE_MD, "minimal")) as pdf_file:
+            assert pdf_file.read(5) == b"%PDF-"
+        assert pool.recycles == 1
+    finally:
+        pool.shutdown()
+
+
+def test_render_task_writes_temporary_file(monkeypatch):
+    from cv_gen import pool as pool_module
+
+    def fake_render(cv, output, template):
+        output.write(b"%PDF-fake")
+
+    monkeypatch.setattr(pool_module, "render_pdf", fake_render)
+    path, _, _ = pool_module._render_task(SAMPLE_MD, "modern")
+    with pool_module._open_and_unlink(path) as pdf_file:
+        assert not Path(path).exists()
+        assert pdf_file.read() == b"%PDF-fake"
+
+
+def test_render_task_accepts_parsed_cv(monkeypatch):
+    from cv_gen import pool as pool_module
+    from cv_gen.parser import parse_cv
+
+    rendered = []
+    monkeypatch.setattr(pool_module, "render_pdf", lambda cv, output, template: rendered.append(cv))
+    cv = parse_cv(SAMPLE_MD)
+    path, _, _ = pool_module._render_task(cv, "modern")
+    pool_module._open_and_unlink(path).close()
+    assert rendered == [cv]
+
+
+def test_render_task_returns_stage_timings(monkeypatch):
+    from cv_gen import pool as pool_module
+
+    monkeypatch.setattr(pool_module, "render_pdf", lambda cv, output, template: None)
+    path, _, timings = pool_module._render_task(SAMPLE_MD, "modern")
+    pool_module._open_and_unlink(path).close()
+    assert "parse" in [name for name, _ in timings]
+
+
+def test_warmup_cv_falls_back_to_builtin(tmp_path, monkeypatch):
+    from cv_gen import pool as pool_module
+
+    assert pool_module._warmup_cv().contact.name == "Juan Perez Garcia"
+    monkeypatch.setattr(pool_module, "WARMUP_CV_PATH", tmp_path / "missing.md")
+    assert pool_module._warmup_cv() is pool_module._WARMUP_CV
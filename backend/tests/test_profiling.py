@@ -0,0 +1,68 @@
+"""Tests for stage-by-stage profiling."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from cv_gen import metrics, profiling
+from cv_gen.profiling import format_report, profile_template, write_collapsed
+
+SAMPLE = str(Path(__file__).resolve().parent.parent / "examples" / "sample_cv.md")
+
+
+def test_profile_template_breaks_down_by_stage():
+    result = profile_template(SAMPLE, "modern", 2, pdf=False)
+    assert {"frontmatter", "markdown", "parse", "jinja"} <= set(result.stages)
+    assert len(result.stages["markdown"].seconds) == 2
+    assert result.stages["markdown"].stats is not None
+    assert result.stages["other"].stats is not None
+    assert result.stages["markdown"].allocations
+    assert not result.stacks
+
+
+def test_profile_template_without_memory():
+    result = profile_template(SAMPLE, "minimal", 1, pdf=False, memory=False)
+    assert all(not stage.allocations for stage in result.stages.values())
+
+
+def test_profiler_attributes_work_to_innermost_stage():
+    def busy():
+        sum(range(10_000))
+
+    profiler = profiling._StageProfiler()
+    with profiler.tracking():
+        with metrics.stage("outer"):
+            with metrics.stage("inner"):
+                busy()
+
+    def functions(stage):
+        profiler.profiles[stage].create_stats()
+        return {name for _, _, name in profiler.profiles[stage].stats}
+
+    assert "busy" in functions("inner")
+    assert "busy" not in functions("outer")
+
+
+def test_sampler_prefixes_template_and_stage(monkeypatch):
+    def slow_render(cv, template):
+        with metrics.stage("jinja"):
+            time.sleep(0.05)
+
+    monkeypatch.setattr(profiling, "render_html", slow_render)
+    result = profile_template(SAMPLE, "modern", 1, pdf=False, memory=False, sample_interval=0.001)
+    assert any(stack.startswith("modern;jinja;run_pipeline ") for stack in result.stacks)
+
+
+def test_format_report():
+    result = profile_template(SAMPLE, "modern", 1, pdf=False)
+    report = format_report(result, sort="tottime", limit=3)
+    assert report.startswith("=== modern (1 runs) ===")
+    assert "--- cProfile: markdown (sorted by tottime) ---" in report
+    assert "--- tracemalloc: markdown" in report
+
+
+def test_write_collapsed(tmp_path):
+    path = tmp_path / "stacks.txt"
+    write_collapsed({"t;parse;b": 2, "t;parse;a": 1}, path)
+    assert path.read_text() == "t;parse;a 1\nt;parse;b 2\n"
@@ -0,0 +1,116 @@
+"""Tests for the GCRA rate limiter."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from cv_gen.ratelimit import MemoryBackend, RateLimiter, SQLiteBackend
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(shards=4, sweep_interval=10)
+    return SQLiteBackend(tmp_path / "limits.sqlite3", sweep_interval=10)
+
+
+def test_burst_then_steady_rate(backend):
+    clock = FakeClock()
+    limiter = RateLimiter(5, 60, backend, clock=clock)
+    assert all(limiter.hit("ip").allowed for _ in range(5))
+    denied = limiter.hit("ip")
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(12)
+
+    clock.now += 11.9
+    assert not limiter.hit("ip").allowed
+    clock.now += 0.1
+    assert limiter.hit("ip").allowed  # one request every 60 / 5 seconds
+    assert not limiter.hit("ip").allowed
+
+
+def test_keys_are_independent(backend):
+    limiter = RateLimiter(1, 60, backend, clock=FakeClock())
+    assert limiter.hit("a").allowed
+    assert not limiter.hit("a").allowed
+    assert limiter.hit("b").allowed
+
+
+def test_denied_requests_do_not_extend_the_wait(backend):
+    clock = FakeClock()
+    limiter = RateLimiter(2, 10, backend, clock=clock)
+    limiter.hit("ip"), limiter.hit("ip")
+    for _ in range(100):
+        assert not limiter.hit("ip").allowed
+    clock.now += 5
+    assert limiter.hit("ip").allowed
+
+
+def test_idle_keys_are_evicted(backend):
+    clock = FakeClock()
+    limiter = RateLimiter(10, 60, backend, clock=clock)
+    for i in range(100):
+        limiter.hit(f"ip-{i}")
+    assert len(backend) == 100
+    # One request each left 6 s on their TAT; after the sweep interval
+    # the next check sweeps every full bucket.
+    clock.now += 30
+    for i in range(100):
+        limiter.hit(f"new-{i}")
+    assert not any(key.startswith("ip-") for key in _keys(backend))
+
+
+def _keys(backend):
+    if isinstance(backend, MemoryBackend):
+        return [key for shard in backend._shards for key in shard.tats]
+    return [row[0] for row in backend._connect().execute("SELECT key FROM rate_limits")]
+
+
+def test_sqlite_limit_is_shared_between_processes(tmp_path):
+    # Two limiters on the same file stand in for two uvicorn workers.
+    clock = FakeClock()
+    path = tmp_path / "limits.sqlite3"
+    first = RateLimiter(4, 60, SQLiteBackend(path), clock=clock)
+    second = RateLimiter(4, 60, SQLiteBackend(path), clock=clock)
+    results = [limiter.hit("ip").allowed for limiter in (first, second) * 3]
+    assert results == [True, True, True, True, False, False]
+
+
+def test_concurrent_hits_never_exceed_the_limit(backend):
+    limiter = RateLimiter(50, 3600, backend)
+    allowed = []
+
+    def hammer():
+        allowed.extend(limiter.hit("ip").allowed for _ in range(40))
+
+    threads = [threading.Thread(target=hammer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(allowed) == 50
+
+
+def test_async_check(backend):
+    limiter = RateLimiter(1, 60, backend, clock=FakeClock())
+
+    async def run():
+        return [await limiter.check("ip") for _ in range(2)]
+
+    assert [result.allowed for result in asyncio.run(run())] == [True, False]
+
+
+def test_invalid_limit():
+    with pytest.raises(ValueError, match="Invalid rate limit"):
+        RateLimiter(0, 60)
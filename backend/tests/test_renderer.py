@@ -1,10 +1,23 @@
 """Tests for the CV renderer."""
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 import weasyprint
 
 from cv_gen.models import CVData, ContactInfo, Section
-from cv_gen.renderer import get_available_templates, render_html, TEMPLATES_DIR
+from cv_gen.renderer import (
+    TemplateRegistry,
+    _render_document,
+    get_available_templates,
+    get_font_config,
+    get_template,
+    render_html,
+    render_pdf_bytes,
+    render_preview_html,
+    TEMPLATES_DIR,
+)
 
 
 @pytest.fixture
@@ -67,6 +80,168 @@ def test_invalid_template(sample_cv):
         render_html(sample_cv, "nonexistent")
 
 
+# --- Template registry ---
+
+
+def _write_template(root, name, html, css=""):
+    template_dir = root / name
+    template_dir.mkdir(exist_ok=True)
+    (template_dir / "template.html").write_text(html, encoding="utf-8")
+    (template_dir / "style.css").write_text(css, encoding="utf-8")
+    return template_dir
+
+
+def _bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_registry_compiles_once():
+    assert get_template("modern") is get_template("modern")
+
+
+def test_registry_reloads_on_mtime_change(tmp_path):
+    template_dir = _write_template(tmp_path, "t", "v1 {{ css }}", "a {}")
+    registry = TemplateRegistry(tmp_path, auto_reload=True)
+    first = registry.get("t")
+    assert first.template.render(css=first.css) == "v1 a {}"
+
+    (template_dir / "template.html").write_text("v2 {{ css }}", encoding="utf-8")
+    _bump_mtime(template_dir / "template.html")
+    second = registry.get("t")
+    assert second is not first
+    assert second.template.render(css=second.css) == "v2 a {}"
+    assert second.version != first.version
+
+    (template_dir / "style.css").write_text("b {}", encoding="utf-8")
+    _bump_mtime(template_dir / "style.css")
+    assert registry.get("t").css == "b {}"
+
+
+def test_registry_without_auto_reload_keeps_entry(tmp_path):
+    template_dir = _write_template(tmp_path, "t", "v1")
+    registry = TemplateRegistry(tmp_path, auto_reload=False)
+    first = registry.get("t")
+
+    (template_dir / "template.html").write_text("v2", encoding="utf-8")
+    _bump_mtime(template_dir / "template.html")
+    assert registry.get("t") is first
+
+    registry.clear()
+    assert registry.get("t").template.render() == "v2"
+
+
+def test_registry_bytecode_cache(tmp_path):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    _write_template(templates, "t", "{{ 1 + 1 }}")
+    cache_dir = tmp_path / "bytecode"
+
+    TemplateRegistry(templates, bytecode_cache_dir=str(cache_dir)).get("t")
+    assert any(cache_dir.iterdir())
+
+    # A fresh registry (cold worker) renders from the cached bytecode.
+    assert TemplateRegistry(templates, bytecode_cache_dir=str(cache_dir)).get("t").template.render() == "2"
+
+
+def test_registry_caches_template_discovery(tmp_path, monkeypatch):
+    _write_template(tmp_path, "a", "a")
+    registry = TemplateRegistry(tmp_path, auto_reload=False)
+    assert registry.available() == ["a"]
+
+    scans = []
+    iterdir = type(tmp_path).iterdir
+    monkeypatch.setattr(type(tmp_path), "iterdir", lambda self: scans.append(self) or iterdir(self))
+    _write_template(tmp_path, "b", "b")
+    assert registry.available() == ["a"]
+    assert scans == []
+
+    registry.clear()
+    assert registry.available() == ["a", "b"]
+
+
+def test_registry_rediscovers_when_directory_changes(tmp_path):
+    _write_template(tmp_path, "a", "a")
+    registry = TemplateRegistry(tmp_path, auto_reload=True)
+    assert registry.available() == ["a"]
+
+    _write_template(tmp_path, "b", "b")
+    _bump_mtime(tmp_path)
+    assert registry.available() == ["a", "b"]
+
+
+# --- Pre-parsed stylesheets ---
+
+
+def test_render_html_without_inline_css(sample_cv):
+    html = render_html(sample_cv, "modern", inline_css=False)
+    assert "Test User" in html
+    assert "<style>" not in html
+    assert "<style>" in render_html(sample_cv, "modern")
+
+
+def test_stylesheet_parsed_once():
+    compiled = get_template("modern")
+    assert compiled.stylesheet() is compiled.stylesheet()
+    assert isinstance(compiled.stylesheet(), weasyprint.CSS)
+
+
+def test_font_config_is_shared():
+    assert get_font_config() is get_font_config()
+
+
+def test_font_config_and_stylesheet_are_per_thread():
+    with ThreadPoolExecutor(1) as executor:
+        other = executor.submit(lambda: (get_font_config(), get_template("modern").stylesheet())).result()
+    assert other[0] is not get_font_config()
+    assert other[1] is not get_template("modern").stylesheet()
+
+
+@pytest.mark.parametrize("template_name", ["modern", "minimal"])
+def test_concurrent_renders_are_identical(sample_cv, template_name):
+    expected = render_pdf_bytes(sample_cv, template_name)
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: render_pdf_bytes(sample_cv, template_name), range(8)))
+    assert results == [expected] * 8
+
+
+@pytest.mark.parametrize("template_name", ["modern", "minimal"])
+def test_pdf_bytes_are_deterministic(sample_cv, template_name):
+    first = render_pdf_bytes(sample_cv, template_name)
+    assert first[:5] == b"%PDF-"
+    assert render_pdf_bytes(sample_cv, template_name) == first
+
+
+# --- Live preview ---
+
+
+def test_preview_html_is_self_contained(sample_cv, tmp_path):
+    from PIL import Image
+
+    photo = tmp_path / "photo.png"
+    Image.new("RGB", (1000, 1000), "red").save(photo)
+    sample_cv.contact.photo = str(photo)
+    html = render_preview_html(sample_cv, "modern")
+    assert "Test User" in html
+    assert "<style>" in html
+    assert 'src="data:image/jpeg;base64,' in html
+    assert str(photo) not in html
+
+
+@pytest.mark.parametrize("name", ["missing.png", "folder"])
+def test_preview_html_skips_unreadable_photo(sample_cv, tmp_path, name):
+    (tmp_path / "folder").mkdir()
+    sample_cv.contact.photo = str(tmp_path / name)
+    html = render_preview_html(sample_cv, "modern")
+    assert name not in html
+    assert 'class="photo"' not in html
+
+
+def test_preview_css_built_once():
+    compiled = get_template("minimal")
+    assert compiled.preview_css() is compiled.preview_css()
+
+
 def _make_long_cv() -> CVData:
     """Create a CV with enough content to span multiple pages."""
     jobs = []
@@ -141,6 +316,52 @@ def test_multipage_generates_multiple_pages(template_name):
     assert pages >= 2, f"Expected multi-page PDF, got {pages} page(s)"
 
 
+@pytest.mark.parametrize("template_name", ["modern", "minimal"])
+def test_external_stylesheet_matches_inline_css(template_name):
+    """Passing the pre-parsed stylesheet lays out the same pages as inline CSS."""
+    cv = _make_long_cv()
+    inline_doc = _render_doc(render_html(cv, template_name), template_name)
+    external_doc = _render_document(get_template(template_name), render_html(cv, template_name, inline_css=False))
+
+    assert len(external_doc.pages) == len(inline_doc.pages)
+    for inline_page, external_page in zip(inline_doc.pages, external_doc.pages):
+        assert inline_page._page_box.margin_top == external_page._page_box.margin_top
+        assert inline_page._page_box.margin_left == external_page._page_box.margin_left
+
+
+def _styles_by_id(document) -> dict[str, dict]:
+    styles = {}
+    for page in document.pages:
+        for box in page._page_box.descendants():
+            element_id = box.element.get("id") if box.element is not None else None
+            if element_id and box.element_tag in ("h3", "p"):
+                styles.setdefault(element_id, box.style)
+    return styles
+
+
+@pytest.mark.parametrize("template_name", ["modern", "minimal"])
+def test_cv_embedded_css_cascades_like_inline_template_css(template_name):
+    """Rules embedded in the CV resolve against the template the same way as
+    with the template CSS inlined: by specificity, then source order."""
+    cv = _make_long_cv()
+    cv.sections[1].content_html += (  # experience: in .section-content in both templates
+        "<style>"
+        "h3 { color: rgb(255, 0, 0); }"  # less specific than the template: loses
+        ".section-content h3 { font-size: 20pt; }"  # same specificity, later: wins
+        "#probe-p { margin-bottom: 9mm !important; }"
+        "</style>"
+        '<h3 id="probe-h3">Probe</h3><p id="probe-p" style="margin-bottom: 1mm">Probe</p>'
+    )
+    inline_doc = _render_doc(render_html(cv, template_name), template_name)
+    external_doc = _render_document(get_template(template_name), render_html(cv, template_name, inline_css=False))
+
+    inline, external = _styles_by_id(inline_doc), _styles_by_id(external_doc)
+    for element_id, properties in (("probe-h3", ("color", "font_size")), ("probe-p", ("margin_bottom",))):
+        for name in properties:
+            assert external[element_id][name] == inline[element_id][name], (element_id, name)
+    assert external["probe-h3"]["font_size"] == pytest.approx(20 * 4 / 3)  # px
+
+
 def test_modern_multipage_has_sidebar_background():
     """The modern template must paint the sidebar background on every page via @page background."""
     cv = _make_long_cv()
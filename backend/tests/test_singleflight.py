@@ -0,0 +1,115 @@
+"""Tests for single-flight coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from cv_gen import metrics
+from cv_gen.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight("test-share")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "pdf"
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+
+    assert asyncio.run(run()) == [("pdf", False), ("pdf", True), ("pdf", True)]
+    assert calls == [1]
+    assert len(flights) == 0
+    assert metrics.COALESCED_CALLS.value(flight="test-share") == 2
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight("test-keys")
+
+    async def run():
+        return await asyncio.gather(flights.do("a", _value("a")), flights.do("b", _value("b")))
+
+    assert asyncio.run(run()) == [("a", False), ("b", False)]
+
+
+def _value(value):
+    async def work():
+        await asyncio.sleep(0)
+        return value
+
+    return work
+
+
+def test_sequential_calls_are_not_shared():
+    flights = SingleFlight("test-sequential")
+
+    async def run():
+        return [await flights.do("key", _value(n)) for n in range(2)]
+
+    assert asyncio.run(run()) == [(0, False), (1, False)]
+
+
+def test_exception_reaches_every_caller():
+    flights = SingleFlight("test-error")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("layout exploded")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", fail) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(r) for r in results] == [ValueError, ValueError]
+    assert len(flights) == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight("test-cancel")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "pdf"
+
+    async def run():
+        first = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == ("pdf", True)
+
+
+def test_result_of_cancelled_starter_is_discarded():
+    flights = SingleFlight("test-discard")
+    discarded = []
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "file"
+
+    async def run():
+        first = asyncio.create_task(flights.do("key", work, discard=discarded.append))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.do("key", work, discard=discarded.append))
+        await asyncio.sleep(0)
+        second.cancel()  # joined: the starter still takes the result
+        first.cancel()
+        for task in (first, second):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        await asyncio.sleep(0.05)
+        # Not discarded when the caller gets the result.
+        return await flights.do("key", work, discard=discarded.append)
+
+    assert asyncio.run(run()) == ("file", False)
+    assert discarded == ["file"]
@@ -0,0 +1,43 @@
+"""Tests for the polling file watcher."""
+
+import os
+
+from cv_gen.watch import Watcher
+
+
+def _touch(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_detects_content_change(tmp_path):
+    cv = tmp_path / "cv.md"
+    cv.write_text("a")
+    watcher = Watcher([cv])
+    assert watcher.poll() == []
+
+    cv.write_text("b")
+    _touch(cv)
+    assert watcher.poll() == [cv]
+    assert watcher.poll() == []
+
+
+def test_ignores_touch_without_change(tmp_path):
+    cv = tmp_path / "cv.md"
+    cv.write_text("a")
+    watcher = Watcher([cv])
+    _touch(cv)
+    assert watcher.poll() == []
+
+
+def test_watches_directories(tmp_path):
+    template_dir = tmp_path / "modern"
+    template_dir.mkdir()
+    (template_dir / "style.css").write_text("a {}")
+    watcher = Watcher([template_dir])
+
+    (template_dir / "extra.css").write_text("b {}")
+    assert watcher.poll() == [template_dir]
+
+    (template_dir / "extra.css").unlink()
+    assert watcher.poll() == [template_dir]
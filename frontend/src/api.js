@@ -4,15 +4,41 @@ export async function fetchTemplates() {
   return res.json()
 }
 
-export async function generatePdf(markdown, template) {
-  const res = await fetch('/api/pdf', {
+export async function renderPreview(markdown, template, signal) {
+  const res = await fetch('/api/preview', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({ markdown, template }),
+    signal,
+  })
+  if (!res.ok) throw new Error(`Failed to render preview: ${res.status}`)
+  return res.text()
+}
+
+export async function generatePdf(markdown, template, etag = '') {
+  const headers = { 'Content-Type': 'application/json' }
+  if (etag) headers['If-None-Match'] = etag
+  const res = await fetch('/api/pdf', {
+    method: 'POST',
+    headers,
+    body: JSON.stringify({ markdown, template }),
   })
+  // Same markdown and template as the PDF we already have
+  if (res.status === 304) return null
   if (!res.ok) throw new Error(`Failed to generate PDF: ${res.status}`)
   const blob = await res.blob()
-  return URL.createObjectURL(blob)
+  return { url: URL.createObjectURL(blob), etag: res.headers.get('ETag') || '' }
+}
+
+export async function generateTemplatesZip(markdown, templates = []) {
+  // One request: the CV is parsed once and rendered with every template
+  const res = await fetch('/api/pdf/templates', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ markdown, templates }),
+  })
+  if (!res.ok) throw new Error(`Failed to generate PDFs: ${res.status}`)
+  return URL.createObjectURL(await res.blob())
 }
 
 export function downloadBlob(url, filename) {
@@ -1,9 +1,12 @@
-import { generatePdf, downloadBlob } from '../api.js'
+import { renderPreview, generatePdf, generateTemplatesZip, downloadBlob } from '../api.js'
 import css from './pdf-preview.css?inline'
 
 const styles = new CSSStyleSheet()
 styles.replaceSync(css)
 
+// Wait for a pause in typing before asking for a new preview
+const PREVIEW_DELAY_MS = 300
+
 class PdfPreview extends HTMLElement {
   constructor() {
     super()
@@ -13,7 +16,10 @@ class PdfPreview extends HTMLElement {
     this._markdown = ''
     this._template = 'modern'
     this._pdfUrl = ''
+    this._etag = ''
     this._isGenerating = false
+    this._previewTimer = null
+    this._previewController = null
 
     this._render()
   }
@@ -24,7 +30,8 @@ class PdfPreview extends HTMLElement {
 
   set markdown(v) {
     this._markdown = v
-    this._updateGenerateBtn()
+    this._updateDownloadBtn()
+    this._schedulePreview()
   }
 
   get template() {
@@ -33,16 +40,18 @@ class PdfPreview extends HTMLElement {
 
   set template(v) {
     this._template = v
+    this._schedulePreview()
   }
 
   _render() {
     this.shadowRoot.innerHTML = `
       <div class="preview-wrapper">
         <div class="empty">
-          <p>Escribe tu CV en Markdown y pulsa <strong>Generar PDF</strong></p>
+          <p>Escribe tu CV en Markdown para ver la vista previa</p>
         </div>
         <div class="actions">
-          <button class="generate-btn" disabled>Generar PDF</button>
+          <button class="download-btn" disabled>Descargar PDF</button>
+          <button class="download-all-btn" disabled>Todas las plantillas (.zip)</button>
         </div>
       </div>
     `
@@ -50,33 +59,42 @@ class PdfPreview extends HTMLElement {
     this._wrapper = this.shadowRoot.querySelector('.preview-wrapper')
     this._emptyEl = this.shadowRoot.querySelector('.empty')
     this._actionsEl = this.shadowRoot.querySelector('.actions')
-    this._generateBtn = this.shadowRoot.querySelector('.generate-btn')
+    this._downloadBtn = this.shadowRoot.querySelector('.download-btn')
+    this._downloadAllBtn = this.shadowRoot.querySelector('.download-all-btn')
+
+    this._downloadBtn.addEventListener('click', () => this._handleDownload())
+    this._downloadAllBtn.addEventListener('click', () => this._handleDownloadAll())
+  }
 
-    this._generateBtn.addEventListener('click', () => this._handleGenerate())
+  _updateDownloadBtn() {
+    const disabled = this._isGenerating || !this._markdown.trim()
+    this._downloadBtn.disabled = disabled
+    this._downloadAllBtn.disabled = disabled
   }
 
-  _updateGenerateBtn() {
-    this._generateBtn.disabled = this._isGenerating || !this._markdown.trim()
+  _schedulePreview() {
+    clearTimeout(this._previewTimer)
+    this._previewTimer = setTimeout(() => this._updatePreview(), PREVIEW_DELAY_MS)
   }
 
-  async _handleGenerate() {
+  async _updatePreview() {
     if (!this._markdown.trim()) return
-    this._isGenerating = true
-    this._generateBtn.disabled = true
-    this._generateBtn.textContent = 'Generando...'
+    // Only the latest request matters: drop the one still in flight
+    if (this._previewController) this._previewController.abort()
+    const controller = new AbortController()
+    this._previewController = controller
 
     try {
-      if (this._pdfUrl) URL.revokeObjectURL(this._pdfUrl)
-      this._pdfUrl = await generatePdf(this._markdown, this._template)
-      this._showPdf()
+      const html = await renderPreview(this._markdown, this._template, controller.signal)
+      this._showPreview(html)
+    } catch (err) {
+      if (err.name !== 'AbortError') console.error(err)
     } finally {
-      this._isGenerating = false
-      this._generateBtn.textContent = 'Generar PDF'
-      this._updateGenerateBtn()
+      if (this._previewController === controller) this._previewController = null
     }
   }
 
-  _showPdf() {
+  _showPreview(html) {
     if (this._emptyEl) {
       this._emptyEl.remove()
       this._emptyEl = null
@@ -86,22 +104,50 @@ class PdfPreview extends HTMLElement {
     if (!iframe) {
       iframe = document.createElement('iframe')
       iframe.title = 'CV Preview'
+      // The CV may contain raw HTML: never run its scripts
+      iframe.sandbox = ''
       this._wrapper.insertBefore(iframe, this._actionsEl)
     }
-    iframe.src = this._pdfUrl
-
-    let downloadBtn = this.shadowRoot.querySelector('.download-btn')
-    if (!downloadBtn) {
-      downloadBtn = document.createElement('button')
-      downloadBtn.className = 'download-btn'
-      downloadBtn.textContent = 'Descargar PDF'
-      downloadBtn.addEventListener('click', () => this._handleDownload())
-      this._actionsEl.appendChild(downloadBtn)
+    iframe.srcdoc = html
+  }
+
+  async _handleDownload() {
+    if (!this._markdown.trim()) return
+    this._isGenerating = true
+    this._downloadBtn.disabled = true
+    this._downloadBtn.textContent = 'Generando...'
+
+    try {
+      const result = await generatePdf(this._markdown, this._template, this._etag)
+      if (result) {
+        if (this._pdfUrl) URL.revokeObjectURL(this._pdfUrl)
+        this._pdfUrl = result.url
+        this._etag = result.etag
+      }
+      if (this._pdfUrl) downloadBlob(this._pdfUrl, 'cv.pdf')
+    } finally {
+      this._isGenerating = false
+      this._downloadBtn.textContent = 'Descargar PDF'
+      this._updateDownloadBtn()
     }
   }
 
-  _handleDownload() {
-    if (this._pdfUrl) downloadBlob(this._pdfUrl, 'cv.pdf')
+  async _handleDownloadAll() {
+    if (!this._markdown.trim()) return
+    this._isGenerating = true
+    this._updateDownloadBtn()
+    this._downloadAllBtn.textContent = 'Generando...'
+
+    try {
+      const url = await generateTemplatesZip(this._markdown)
+      downloadBlob(url, 'cv-templates.zip')
+      // Let the download start before releasing the blob
+      setTimeout(() => URL.revokeObjectURL(url), 1000)
+    } finally {
+      this._isGenerating = false
+      this._downloadAllBtn.textContent = 'Todas las plantillas (.zip)'
+      this._updateDownloadBtn()
+    }
   }
 }
 